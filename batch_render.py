@@ -0,0 +1,27 @@
+import argparse
+import json
+from src.database.db_manager import DBManager
+from src.visualizers.batch_renderer import BatchRenderer
+from config.settings import BATCH_OUTPUT_DIR
+
+def main():
+    parser = argparse.ArgumentParser(description="Render chart variants in parallel (headless)")
+    parser.add_argument("--specs", help="JSON 文件：图表规格列表，每项含 name, format (png/svg/html), "
+                                        "yscale (log/linear), topics, start, end；缺省时渲染默认组合")
+    parser.add_argument("--workers", type=int, help="渲染进程数 (默认 CPU 核数)")
+    parser.add_argument("--out", default=BATCH_OUTPUT_DIR, help="输出目录")
+    args = parser.parse_args()
+
+    specs = None
+    if args.specs:
+        with open(args.specs, encoding="utf-8") as f:
+            specs = json.load(f)
+
+    db = DBManager()
+    results = BatchRenderer(db, output_dir=args.out, workers=args.workers).run(specs)
+    db.close()
+    if any(r["status"] != "ok" for r in results.values()):
+        raise SystemExit(1)
+
+if __name__ == "__main__":
+    main()
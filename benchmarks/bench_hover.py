@@ -0,0 +1,104 @@
+"""
+Hover 文本生成基准：逐行 iterrows 旧实现 vs 批量实现
+用法: python benchmarks/bench_hover.py [--models 100000] [--topics 1000] [--dates 1000]
+"""
+import argparse
+import os
+import sys
+import time
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from src.visualizers.interactive_visualizer import InteractiveChartGenerator
+
+
+def make_data(n_models, n_topics, n_dates, seed=0):
+    rng = np.random.default_rng(seed)
+    dates = pd.date_range("2022-01-01", periods=n_dates, freq="D")
+    pivot = pd.DataFrame(rng.integers(0, 50, size=(n_dates, n_topics)).astype(float),
+                         index=dates, columns=[f"topic-{i}" for i in range(n_topics)])
+    pivot["Total"] = pivot.sum(axis=1)
+    models = pd.DataFrame({
+        "model_id": [f"org/model-{i}" for i in range(n_models)],
+        "created_at": pd.Timestamp("2022-01-01") + pd.to_timedelta(rng.integers(0, 1000, n_models), unit="D"),
+        "context_length": rng.choice([2048, 4096, 8192, 32768, 131072, 1000000], n_models),
+        "downloads": np.where(rng.random(n_models) < 0.01, -1, rng.integers(1, 10**6, n_models)),
+    })
+    return pivot, models
+
+
+def legacy_tools_hover(df_pivot):
+    hover_texts = []
+    for index, row in df_pivot.iterrows():
+        top_contributors = row.drop('Total').sort_values(ascending=False).head(5)
+        detail_str = f"<b>📅 {index.strftime('%Y-%m-%d')}</b><br>"
+        detail_str += f"<b>Total Ecosystem Repos: {int(row['Total'])}</b><br>"
+        detail_str += "------------------<br>"
+        for topic, count in top_contributors.items():
+            if count > 0:
+                detail_str += f"{topic}: {int(count)}<br>"
+        hover_texts.append(detail_str)
+    return hover_texts
+
+
+def legacy_model_hover(viz, df_models):
+    def create_model_hover(row):
+        t = "Closed" if row['downloads'] == -1 else "Open Source"
+        if row['downloads'] > 0: t = "HuggingFace Model"
+        return (
+            f"<b>🤖 {row['model_id']}</b><br>"
+            f"📅 Release: {row['created_at'].strftime('%Y-%m-%d')}<br>"
+            f"🧠 Context: <b>{viz.format_tokens(row['context_length'])}</b> Tokens<br>"
+            f"🏷️ Type: {t}"
+        )
+    # 与旧版 generate_html_chart 一致：三个重叠子集各算一遍
+    subsets = [df_models[df_models['downloads'] > 0],
+               df_models[df_models['downloads'] == -1],
+               df_models[df_models['downloads'] > 0]]
+    return [[create_model_hover(r) for _, r in subset.iterrows()] for subset in subsets]
+
+
+def vectorized_model_hover(viz, df_models):
+    hover = viz.model_hover_texts(df_models)
+    closed_mask = (df_models['downloads'] == -1).to_numpy()
+    open_mask = (df_models['downloads'] > 0).to_numpy()
+    return [hover[open_mask], hover[closed_mask], hover[open_mask]]
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--models", type=int, default=100000)
+    parser.add_argument("--topics", type=int, default=1000)
+    parser.add_argument("--dates", type=int, default=1000)
+    args = parser.parse_args()
+
+    viz = InteractiveChartGenerator()
+    df_pivot, df_models = make_data(args.models, args.topics, args.dates)
+    print(f"📊 {args.models} models, {args.topics} topics, {args.dates} dates")
+
+    old_tools, t_old_tools = timed(legacy_tools_hover, df_pivot)
+    (_, _, new_tools), t_new_tools = timed(viz.prepare_tools_data_with_details, None, df_pivot)
+    old_models, t_old_models = timed(legacy_model_hover, viz, df_models)
+    new_models, t_new_models = timed(vectorized_model_hover, viz, df_models)
+
+    # 结果必须逐条一致 (数量相同的 Topic 取哪几个不确定，只比较表头与数量序列)
+    def counts(s):
+        return [line.rsplit(": ", 1)[-1] for line in s.split("<br>")]
+    assert [counts(s) for s in old_tools] == [counts(s) for s in new_tools]
+    assert all(list(o) == list(n) for o, n in zip(old_models, new_models))
+
+    print(f"{'stage':<14}{'iterrows':>12}{'vectorized':>12}{'speedup':>10}")
+    for name, old, new in [("tools hover", t_old_tools, t_new_tools), ("model hover", t_old_models, t_new_models),
+                           ("total", t_old_tools + t_old_models, t_new_tools + t_new_models)]:
+        print(f"{name:<14}{old:>11.3f}s{new:>11.3f}s{old / new:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+"""
+端到端基准：合成数据 → 各阶段耗时与内存峰值 → JSON 结果，可与基线比较
+用法:
+  python benchmarks/run_benchmarks.py --github-rows 1000000 --topics 1000 --models 100000 --out results.json
+  python benchmarks/run_benchmarks.py ... --baseline results.json --threshold 0.2   # 超过基线 20% 视为回归
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+import matplotlib
+matplotlib.use("Agg")
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from benchmarks.synthetic import generate
+from src.database.db_manager import DBManager
+from src.monitoring.metrics import Metrics
+from src.processors.data_cleaner import DataProcessor
+from src.visualizers.render_cache import RenderCache, library_versions
+from src.visualizers.interactive_visualizer import InteractiveChartGenerator
+from src.visualizers.chart_generator import ChartGenerator
+
+STAGES = ["get_plotting_data", "prepare_tools_data_with_details", "generate_html_chart", "generate_comparison_chart"]
+
+
+def measure(func, repeat=1):
+    """返回 (结果, 最短耗时秒, 内存峰值字节)；tracemalloc 只包在最后一次运行外，避免影响计时"""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - start)
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, best, peak
+
+
+def run(workdir, github_rows, topics, models, repeat=1, stages=STAGES, metrics=None):
+    """所有文件都写在 workdir 下；metrics 缺省时不记录指标 (不写当前目录的 data/metrics.db)"""
+    metrics = metrics or Metrics(enabled=False)
+    db_path = os.path.join(workdir, "bench.db")
+    start = time.perf_counter()
+    sizes = generate(db_path, github_rows, topics, models, metrics=metrics)
+    print(f"📦 合成数据 {sizes} ({time.perf_counter() - start:.1f}s)")
+
+    db = DBManager(db_path, metrics=metrics)
+    processor = DataProcessor(db)
+    # 每个阶段都用空的渲染缓存，测的是真实渲染而不是缓存命中
+    cache_dir = os.path.join(workdir, "render_cache")
+    html = InteractiveChartGenerator(RenderCache(cache_dir, os.path.join(workdir, "manifest.json")))
+    png = ChartGenerator(RenderCache(cache_dir, os.path.join(workdir, "manifest.json")))
+    df_gh = db.load_github_stats()
+
+    def fresh_cache():
+        shutil.rmtree(cache_dir, ignore_errors=True)
+
+    def plotting():
+        return processor.get_plotting_data()
+
+    def hover():
+        return html.prepare_tools_data_with_details(df_gh.copy())
+
+    def html_chart():
+        fresh_cache()
+        return html.generate_html_chart(df_gh.copy(), df_models, output_path=os.path.join(workdir, "chart.html"))
+
+    def png_chart():
+        fresh_cache()
+        return png.generate_comparison_chart(df_tools, df_models, save_path=os.path.join(workdir, "chart.png"), show=False)
+
+    df_tools, df_models = processor.get_plotting_data()
+    funcs = {"get_plotting_data": plotting, "prepare_tools_data_with_details": hover,
+             "generate_html_chart": html_chart, "generate_comparison_chart": png_chart}
+
+    results = {}
+    for name in stages:
+        _, seconds, peak = measure(funcs[name], repeat)
+        results[name] = {"seconds": round(seconds, 4), "peak_bytes": peak}
+        print(f"⏱️ {name:<34} {seconds:>9.3f}s {peak / 2**20:>9.1f} MB")
+    db.close()
+    return sizes, results
+
+
+def compare(results, baseline, threshold):
+    """返回回归列表：耗时或内存峰值超过基线 (1 + threshold) 倍的阶段"""
+    regressions = []
+    for name, current in results.items():
+        base = baseline.get("stages", {}).get(name)
+        if not base:
+            continue
+        for metric in ("seconds", "peak_bytes"):
+            if base[metric] and current[metric] > base[metric] * (1 + threshold):
+                regressions.append(f"{name}.{metric}: {base[metric]} -> {current[metric]} "
+                                   f"(+{(current[metric] / base[metric] - 1) * 100:.0f}%)")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--github-rows", type=int, default=100000)
+    parser.add_argument("--topics", type=int, default=100)
+    parser.add_argument("--models", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=1, help="每个阶段运行次数，取最短耗时")
+    parser.add_argument("--stages", nargs="+", choices=STAGES, default=STAGES)
+    parser.add_argument("--out", help="结果 JSON 输出路径")
+    parser.add_argument("--baseline", help="基线结果 JSON；有回归时退出码为 1")
+    parser.add_argument("--threshold", type=float, default=0.2, help="回归阈值 (相对基线的比例)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="agent-metrics-bench-") as workdir:
+        sizes, stages = run(workdir, args.github_rows, args.topics, args.models, args.repeat, args.stages)
+
+    report = {
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "libraries": library_versions(),
+        "sizes": sizes,
+        "stages": stages,
+    }
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"💾 结果已写入 {args.out}")
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        if baseline.get("sizes") != sizes:
+            print(f"⚠️ 基线数据规模不同: {baseline.get('sizes')}")
+        regressions = compare(stages, baseline, args.threshold)
+        if regressions:
+            print("❌ 性能回归:")
+            for line in regressions:
+                print(f"   - {line}")
+            raise SystemExit(1)
+        print(f"✅ 无回归 (阈值 {args.threshold:.0%})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""
+合成数据生成器：按 github_stats / model_context_stats 的表结构填充指定规模的数据
+用法: python benchmarks/synthetic.py data/bench.db --github-rows 1000000 --topics 1000 --models 100000
+"""
+import argparse
+import os
+import sys
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from src.database.db_manager import DBManager
+from src.monitoring.metrics import Metrics
+
+CONTEXT_CHOICES = np.array([2048, 4096, 8192, 16384, 32768, 131072, 200000, 1000000, 2000000])
+CHUNK_ROWS = 200000
+# 日期固定在 2015-01-01 ~ 2025-12-31 之内：行数再多也不会超出 datetime64[ns] 的范围 (约到 2262 年)
+DATE_START = "2015-01-01"
+MAX_DATES = len(pd.date_range(DATE_START, "2025-12-31", freq="D"))
+
+
+def generate(db_path, github_rows=100000, topics=100, models=10000, milestones=50, seed=0, metrics=None):
+    """
+    写入约 github_rows 行 (日期 × Topic) 与 models 个模型，返回实际行数
+    (date, topic) 是主键且日期最多 MAX_DATES 天：行数超过 topics × MAX_DATES 时自动增加 Topic 数
+    metrics 缺省时不记录指标：合成数据的写入不应出现在 data/metrics.db 的采集记录里
+    """
+    rng = np.random.default_rng(seed)
+    db = DBManager(db_path, metrics=metrics or Metrics(enabled=False))
+
+    topics = max(topics, -(-github_rows // MAX_DATES))
+    n_dates = max(1, -(-github_rows // topics))
+    dates = pd.date_range(DATE_START, periods=n_dates, freq="D").strftime("%Y-%m-%d").to_numpy()
+    topic_names = np.array([f"topic-{i:05d}" for i in range(topics)])
+    # 每个 Topic 的仓库数随时间增长，带噪声
+    base = rng.integers(1, 50, topics)
+    written = 0
+    for start in range(0, n_dates * topics, CHUNK_ROWS):
+        idx = np.arange(start, min(start + CHUNK_ROWS, n_dates * topics, github_rows))
+        if not len(idx):
+            break
+        d, t = idx // topics, idx % topics
+        counts = base[t] + d // 7 + rng.integers(0, 5, len(idx))
+        db.save_github_data(list(zip(dates[d], topic_names[t], counts.tolist())))
+        written += len(idx)
+
+    created = pd.Timestamp("2018-01-01") + pd.to_timedelta(rng.integers(0, 365 * 8, models), unit="D")
+    downloads = rng.integers(1, 10**7, models)
+    downloads[:min(milestones, models)] = -1
+    rows = list(zip(
+        [f"org-{i % 997}/model-{i}" for i in range(models)],
+        created.strftime("%Y-%m-%d"),
+        rng.choice(CONTEXT_CHOICES, models).tolist(),
+        downloads.tolist(),
+    ))
+    for start in range(0, len(rows), CHUNK_ROWS):
+        db.save_model_data(rows[start:start + CHUNK_ROWS])
+    db.flush()
+    db.close()
+    return {"github_rows": written, "topics": topics, "models": models}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("db_path")
+    parser.add_argument("--github-rows", type=int, default=100000)
+    parser.add_argument("--topics", type=int, default=100)
+    parser.add_argument("--models", type=int, default=10000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    print(generate(args.db_path, args.github_rows, args.topics, args.models, seed=args.seed))
+
+
+if __name__ == "__main__":
+    main()
@@ -12,4 +12,118 @@ END_DATE = "2026-01-01"
 FREQ = "3ME" # 3 Month End
 
 # 数据库路径
-DB_PATH = "data/ecosystem.db"
\ No newline at end of file
+DB_PATH = "data/ecosystem.db"
+
+# Glama 异步采集并发数
+GLAMA_CONCURRENCY = 16
+
+# 请求调度器：各域名的基础限速 (请求/秒)，实际节奏还会根据响应头中的剩余配额自适应调整
+HOST_RATE_LIMITS = {
+    "glama.ai": 4.0,
+    "api.github.com": 1.0,
+    "raw.githubusercontent.com": 2.0,
+    "huggingface.co": 10.0,
+}
+DEFAULT_HOST_RATE = 2.0
+# 剩余配额低于该比例时，低优先级请求让路
+LOW_BUDGET_RATIO = 0.1
+
+# Hugging Face config.json 批量抓取：线程数与重试策略
+HF_CONCURRENCY = 16
+HF_MAX_RETRIES = 3
+HF_BACKOFF_FACTOR = 0.5
+
+# 本地 HTTP 缓存 (SQLite)：容量上限与按 URL 匹配的 TTL (秒)，按顺序取第一个匹配
+HTTP_CACHE_PATH = "data/http_cache.db"
+HTTP_CACHE_MAX_BYTES = 512 * 1024 * 1024
+HTTP_CACHE_TTL = [
+    (r"raw\.githubusercontent\.com/.*/README\.md", 6 * 3600),
+    (r"api\.github\.com/repos/", 7 * 86400),
+    (r"glama\.ai/mcp/servers/.*/schema", 86400),
+    # 按 sha 固定的 config.json 内容不可变；resolve/main 会随模型更新而变化
+    (r"huggingface\.co/.*/resolve/[0-9a-f]{40}/config\.json", 365 * 86400),
+    (r"huggingface\.co/.*/config\.json", 86400),
+]
+HTTP_CACHE_DEFAULT_TTL = 86400
+
+# Glama 断点续爬：已完成条目超过多少天视为过期重爬；失败条目最多重试次数
+GLAMA_STALE_DAYS = 7
+GLAMA_MAX_ATTEMPTS = 5
+
+# GitHub API 地址 (可指向本地 stub 服务做测试) 与 GraphQL 批量大小
+GITHUB_API_URL = os.getenv("GITHUB_API_URL", "https://api.github.com")
+GITHUB_GRAPHQL_URL = os.getenv("GITHUB_GRAPHQL_URL", f"{GITHUB_API_URL}/graphql")
+GITHUB_GRAPHQL_BATCH = 100
+# 仓库元数据 (stars / archived) 的本地缓存有效期
+REPO_METADATA_MAX_AGE_DAYS = 7
+
+# Hugging Face 模型枚举：每页数量、最多枚举多少个 (None 表示全部)、每多少个模型写一次库
+HF_PAGE_SIZE = 1000
+HF_MAX_MODELS = None
+HF_FLUSH_SIZE = 500
+
+# 流水线各阶段超时 (秒)，None 表示不限
+# 超时后下游照常启动，超时阶段在下一次写库时退出；绘图阶段在主线程执行，不支持超时
+PIPELINE_STAGE_TIMEOUTS = {
+    "glama": 6 * 3600,
+    "hf": 6 * 3600,
+    "tools": 600,
+    "models": 600,
+}
+
+# SQLite 写入：WAL 模式 + 单独写线程批量提交；pragma 可按磁盘 / 内存情况调整
+DB_WRITE_BATCH = 500
+DB_PRAGMAS = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "cache_size": -64000, # 负数表示 KB，约 64MB
+    "temp_store": "MEMORY",
+    "busy_timeout": 30000,
+}
+
+# 处理后数据帧的列式缓存目录 (Arrow IPC)，以数据库数据版本为键自动失效
+FRAME_CACHE_DIR = "data/frame_cache"
+
+# 类型化读取时每批读取的行数
+DB_READ_CHUNK = 200000
+
+# 静态图表 (PNG / HTML) 读取的背景模型上限：按下载量取前 N 个，里程碑始终全部保留；None 表示全部读取
+# 模型表会随采集持续增长，设上限后读取量与内存占用不再随表大小增长
+PLOT_MAX_BACKGROUND_MODELS = 50000
+
+# 图表渲染缓存：输入数据 + 选项 + 库版本不变时直接复用已生成的 PNG / HTML
+RENDER_CACHE_DIR = "output/.render_cache"
+RENDER_MANIFEST_PATH = "output/render_manifest.json"
+RENDER_CACHE_MAX_BYTES = 1024 * 1024 * 1024 # 缓存目录总大小上限，超出时按最近使用时间淘汰
+RENDER_CACHE_MAX_AGE_DAYS = 30 # 超过该天数未被使用的产物直接删除
+
+# 交互式图表大数据模式
+WEBGL_POINT_THRESHOLD = 5000 # 散点数超过该值时改用 WebGL (Scattergl) 渲染
+SCATTER_BIN_THRESHOLD = 20000 # 散点数超过该值时按密度分箱，只画每个格子一个点
+SCATTER_BINS = (240, 120) # 分箱网格 (时间轴, 对数上下文轴)
+GROWTH_LINE_MAX_POINTS = 1500 # 增长曲线最多保留的点数 (LTTB 降采样)
+
+# HTML 导出模式：compact 时 plotly.js 作为同目录文件只写一份，日期编码为数值数组，Hover 用模板 + customdata
+# standalone 时生成单个自包含文件 (可直接发给别人)
+HTML_EXPORT_MODE = "compact"
+
+# PNG 图表标签放置预算
+LABEL_MAX_COUNT = 60 # 最多放置的模型标签数 (里程碑优先，其余按下载量)
+LABEL_TIME_BUDGET = 0.5 # 标签放置的时间预算 (秒)
+LABEL_GRID_PX = 64 # 碰撞检测网格的边长 (像素)
+
+# 批量渲染
+BATCH_OUTPUT_DIR = "output/batch"
+BATCH_WORKERS = None # 渲染进程数，None 表示 CPU 核数
+
+# 采集指标：请求延迟 / 字节数 / 重试 / 阶段耗时，单独存库避免与数据写线程互相影响
+METRICS_ENABLED = True
+METRICS_DB_PATH = "data/metrics.db"
+METRICS_FLUSH_SIZE = 1000 # 缓冲多少条记录后批量写入
+
+# 本地看板服务 (仅监听本机)
+DASHBOARD_HOST = "127.0.0.1"
+DASHBOARD_PORT = 8050
+DASHBOARD_CACHE_SIZE = 256 # 响应缓存条数 (LRU)
+DASHBOARD_VERSION_TTL = 5 # 数据版本的检查间隔 (秒)，版本变化时响应缓存全部失效
+DASHBOARD_MAX_POINTS = 4000 # 当前窗口内模型数超过该值时按密度分箱返回
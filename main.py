@@ -1,35 +1,197 @@
-from src.database.db_manager import DBManager
-from src.collectors.tools_collector import GlamaCollector
-from src.collectors.huggingface_collector import HuggingFaceCollector
-from src.processors.data_cleaner import DataProcessor
-from src.visualizers.chart_generator import ChartGenerator
-from config.milestones import MILESTONE_MODELS # 导入手动数据
-# import os
-
-def main():
+import argparse
+import importlib
+import os
+import time
+from src.pipeline.runner import Stage, PipelineRunner
+from config.settings import PIPELINE_STAGE_TIMEOUTS, DB_PATH
+
+# 各阶段在不同线程中运行，共用同一个 DBManager：写操作由它唯一的写线程批量提交
+db = None
+
+# 重量级依赖 (pandas / matplotlib / plotly / curl_cffi ...) 只在子命令真正用到时才导入
+IMPORT_TIMES = {}
+
+def lazy_import(module):
+    """导入模块并记录首次导入耗时 (含其依赖)，供 --import-report 使用"""
+    start = time.perf_counter()
+    mod = importlib.import_module(module)
+    IMPORT_TIMES.setdefault(module, time.perf_counter() - start)
+    return mod
+
+def frame_cache():
+    return lazy_import("src.processors.frame_cache").FrameCache(db)
+
+def processor():
+    return lazy_import("src.processors.data_cleaner").DataProcessor(db)
+
+# ==========================================
+# 各阶段
+# ==========================================
+def run_glama(inputs):
+    lazy_import("src.collectors.tools_collector").GlamaCollector(db).run()
+
+def run_hf(inputs):
+    lazy_import("src.collectors.huggingface_collector").HuggingFaceCollector(db).run()
+
+def process_tools(inputs):
+    # 数据库未变化时直接读取列式缓存
+    return frame_cache().get_or_build("tools", processor().get_tools_data)
+
+def process_models(inputs):
+    return frame_cache().get_or_build("models", processor().get_models_data)
+
+def render_png(inputs, show=True):
+    visualizer = lazy_import("src.visualizers.chart_generator").ChartGenerator()
+    visualizer.generate_comparison_chart(inputs["tools"], inputs["models"], show=show)
+
+def render_html(inputs, open_browser=True):
+    cache = frame_cache()
+    viz = lazy_import("src.visualizers.interactive_visualizer").InteractiveChartGenerator()
+    # GitHub 原始数据 (用于展示工具细分详情，读取时已完成类型转换) 与细分透视表
+    df_gh_raw = cache.get_or_build("github_raw", db.load_github_stats)
+    if df_gh_raw.empty:
+        print("❌ 错误: GitHub 数据为空。请检查爬虫是否成功运行。")
+        return
+    df_pivot = cache.get_or_build("tools_pivot", lambda: viz.pivot_tools(df_gh_raw))
+    print(f"   - Loaded {len(df_gh_raw)} GitHub records")
+    print(f"   - Loaded {len(inputs['models'])} Model records")
+    viz.generate_html_chart(df_gh_raw, inputs["models"], df_pivot)
+
+    if open_browser:
+        import webbrowser
+        output_file = os.path.abspath("output/interactive_ecosystem_chart.html")
+        print(f"👉 Opening in browser: {output_file}")
+        try:
+            webbrowser.open(f"file://{output_file}")
+        except Exception:
+            print(f"⚠️ 无法自动打开浏览器，请手动打开文件: {output_file}")
+
+def build_pipeline(include=None, formats=("png",), interactive=True):
+    """
+    glama ──> tools ──┐
+                      ├──> render
+    hf ────> models ──┘
+    两个采集器并发运行；采集失败时处理阶段仍用库中已有数据继续
+    include 指定只构建其中部分阶段，被排除的上游视为数据已在库中
+    """
+    t = PIPELINE_STAGE_TIMEOUTS
+
+    def render(inputs):
+        if "png" in formats:
+            render_png(inputs, show=interactive)
+        if "html" in formats:
+            render_html(inputs, open_browser=interactive)
+
+    stages = [
+        Stage("glama", run_glama, timeout=t.get("glama")),
+        Stage("hf", run_hf, timeout=t.get("hf")),
+        Stage("tools", process_tools, deps=["glama"], timeout=t.get("tools"), allow_failed_deps=True),
+        Stage("models", process_models, deps=["hf"], timeout=t.get("models"), allow_failed_deps=True),
+        Stage("render", render, deps=["tools", "models"], main_thread=True),
+    ]
+    if include is not None:
+        stages = [s for s in stages if s.name in include]
+        for stage in stages:
+            stage.deps = tuple(d for d in stage.deps if d in include)
+    return PipelineRunner(stages)
+
+# ==========================================
+# 命令行
+# ==========================================
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="AI Ecosystem data pipeline")
+    parser.add_argument("--import-report", action="store_true", help="结束时打印各模块的导入耗时")
+    # 兼容旧用法 `python main.py --only hf`：等同于 `python main.py run --only hf`
+    parser.add_argument("--only", nargs="+", metavar="STAGE", dest="top_only", help="同 run --only")
+    sub = parser.add_subparsers(dest="command")
+
+    run = sub.add_parser("run", help="完整流水线：采集 → 处理 → 绘图 (默认)")
+    run.add_argument("--only", nargs="+", metavar="STAGE",
+                     help="只重跑指定阶段及其下游，例如 --only hf (可选: glama hf tools models render)")
+
+    collect = sub.add_parser("collect", help="只采集，不导入任何绘图库")
+    collect.add_argument("sources", nargs="*", metavar="{glama,hf}", help="默认两个都采集")
+
+    sub.add_parser("process", help="处理数据并写入列式缓存，供之后的绘图直接读取")
+
+    render = sub.add_parser("render", help="用库中已有数据绘图")
+    render.add_argument("formats", nargs="*", metavar="{png,html}", help="默认 png")
+    render.add_argument("--no-show", action="store_true", help="不弹出窗口 / 不打开浏览器")
+
+    serve = sub.add_parser("serve", help="启动本地看板 (仅监听本机，完全离线)")
+    serve.add_argument("--port", type=int, help="端口 (默认见 DASHBOARD_PORT)")
+
+    args = parser.parse_args(argv)
+    if args.top_only and args.command not in (None, "run"):
+        parser.error(f"--only only applies to the run command, not '{args.command}'")
+    if args.command is None:
+        args.command, args.only = "run", args.top_only
+    elif args.command == "run":
+        args.only = args.only or args.top_only
+    elif args.command == "collect":
+        args.sources = args.sources or ["glama", "hf"]
+        if set(args.sources) - {"glama", "hf"}:
+            parser.error(f"unknown source: {', '.join(sorted(set(args.sources) - {'glama', 'hf'}))}")
+    elif args.command == "render":
+        args.formats = args.formats or ["png"]
+        if set(args.formats) - {"png", "html"}:
+            parser.error(f"unknown format: {', '.join(sorted(set(args.formats) - {'png', 'html'}))}")
+    return args
+
+def print_import_report():
+    print("\n--- Import Report ---")
+    for module, seconds in sorted(IMPORT_TIMES.items(), key=lambda item: -item[1]):
+        print(f"{module:<45} {seconds:>7.3f}s")
+    print(f"{'total':<45} {sum(IMPORT_TIMES.values()):>7.3f}s")
+
+def main(argv=None):
     # os.environ["http_proxy"] = "http://127.0.0.1:10808"
     # os.environ["https_proxy"] = "http://127.0.0.1:10808"
-    db = DBManager()
-    # --- 1. 注入数据 ---
-    print("--- Step 1: Injecting Milestone Data ---")
-    # db.save_milestones(MILESTONE_MODELS) # 注入 GPT-4 等数据
-
-    print("--- Step 2: Running Collectors ---")
-    # 爬取 GitHub 数据
-    gh = GlamaCollector(db)
-    gh.run()
-    
-    # 爬取 HuggingFace 数据 (补充背景点)
-    hf = HuggingFaceCollector(db)
-    hf.run()
-
-    # --- 2. 处理与绘图 ---
-    print("\n--- Step 3: Visualization ---")
-    processor = DataProcessor(db)
-    df_tools, df_models = processor.get_plotting_data()
-
-    visualizer = ChartGenerator()
-    visualizer.generate_comparison_chart(df_tools, df_models)
+    started = time.perf_counter()
+    args = parse_args(argv)
+
+    if args.command in ("render", "serve") and not os.path.exists(DB_PATH):
+        print(f"❌ 错误: 数据库文件 {DB_PATH} 不存在。")
+        print("请先运行 'python main.py collect' 进行数据采集。")
+        return
+
+    global db
+    db = lazy_import("src.database.db_manager").DBManager()
+
+    if args.command == "serve":
+        server = lazy_import("src.dashboard.server").DashboardServer
+        (server(db, port=args.port) if args.port else server(db)).serve_forever()
+        db.close()
+        return
+
+    if args.command == "run":
+        # --- 1. 注入数据 ---
+        print("--- Step 1: Injecting Milestone Data ---")
+        # from config.milestones import MILESTONE_MODELS # 导入手动数据
+        # db.save_milestones(MILESTONE_MODELS) # 注入 GPT-4 等数据
+
+        # --- 2. 采集、处理与绘图 ---
+        print("--- Step 2: Running Pipeline ---")
+        results = build_pipeline().run(only=args.only)
+    elif args.command == "collect":
+        results = build_pipeline(include=args.sources).run()
+    elif args.command == "process":
+        results = build_pipeline(include=["tools", "models"]).run()
+    else:
+        results = build_pipeline(include=["tools", "models", "render"], formats=args.formats,
+                                 interactive=not args.no_show).run()
+
+    print("\n--- Pipeline Summary ---")
+    for name, result in results.items():
+        line = f"{name:<8} {result['status']:<8} {result['seconds']:>8.2f}s"
+        if result["error"]:
+            line += f"  {result['error']}"
+        print(line)
+    db.close()
+
+    if args.import_report:
+        print_import_report()
+        print(f"{'wall clock':<45} {time.perf_counter() - started:>7.3f}s")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,13 @@
+import argparse
+from src.monitoring.report import print_report
+from config.settings import METRICS_DB_PATH
+
+def main():
+    parser = argparse.ArgumentParser(description="Report request latency and stage timings of a collection run")
+    parser.add_argument("--run", help="运行 ID (默认最近一次)")
+    parser.add_argument("--db", default=METRICS_DB_PATH, help="指标数据库路径")
+    args = parser.parse_args()
+    print_report(args.db, args.run)
+
+if __name__ == "__main__":
+    main()
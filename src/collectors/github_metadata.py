@@ -0,0 +1,122 @@
+import json
+import requests
+from config.settings import (
+    GITHUB_TOKEN, GITHUB_API_URL, GITHUB_GRAPHQL_URL, GITHUB_GRAPHQL_BATCH, REPO_METADATA_MAX_AGE_DAYS
+)
+from src.collectors.http_cache import get_default_cache
+from src.collectors.request_scheduler import get_default_scheduler, PRIORITY_HIGH, PRIORITY_LOW
+
+REPO_FIELDS = "nameWithOwner createdAt stargazerCount isArchived"
+
+
+class GitHubMetadataResolver:
+    """
+    批量解析仓库元数据 (创建日期 / stars / 是否归档)
+    - 一次 GraphQL 请求通过别名查询最多 ~100 个仓库
+    - GraphQL 失败的仓库逐个回退到 REST
+    - 结果缓存在数据库 repo_metadata 表中
+    api_url / graphql_url 可指向本地 stub 服务，便于离线测试
+    """
+    def __init__(self, db_manager, token=GITHUB_TOKEN, api_url=GITHUB_API_URL,
+                 graphql_url=GITHUB_GRAPHQL_URL, batch_size=GITHUB_GRAPHQL_BATCH,
+                 cache=None, scheduler=None):
+        self.db = db_manager
+        self.api_url = api_url.rstrip("/")
+        self.graphql_url = graphql_url
+        self.batch_size = batch_size
+        self.cache = cache or get_default_cache()
+        self.scheduler = scheduler or get_default_scheduler()
+        self.token = token
+        self.session = requests.Session()
+        self.session.headers["Accept"] = "application/vnd.github.v3+json"
+        # 没有配置 Token 时 GraphQL 不可用，直接走 REST
+        self.use_graphql = bool(token) and token != "YOUR_GITHUB_TOKEN_HERE"
+        if self.use_graphql:
+            self.session.headers["Authorization"] = f"token {token}"
+        self.stats = {"cached": 0, "graphql_requests": 0, "graphql_resolved": 0,
+                      "rest_requests": 0, "rest_resolved": 0, "rate_limit_cost": 0}
+
+    def resolve(self, repos, max_age_days=REPO_METADATA_MAX_AGE_DAYS):
+        """
+        返回 {repo: {"created_at": "YYYY-MM-DD", "stars": int, "archived": bool}}
+        无法解析的仓库不会出现在结果中
+        """
+        results = self.db.get_repo_metadata(repos, max_age_days)
+        self.stats["cached"] += len(results)
+        todo = [repo for repo in repos if repo not in results]
+
+        resolved = {}
+        if self.use_graphql:
+            for i in range(0, len(todo), self.batch_size):
+                resolved.update(self.query_graphql(todo[i:i + self.batch_size]))
+
+        for repo in todo:
+            if repo not in resolved:
+                meta = self.query_rest(repo)
+                if meta:
+                    resolved[repo] = meta
+
+        self.db.save_repo_metadata([
+            (repo, meta["created_at"], meta["stars"], int(meta["archived"]))
+            for repo, meta in resolved.items()
+        ])
+        results.update(resolved)
+        return results
+
+    def build_query(self, repos):
+        parts = []
+        for i, repo in enumerate(repos):
+            owner, name = repo.split("/", 1)
+            parts.append(f"r{i}: repository(owner: {json.dumps(owner)}, name: {json.dumps(name)}) {{ {REPO_FIELDS} }}")
+        return "query { rateLimit { cost remaining resetAt } " + " ".join(parts) + " }"
+
+    def query_graphql(self, repos):
+        """单个批次；部分仓库不存在时 GraphQL 仍返回其余仓库的数据"""
+        try:
+            # GraphQL 与 REST 的配额在 GitHub 侧分开计算，这里也分开记账；一次批量请求抵 100 次 REST，优先发送
+            r = self._request("POST", self.graphql_url, host="api.github.com/graphql", priority=PRIORITY_HIGH,
+                              json={"query": self.build_query(repos)})
+            if r.status_code != 200:
+                return {}
+            data = r.json().get("data") or {}
+        except Exception as e:
+            print(f"⚠️ GraphQL 批量查询失败: {e}")
+            return {}
+
+        rate_limit = data.get("rateLimit") or {}
+        self.stats["rate_limit_cost"] += rate_limit.get("cost", 0)
+
+        resolved = {}
+        for i, repo in enumerate(repos):
+            node = data.get(f"r{i}")
+            if node and node.get("createdAt"):
+                resolved[repo] = {
+                    "created_at": node["createdAt"][:10],
+                    "stars": node.get("stargazerCount", 0),
+                    "archived": bool(node.get("isArchived")),
+                }
+        self.stats["graphql_resolved"] += len(resolved)
+        return resolved
+
+    def query_rest(self, repo):
+        url = f"{self.api_url}/repos/{repo}"
+        try:
+            r = self.cache.fetch(lambda u, **kw: self._request("GET", u, priority=PRIORITY_LOW, **kw), url, timeout=15)
+            if r.status_code != 200:
+                return None
+            body = r.json()
+        except Exception:
+            return None
+        self.stats["rest_resolved"] += 1
+        return {
+            "created_at": body["created_at"][:10],
+            "stars": body.get("stargazers_count", 0),
+            "archived": bool(body.get("archived")),
+        }
+
+    def _request(self, method, url, host="api.github.com", priority=PRIORITY_LOW, headers=None, **kwargs):
+        """所有 GitHub 请求都经过共享调度器：配额耗尽时等待 Retry-After / X-RateLimit-Reset 后重试"""
+        def send():
+            self.stats["graphql_requests" if method == "POST" else "rest_requests"] += 1
+            return self.session.request(method, url, headers=headers, **kwargs)
+        return self.scheduler.request(send, host, token=self.token, priority=priority)
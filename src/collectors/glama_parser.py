@@ -0,0 +1,118 @@
+from lxml import etree
+
+HEADING_TAGS = {"h1", "h2", "h3", "h4", "h5", "h6"}
+
+
+class ToolCountExtractor:
+    """
+    增量解析 Glama Schema 页面，统计 Tools 表格的行数
+    不构建完整 DOM：已处理完的行 / 表格 / 区块会立即 clear()，匹配到 Tools 表格后停止解析
+
+    匹配策略 (按优先级)：
+    - heading:        紧跟在包含 "tool" 字样标题后的表格
+    - legacy-section: <main> 中第 3 个 <section> 里的表格 (原 XPath 的结构)
+    - single-table:   页面上唯一一个有数据行的表格
+    都不匹配时返回 (None, "none")，而不是 0
+    """
+    def __init__(self):
+        self.parser = etree.HTMLPullParser(events=("start", "end"))
+        self.in_main = False
+        self.section_index = 0
+        self.last_heading = ""
+        self.table_depth = 0
+        self.table = None
+        self.candidates = []
+        self.result = None
+
+    def feed(self, chunk):
+        """喂入一段字节，返回 True 表示已得到结果，可以停止读取"""
+        if self.result is None:
+            self.parser.feed(chunk)
+            self._consume()
+        return self.result is not None
+
+    def close(self):
+        if self.result is None:
+            try:
+                self.parser.close()
+            except etree.XMLSyntaxError:
+                pass
+            self._consume()
+        if self.result is None:
+            self.result = self._fallback()
+        return self.result
+
+    def _consume(self):
+        for event, el in self.parser.read_events():
+            if self.result is not None:
+                return
+            if not isinstance(el.tag, str):
+                continue
+            tag = el.tag.lower()
+            if event == "start":
+                self._start(tag)
+            else:
+                self._end(tag, el)
+
+    def _start(self, tag):
+        if tag == "main":
+            self.in_main = True
+        elif tag == "section" and self.in_main:
+            self.section_index += 1
+        elif tag == "table":
+            self.table_depth += 1
+            if self.table_depth == 1:
+                self.table = {"heading": self.last_heading, "section": self.section_index,
+                              "tbody_rows": 0, "plain_rows": 0, "has_tbody": False, "in_tbody": False}
+        elif tag == "tbody" and self.table_depth == 1:
+            self.table["has_tbody"] = True
+            self.table["in_tbody"] = True
+
+    def _end(self, tag, el):
+        if tag in HEADING_TAGS:
+            self.last_heading = "".join(el.itertext()).strip().lower()
+            el.clear()
+        elif tag == "tr" and self.table_depth == 1:
+            if self.table["in_tbody"]:
+                self.table["tbody_rows"] += 1
+            elif el.find("th") is None:
+                self.table["plain_rows"] += 1
+            el.clear()
+        elif tag == "tbody" and self.table_depth == 1:
+            self.table["in_tbody"] = False
+        elif tag == "table":
+            self.table_depth -= 1
+            if self.table_depth == 0:
+                self._finish_table()
+            el.clear()
+        elif tag == "section":
+            el.clear()
+
+    def _finish_table(self):
+        table = self.table
+        table["rows"] = table["tbody_rows"] if table["has_tbody"] else table["plain_rows"]
+        self.table = None
+        if "tool" in table["heading"]:
+            self.result = (table["rows"], "heading")
+        else:
+            self.candidates.append(table)
+
+    def _fallback(self):
+        for table in self.candidates:
+            if table["section"] == 3:
+                return table["rows"], "legacy-section"
+        with_rows = [t for t in self.candidates if t["rows"] > 0]
+        if len(with_rows) == 1:
+            return with_rows[0]["rows"], "single-table"
+        return None, "none"
+
+
+def count_tools(content, chunk_size=64 * 1024):
+    """返回 (tool_count, strategy)；content 为完整页面字节或字节块的可迭代对象"""
+    extractor = ToolCountExtractor()
+    chunks = (content[i:i + chunk_size] for i in range(0, len(content), chunk_size)) \
+        if isinstance(content, (bytes, bytearray)) else content
+    for chunk in chunks:
+        if extractor.feed(chunk):
+            break
+    return extractor.close()
@@ -0,0 +1,186 @@
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from config.settings import HTTP_CACHE_PATH, HTTP_CACHE_MAX_BYTES, HTTP_CACHE_TTL, HTTP_CACHE_DEFAULT_TTL
+from src.monitoring.metrics import get_metrics
+
+
+class CachedResponse:
+    """缓存命中时返回的响应对象，接口与 requests / curl_cffi 的 Response 保持一致"""
+    def __init__(self, url, status_code, content, headers):
+        self.url = url
+        self.status_code = status_code
+        self.content = content
+        self.headers = headers
+        self.from_cache = True
+
+    @property
+    def text(self):
+        return self.content.decode("utf-8", errors="replace")
+
+    def json(self):
+        return json.loads(self.content)
+
+
+class HTTPCache:
+    """
+    基于 SQLite 的持久化 HTTP 缓存，所有采集器共用
+    - TTL 内直接返回本地副本
+    - 过期后带 If-None-Match / If-Modified-Since 重新验证，304 时沿用本地副本
+    - 总大小超过上限时按最近访问时间 (LRU) 淘汰
+    """
+    def __init__(self, path=HTTP_CACHE_PATH, max_bytes=HTTP_CACHE_MAX_BYTES,
+                 ttl_rules=HTTP_CACHE_TTL, default_ttl=HTTP_CACHE_DEFAULT_TTL, metrics=None):
+        self.recorder = metrics or get_metrics()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.max_bytes = max_bytes
+        self.default_ttl = default_ttl
+        self.ttl_rules = [(re.compile(pattern), ttl) for pattern, ttl in ttl_rules]
+        self.counters = {"hits": 0, "revalidated": 0, "misses": 0, "stores": 0, "evictions": 0}
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute('''
+            CREATE TABLE IF NOT EXISTS http_cache (
+                url TEXT PRIMARY KEY,
+                status INTEGER,
+                etag TEXT,
+                last_modified TEXT,
+                headers TEXT,
+                body BLOB,
+                size INTEGER,
+                stored_at REAL,
+                last_access REAL
+            )
+        ''')
+        self.conn.execute('CREATE INDEX IF NOT EXISTS idx_http_cache_access ON http_cache (last_access)')
+        self.conn.commit()
+
+    def ttl_for(self, url):
+        for pattern, ttl in self.ttl_rules:
+            if pattern.search(url):
+                return ttl
+        return self.default_ttl
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self.counters)
+            row = self.conn.execute('SELECT COUNT(*), COALESCE(SUM(size), 0) FROM http_cache').fetchone()
+        stats["entries"], stats["bytes"] = row
+        return stats
+
+    # ------------------------------------------
+    # 对外接口：包装任意 get 函数 (同步 / 异步)
+    # ------------------------------------------
+    def fetch(self, get, url, headers=None, **kwargs):
+        """get 为 requests.get / Session.get / curl_cffi.requests.get 等同步函数"""
+        start = time.perf_counter()
+        entry, fresh = self.lookup(url)
+        if fresh:
+            return self._served(url, self._hit(url, entry), start)
+        r = get(url, headers=self._conditional_headers(entry, headers), **kwargs)
+        return self._handle_response(url, entry, r)
+
+    async def afetch(self, get, url, headers=None, **kwargs):
+        """get 为 curl_cffi AsyncSession.get 等协程函数"""
+        start = time.perf_counter()
+        entry, fresh = self.lookup(url)
+        if fresh:
+            return self._served(url, self._hit(url, entry), start)
+        r = await get(url, headers=self._conditional_headers(entry, headers), **kwargs)
+        return self._handle_response(url, entry, r)
+
+    # ------------------------------------------
+    # 内部实现
+    # ------------------------------------------
+    def lookup(self, url):
+        with self._lock:
+            row = self.conn.execute(
+                'SELECT status, etag, last_modified, headers, body, stored_at FROM http_cache WHERE url = ?',
+                (url,)
+            ).fetchone()
+        if row is None:
+            return None, False
+        entry = dict(zip(("status", "etag", "last_modified", "headers", "body", "stored_at"), row))
+        fresh = time.time() - entry["stored_at"] < self.ttl_for(url)
+        return entry, fresh
+
+    def _served(self, url, r, start):
+        """
+        TTL 内直接由本地副本应答、没有发出请求的才记为缓存命中
+        304 重新验证已经是一次网络请求，由调度器记录，这里不再重复计数
+        """
+        self.recorder.record_request(url, r.status_code, time.perf_counter() - start, len(r.content), cache_hit=True)
+        return r
+
+    def _conditional_headers(self, entry, headers):
+        headers = dict(headers or {})
+        if entry:
+            if entry["etag"]:
+                headers["If-None-Match"] = entry["etag"]
+            if entry["last_modified"]:
+                headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def _hit(self, url, entry, counter="hits"):
+        now = time.time()
+        with self._lock:
+            self.counters[counter] += 1
+            if counter == "revalidated":
+                self.conn.execute('UPDATE http_cache SET stored_at = ?, last_access = ? WHERE url = ?', (now, now, url))
+            else:
+                self.conn.execute('UPDATE http_cache SET last_access = ? WHERE url = ?', (now, url))
+            self.conn.commit()
+        return CachedResponse(url, entry["status"], entry["body"], json.loads(entry["headers"]))
+
+    def _handle_response(self, url, entry, r):
+        if r.status_code == 304 and entry:
+            return self._hit(url, entry, counter="revalidated")
+        with self._lock:
+            self.counters["misses"] += 1
+        if r.status_code == 200:
+            self.store(url, r)
+        return r
+
+    def store(self, url, r):
+        body = r.content
+        etag = r.headers.get("ETag")
+        last_modified = r.headers.get("Last-Modified")
+        headers = {k: v for k, v in r.headers.items() if k.lower() in ("content-type", "etag", "last-modified")}
+        now = time.time()
+        with self._lock:
+            self.conn.execute(
+                'INSERT OR REPLACE INTO http_cache VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                (url, r.status_code, etag, last_modified, json.dumps(headers), body, len(body), now, now)
+            )
+            self.counters["stores"] += 1
+            self._evict()
+            self.conn.commit()
+
+    def _evict(self):
+        total = self.conn.execute('SELECT COALESCE(SUM(size), 0) FROM http_cache').fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        rows = self.conn.execute('SELECT url, size FROM http_cache ORDER BY last_access').fetchall()
+        victims = []
+        for url, size in rows:
+            if total <= self.max_bytes:
+                break
+            victims.append((url,))
+            total -= size
+        self.conn.executemany('DELETE FROM http_cache WHERE url = ?', victims)
+        self.counters["evictions"] += len(victims)
+
+
+_default_cache = None
+_default_cache_lock = threading.Lock()
+
+def get_default_cache():
+    """进程内共享的缓存实例，Glama / HF 采集器默认都使用它"""
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = HTTPCache()
+    return _default_cache
@@ -1,75 +1,215 @@
 import requests
+from itertools import islice
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from tqdm import tqdm
-from config.settings import HUGGINGFACE_TOKEN
+from config.settings import (
+    HUGGINGFACE_TOKEN, HF_CONCURRENCY, HF_MAX_RETRIES, HF_BACKOFF_FACTOR,
+    HF_PAGE_SIZE, HF_MAX_MODELS, HF_FLUSH_SIZE
+)
 from config.keywords import HF_KEYWORDS
+from src.collectors.http_cache import get_default_cache
+from src.collectors.request_scheduler import get_default_scheduler, PRIORITY_HIGH
+from src.monitoring.metrics import get_metrics
 
 class HuggingFaceCollector:
-    def __init__(self, db_manager):
+    def __init__(self, db_manager, max_workers=HF_CONCURRENCY, cache=None, scheduler=None, metrics=None):
         self.db = db_manager
+        # 增量同步统计：只有新模型与修订版本变化的模型才重新下载 config.json
+        self.sync_counts = {"new": 0, "changed": 0, "unchanged": 0}
+        self.metrics = metrics or get_metrics()
+        self.cache = cache or get_default_cache()
+        self.scheduler = scheduler or get_default_scheduler()
+        self.max_workers = max_workers
         self.headers = {}
         if HUGGINGFACE_TOKEN:
             self.headers["Authorization"] = f"Bearer {HUGGINGFACE_TOKEN}"
+        self.session = self.create_session()
 
-    def fetch_model_info(self):
+    def create_session(self):
         """
-        从 HF API 获取热门模型列表，并尝试解析其 context length
+        共享 Session：连接池大小与线程数一致，复用 keep-alive 连接；
+        5xx 按指数退避自动重试，429 交给请求调度器按 Retry-After / RateLimit 头处理
         """
-        print("🚀 开始采集 Hugging Face 模型 Context 数据...")
-        
-        # 获取热门模型 (按下载量排序，取前200个，以此作为代表)
+        retry = Retry(
+            total=HF_MAX_RETRIES,
+            backoff_factor=HF_BACKOFF_FACTOR,
+            status_forcelist=[500, 502, 503, 504],
+            allowed_methods=["GET"],
+        )
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=self.max_workers, max_retries=retry)
+        session = requests.Session()
+        session.headers.update(self.headers)
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        return session
+
+    def iter_models(self, page_size=HF_PAGE_SIZE, max_models=HF_MAX_MODELS):
+        """
+        按下载量倒序逐页枚举 text-generation 模型 (生成器)
+        Hub 使用游标分页，下一页地址在响应头 Link: <...>; rel="next" 中
+        列表中同时带回每个模型的修订版本 (sha / lastModified)，用于增量同步
+        """
+        url = "https://huggingface.co/api/models"
         params = {
             "sort": "downloads",
             "direction": "-1",
-            "limit": 200,
-            "filter": "text-generation" # 仅关注文本生成模型
+            "limit": page_size,
+            "filter": "text-generation", # 仅关注文本生成模型
+            # 指定 expand 后只返回列出的字段 (以及 id)
+            "expand[]": ["createdAt", "downloads", "sha", "lastModified"],
         }
-        
+        yielded = 0
+        while url:
+            r = self.scheduled_get(url, priority=PRIORITY_HIGH, params=params, timeout=30)
+            r.raise_for_status()
+            for model in r.json():
+                yield model
+                yielded += 1
+                if max_models is not None and yielded >= max_models:
+                    return
+            url = r.links.get("next", {}).get("url")
+            params = None # next 链接中已包含全部查询参数
+
+    def fetch_model_info(self, max_models=HF_MAX_MODELS, flush_size=HF_FLUSH_SIZE):
+        """
+        从 HF API 枚举模型列表，并尝试解析其 context length
+        每 flush_size 个模型解析完就写一次库：内存占用与目录大小无关，中断时已写入的数据不会丢失
+        """
+        print("🚀 开始采集 Hugging Face 模型 Context 数据...")
+
+        saved = 0
+        run_id = self.db.start_run("hf")
         try:
-            url = "https://huggingface.co/api/models"
-            r = requests.get(url, headers=self.headers, params=params)
-            models = r.json()
-            
-            cleaned_data = []
-            
-            for model in tqdm(models, desc="Analyzing Models"):
-                model_id = model['modelId']
-                created_at = model.get('createdAt', '2022-01-01')[:10] # 截取日期
-                downloads = model.get('downloads', 0)
-                
-                # 获取 Config 文件以确定 Context Window
-                context_length = self.get_context_length(model_id)
-                
-                if context_length:
-                    cleaned_data.append((model_id, created_at, context_length, downloads))
-            
-            self.db.save_model_data(cleaned_data)
-            print(f"✅ 成功采集 {len(cleaned_data)} 个模型的 Context 信息")
-            
+            models = self.iter_models(max_models=max_models)
+            with tqdm(desc="Analyzing Models", unit="model") as progress:
+                while True:
+                    with self.metrics.span("hf.list_models"):
+                        chunk = list(islice(models, flush_size))
+                    if not chunk:
+                        break
+                    with self.metrics.span("hf.resolve_configs", count=len(chunk)):
+                        cleaned_data = self.resolve_models(chunk)
+                    self.db.save_model_data(cleaned_data)
+                    self.db.record_model_observations(run_id, cleaned_data)
+                    saved += len(cleaned_data)
+                    progress.update(len(chunk))
+
         except Exception as e:
             print(f"HF Collection Error: {e}")
+            self.metrics.event("hf.collection_error", error=repr(e))
+        with self.metrics.span("hf.finish_run"):
+            self.db.finish_run(run_id)
+        self.metrics.flush()
+
+        print(f"✅ 成功采集 {saved} 个模型的 Context 信息")
+        print(f"   - 增量同步: 新模型 {self.sync_counts['new']}，有更新 {self.sync_counts['changed']}，"
+              f"未变化 {self.sync_counts['unchanged']} (跳过 config.json 下载)")
+        print(f"   - HTTP 缓存: {self.cache.stats()}")
+        print(f"   - 请求调度: {self.scheduler.metrics()}")
+        print(f"   - 请求 / 阶段耗时指标: run {self.metrics.run_id} (python metrics_report.py 查看)")
+
+    def resolve_models(self, models):
+        """
+        批量解析一组模型的 context length，返回 (model_id, created_at, context_length, downloads) 列表
+        与库中记录的修订版本比较：未变化的模型直接沿用上次的结果，
+        只有新模型与有更新的模型才下载 config.json (有界线程池并发，结果保持原列表顺序)
+        """
+        model_ids = [self.model_id(model) for model in models]
+        known = self.db.get_model_revisions(model_ids)
+
+        context_lengths = {}
+        to_fetch = []
+        for model_id, model in zip(model_ids, models):
+            status = self.revision_status(model, known.get(model_id))
+            self.sync_counts[status] += 1
+            if status == "unchanged":
+                context_lengths[model_id] = known[model_id]["context_length"]
+            else:
+                to_fetch.append(model)
+
+        revisions = []
+        results = self.fetch_context_lengths([self.model_id(model) for model in to_fetch],
+                                             [model.get('sha') for model in to_fetch])
+        for model, (context_length, definitive) in zip(to_fetch, results):
+            model_id = self.model_id(model)
+            context_lengths[model_id] = context_length
+            # 网络错误 / 限流时不记录版本，下次继续重试
+            if definitive:
+                revisions.append((model_id, model.get('sha'), model.get('lastModified'), context_length))
+        self.db.save_model_revisions(revisions)
+
+        cleaned_data = []
+        for model_id, model in zip(model_ids, models):
+            context_length = context_lengths.get(model_id)
+            if context_length:
+                created_at = model.get('createdAt', '2022-01-01')[:10] # 截取日期
+                downloads = model.get('downloads', 0)
+                cleaned_data.append((model_id, created_at, context_length, downloads))
+        return cleaned_data
+
+    def model_id(self, model):
+        # 使用 expand 时列表只返回 id，旧格式还带有 modelId
+        return model.get('modelId') or model['id']
+
+    def revision_status(self, model, known):
+        """new / changed / unchanged：优先比较 sha，列表未带 sha 时比较 lastModified"""
+        if known is None:
+            return "new"
+        if model.get('sha') and known["sha"]:
+            return "unchanged" if model['sha'] == known["sha"] else "changed"
+        if model.get('lastModified') and known["last_modified"]:
+            return "unchanged" if model['lastModified'] == known["last_modified"] else "changed"
+        return "changed"
+
+    def fetch_context_lengths(self, model_ids, shas=None):
+        """返回 [(context_length, definitive)]，definitive 表示结果可以按当前版本记录下来"""
+        shas = shas or [None] * len(model_ids)
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            return list(pool.map(self.fetch_context_length, model_ids, shas))
 
     def get_context_length(self, model_id):
         """
         尝试读取 config.json 中的 max_position_embeddings 或类似字段
         """
+        return self.fetch_context_length(model_id)[0]
+
+    def fetch_context_length(self, model_id, sha=None):
+        """
+        sha 已知时按该修订版本下载 config.json：URL 内容不可变，可以放心长期缓存，
+        模型更新后 sha 变化即是新的 URL，不会读到旧的缓存；sha 未知时退回 main
+        """
         try:
-            config_url = f"https://huggingface.co/{model_id}/resolve/main/config.json"
-            r = requests.get(config_url, headers=self.headers, timeout=5)
+            config_url = f"https://huggingface.co/{model_id}/resolve/{sha or 'main'}/config.json"
+            r = self.cache.fetch(self.scheduled_get, config_url, timeout=5)
             if r.status_code == 200:
-                config = r.json()
-                # 常见的 context key
-                keys = ['max_position_embeddings', 'seq_length', 'n_positions', 'max_sequence_length', 'context_length']
-                for k in keys:
-                    if k in config:
-                        return config[k]
-                # 有些模型如 Mistral 使用 sliding window，这里做简单处理
-                if 'sliding_window' in config and config['sliding_window']:
-                     return config['sliding_window']
-            print(model_id)
-            return None
-        except:
-            print(model_id)
-            return None
+                context_length = self.parse_context_length(r.json())
+                if context_length:
+                    return context_length, True
+            self.metrics.event("hf.context_missing", error=f"{model_id}: HTTP {r.status_code}")
+            # 404 / 无权限等是确定的结果；5xx 与 429 属于临时错误
+            return None, r.status_code < 500 and r.status_code != 429
+        except Exception as e:
+            self.metrics.event("hf.config_error", error=f"{model_id}: {e!r}")
+            return None, False
+
+    def scheduled_get(self, url, priority=None, **kwargs):
+        """所有 HF 请求都经过共享调度器，按 Token 维护配额"""
+        extra = {} if priority is None else {"priority": priority}
+        return self.scheduler.request(lambda: self.session.get(url, **kwargs), "huggingface.co",
+                                      token=HUGGINGFACE_TOKEN, **extra)
+
+    def parse_context_length(self, config):
+        # 常见的 context key
+        keys = ['max_position_embeddings', 'seq_length', 'n_positions', 'max_sequence_length', 'context_length']
+        for k in keys:
+            if k in config:
+                return config[k]
+        # 有些模型如 Mistral 使用 sliding window，这里做简单处理
+        if 'sliding_window' in config and config['sliding_window']:
+             return config['sliding_window']
+        return None
 
     def run(self):
-        self.fetch_model_info()
\ No newline at end of file
+        self.fetch_model_info()
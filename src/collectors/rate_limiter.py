@@ -0,0 +1,26 @@
+import threading
+import time
+
+
+class TokenBucket:
+    """
+    令牌桶限速器：平均速率 rate 次/秒，允许 capacity 次突发
+    try_acquire() 不阻塞，只返回还需等待的时间，因此同步线程和 asyncio 协程都能复用
+    """
+    def __init__(self, rate, capacity=None):
+        self.rate = float(rate)
+        self.capacity = float(capacity if capacity is not None else max(1.0, rate))
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def try_acquire(self):
+        """有令牌时取走一个并返回 0；否则不扣减，返回下一个令牌生成前需要等待的秒数"""
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return 0.0
+            return (1 - self.tokens) / self.rate
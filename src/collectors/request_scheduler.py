@@ -0,0 +1,260 @@
+import asyncio
+import hashlib
+import heapq
+import itertools
+import re
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from config.settings import HOST_RATE_LIMITS, DEFAULT_HOST_RATE, LOW_BUDGET_RATIO
+from src.collectors.rate_limiter import TokenBucket
+from src.monitoring.metrics import get_metrics
+
+# 数值越小优先级越高：同一域名排队时先发送；配额紧张时低优先级请求会被进一步推迟
+PRIORITY_HIGH = 0
+PRIORITY_NORMAL = 1
+PRIORITY_LOW = 2
+
+
+class HostBudget:
+    """单个 (域名, Token) 的配额状态、等待队列与等待统计"""
+    def __init__(self, rate):
+        self.bucket = TokenBucket(rate)
+        self.limit = None
+        self.remaining = None
+        self.reset_at = None
+        self.blocked_until = 0.0
+        self.next_slot = 0.0
+        self.queue = [] # (priority, seq) 小顶堆，堆顶的请求下一个发送
+        self.waiting = 0
+        self.requests = 0
+        self.throttled = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+
+
+class RequestScheduler:
+    """
+    所有采集器共用的请求调度器
+    - 每个 (域名, Token) 一个按优先级排序的等待队列：发送名额总是分给队列中优先级最高 (同级先到) 的请求，
+      后到的高优先级请求会越过已在排队的低优先级请求
+    - 基础节奏：每个域名一个令牌桶 (HOST_RATE_LIMITS)
+    - 自适应节奏：根据响应头 X-RateLimit-Remaining / X-RateLimit-Reset / Retry-After
+      把剩余配额均匀分摊到重置前的时间窗口内，既不透支也不空等
+    - 配额低于 LOW_BUDGET_RATIO 时，低优先级请求之后的间隔被拉长，把剩余配额留给高优先级请求
+    - metrics() 提供每个域名的排队深度与等待时间；每个请求的延迟 / 字节数 / 重试次数写入 Metrics
+    """
+    # 没轮到的请求最短隔多久再检查一次队列
+    POLL_INTERVAL = 0.01
+
+    def __init__(self, rates=HOST_RATE_LIMITS, default_rate=DEFAULT_HOST_RATE, low_budget_ratio=LOW_BUDGET_RATIO,
+                 metrics=None):
+        self.rates = dict(rates)
+        self.recorder = metrics or get_metrics()
+        self.default_rate = default_rate
+        self.low_budget_ratio = low_budget_ratio
+        self.budgets = {}
+        self._seq = itertools.count()
+        self._lock = threading.Lock()
+
+    def _key(self, host, token):
+        if not token:
+            return host
+        return f"{host}#{hashlib.sha1(token.encode()).hexdigest()[:8]}"
+
+    def _budget(self, host, token):
+        key = self._key(host, token)
+        if key not in self.budgets:
+            base_host = host.split("/", 1)[0]
+            self.budgets[key] = HostBudget(self.rates.get(host, self.rates.get(base_host, self.default_rate)))
+        return self.budgets[key]
+
+    # ------------------------------------------
+    # 优先级队列
+    # ------------------------------------------
+    def _enqueue(self, host, token, priority):
+        with self._lock:
+            b = self._budget(host, token)
+            ticket = (priority, next(self._seq))
+            heapq.heappush(b.queue, ticket)
+            b.waiting += 1
+            return b, ticket
+
+    def _poll(self, b, ticket):
+        """轮到 ticket 且有发送名额时出队并返回 0，否则返回建议的等待秒数"""
+        with self._lock:
+            now = time.time()
+            wait = max(b.blocked_until, b.next_slot) - now
+            if wait > 0:
+                return wait
+            if b.queue[0] != ticket:
+                return self.POLL_INTERVAL
+            wait = b.bucket.try_acquire()
+            if wait > 0:
+                # 名额恢复之前谁都发不了，排在后面的请求也不必频繁检查
+                b.next_slot = now + wait
+                return wait
+            heapq.heappop(b.queue)
+            if b.remaining is not None and b.reset_at and b.reset_at > now:
+                interval = (b.reset_at - now) / max(b.remaining, 1)
+                if b.limit and b.remaining <= b.limit * self.low_budget_ratio and ticket[0] > PRIORITY_HIGH:
+                    interval *= 1 + 2 * ticket[0]
+                b.next_slot = now + interval
+                # 乐观扣减，收到响应后以服务端返回的数值为准
+                b.remaining = max(b.remaining - 1, 0)
+            return 0.0
+
+    def _done_waiting(self, b, ticket, waited, granted):
+        with self._lock:
+            if not granted:
+                # 等待中被取消 (例如协程被 cancel)：从队列中移除，避免堵住后面的请求
+                b.queue.remove(ticket)
+                heapq.heapify(b.queue)
+            b.waiting -= 1
+            if granted:
+                b.requests += 1
+                b.wait_total += waited
+                b.wait_max = max(b.wait_max, waited)
+
+    def acquire(self, host, token=None, priority=PRIORITY_NORMAL):
+        b, ticket = self._enqueue(host, token, priority)
+        start, granted = time.time(), False
+        try:
+            while True:
+                delay = self._poll(b, ticket)
+                if delay <= 0:
+                    granted = True
+                    return
+                time.sleep(delay)
+        finally:
+            self._done_waiting(b, ticket, time.time() - start, granted)
+
+    async def acquire_async(self, host, token=None, priority=PRIORITY_NORMAL):
+        b, ticket = self._enqueue(host, token, priority)
+        start, granted = time.time(), False
+        try:
+            while True:
+                delay = self._poll(b, ticket)
+                if delay <= 0:
+                    granted = True
+                    return
+                await asyncio.sleep(delay)
+        finally:
+            self._done_waiting(b, ticket, time.time() - start, granted)
+
+    # ------------------------------------------
+    # 根据响应头更新配额
+    # ------------------------------------------
+    def update(self, host, token, status_code, headers):
+        """返回 True 表示本次响应是限流拒绝，调用方应重试"""
+        now = time.time()
+        remaining = _to_float(headers.get("X-RateLimit-Remaining"))
+        limit = _to_float(headers.get("X-RateLimit-Limit"))
+        reset = _to_float(headers.get("X-RateLimit-Reset"))
+        # IETF 草案格式 (Hugging Face 使用)：RateLimit: "api";r=499;t=123
+        draft = re.search(r"r=(\d+);\s*t=(\d+)", headers.get("RateLimit") or "")
+        if draft:
+            remaining, reset = float(draft.group(1)), now + float(draft.group(2))
+            policy = re.search(r"q=(\d+)", headers.get("RateLimit-Policy") or "")
+            limit = float(policy.group(1)) if policy else None
+        retry_after = _parse_retry_after(headers.get("Retry-After"), now)
+
+        with self._lock:
+            b = self._budget(host, token)
+            if remaining is not None:
+                b.remaining = int(remaining)
+                b.limit = int(limit) if limit else b.limit
+                b.reset_at = reset if reset and reset > now else b.reset_at
+            throttled = status_code == 429 or (status_code == 403 and (retry_after or b.remaining == 0))
+            if throttled:
+                b.throttled += 1
+                until = now + retry_after if retry_after else (b.reset_at or now + 60)
+                b.blocked_until = max(b.blocked_until, until)
+            return throttled
+
+    def request(self, send, host, token=None, priority=PRIORITY_NORMAL, max_retries=2):
+        """同步发送：send() 返回响应对象；被限流时等待配额恢复后重试"""
+        elapsed = 0.0 # 只统计网络耗时，排队等待另见 metrics()
+        for attempt in range(max_retries + 1):
+            self.acquire(host, token, priority)
+            start = time.perf_counter()
+            try:
+                r = send()
+            except Exception as e:
+                self.recorder.record_request(host, None, elapsed + time.perf_counter() - start, retries=attempt, error=repr(e))
+                raise
+            elapsed += time.perf_counter() - start
+            if not self.update(host, token, r.status_code, r.headers) or attempt == max_retries:
+                self._record(host, r, elapsed, attempt)
+                return r
+        return r
+
+    async def request_async(self, send, host, token=None, priority=PRIORITY_NORMAL, max_retries=2):
+        """异步版本：send() 返回协程"""
+        elapsed = 0.0
+        for attempt in range(max_retries + 1):
+            await self.acquire_async(host, token, priority)
+            start = time.perf_counter()
+            try:
+                r = await send()
+            except Exception as e:
+                self.recorder.record_request(host, None, elapsed + time.perf_counter() - start, retries=attempt, error=repr(e))
+                raise
+            elapsed += time.perf_counter() - start
+            if not self.update(host, token, r.status_code, r.headers) or attempt == max_retries:
+                self._record(host, r, elapsed, attempt)
+                return r
+        return r
+
+    def _record(self, host, r, elapsed, retries):
+        content = getattr(r, "content", None)
+        self.recorder.record_request(host, r.status_code, elapsed, len(content) if content is not None else None,
+                                     retries=retries)
+
+    def metrics(self):
+        now = time.time()
+        with self._lock:
+            return {
+                key: {
+                    "queue_depth": b.waiting,
+                    "requests": b.requests,
+                    "throttled": b.throttled,
+                    "avg_wait": round(b.wait_total / b.requests, 3) if b.requests else 0.0,
+                    "max_wait": round(b.wait_max, 3),
+                    "remaining": b.remaining,
+                    "reset_in": round(b.reset_at - now, 1) if b.reset_at else None,
+                }
+                for key, b in self.budgets.items()
+            }
+
+
+def _to_float(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _parse_retry_after(value, now):
+    """Retry-After 可能是秒数，也可能是 HTTP 日期"""
+    if not value:
+        return None
+    seconds = _to_float(value)
+    if seconds is not None:
+        return seconds
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - now)
+    except (TypeError, ValueError):
+        return None
+
+
+_default_scheduler = None
+_default_scheduler_lock = threading.Lock()
+
+def get_default_scheduler():
+    """进程内共享的调度器实例，所有采集器默认都通过它发请求"""
+    global _default_scheduler
+    with _default_scheduler_lock:
+        if _default_scheduler is None:
+            _default_scheduler = RequestScheduler()
+    return _default_scheduler
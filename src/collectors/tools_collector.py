@@ -4,27 +4,33 @@
 import curl_cffi
 import requests 
 import re
-import time
-import pandas as pd
+import asyncio
 from tqdm import tqdm
-from lxml import html
-from config.settings import GITHUB_TOKEN
+from curl_cffi.requests import AsyncSession
+from config.settings import GLAMA_CONCURRENCY, GLAMA_STALE_DAYS, GLAMA_MAX_ATTEMPTS
+from src.collectors.request_scheduler import get_default_scheduler, PRIORITY_HIGH
+from src.collectors.http_cache import get_default_cache
+from src.collectors.github_metadata import GitHubMetadataResolver
+from src.collectors.glama_parser import count_tools
+from src.monitoring.metrics import get_metrics
 
 class GlamaCollector:
-    def __init__(self, db_manager):
+    def __init__(self, db_manager, cache=None, scheduler=None, metrics=None):
         self.db = db_manager
-        # GitHub API 还是可以用标准头
-        self.gh_headers = {
-            "Authorization": f"token {GITHUB_TOKEN}",
-            "Accept": "application/vnd.github.v3+json"
-        }
+        self.metrics = metrics or get_metrics()
+        self.cache = cache or get_default_cache()
+        self.scheduler = scheduler or get_default_scheduler()
+        # 仓库创建日期通过 GraphQL 批量解析，不再逐个调用 REST
+        self.resolver = GitHubMetadataResolver(db_manager, cache=self.cache, scheduler=self.scheduler)
+        # 记录每种表格匹配策略命中的次数，便于发现页面改版
+        self.strategy_counts = {}
 
     def fetch_repo_list_from_awesome(self):
         print("📥 正在读取 Awesome MCP 列表...")
         url = "https://raw.githubusercontent.com/punkpeye/awesome-mcp-servers/main/README.md"
         try:
             # 这里的 requests 是 curl_cffi.requests
-            r = requests.get(url)
+            r = self.cache.fetch(self._scheduled_get(requests.get, "raw.githubusercontent.com", PRIORITY_HIGH), url)
             if r.status_code != 200:
                 print(f"❌ 无法获取 README: {r.status_code}")
                 return []
@@ -46,90 +52,150 @@ class GlamaCollector:
         """
         爬取 Glama Schema 页面
         URL: https://glama.ai/mcp/servers/@{user}/{repo}/schema
+        返回 (tool_count, note)：成功时 note 为匹配策略，失败时 tool_count 为 None、note 为原因
         """
         try:
             user, repo = repo_full_name.split('/')
             target_url = f"https://glama.ai/mcp/servers/@{user}/{repo}/schema"
-            r = curl_cffi.requests.get(target_url, impersonate="chrome", timeout=15)
+            r = self.cache.fetch(self._scheduled_get(curl_cffi.requests.get, "glama.ai"), target_url,
+                                 impersonate="chrome", timeout=15)
             if r.status_code != 200:
-                return None
-
-            # 解析 HTML
-            tree = html.fromstring(r.content)
-            
-            # 使用你指定的 XPath
-            xpath_str = '/html/body/div[2]/main/div[1]/div/section[3]/table/tbody/tr'
-            rows = tree.xpath(xpath_str)
-            tool_count = len(rows)
-            print(tool_count)
-            
-            return tool_count
+                return None, f"http {r.status_code}"
+            return self.parse_tool_count(repo_full_name, r.content)
 
         except Exception as e:
-            # print(f"Error scraping {repo_full_name}: {e}")
-            return None
+            self.metrics.event("glama.fetch_error", error=f"{repo_full_name}: {e!r}")
+            return None, f"error: {e}"
+
+    def _scheduled_get(self, get, host, priority=None):
+        """通过调度器发出的同步 get；缓存命中时不会调用，也就不消耗配额"""
+        kwargs = {} if priority is None else {"priority": priority}
+        def scheduled(url, **request_kwargs):
+            return self.scheduler.request(lambda: get(url, **request_kwargs), host, **kwargs)
+        return scheduled
+
+    def parse_tool_count(self, repo_full_name, content):
+        tool_count, strategy = count_tools(content)
+        self.strategy_counts[strategy] = self.strategy_counts.get(strategy, 0) + 1
+        if tool_count is None:
+            print(f"⚠️ {repo_full_name}: 未找到 Tools 表格")
+            return None, "tool table not found"
+        return tool_count, strategy
 
-    def get_repo_created_date(self, repo_full_name):
-        url = f"https://api.github.com/repos/{repo_full_name}"
-        print(url)
+    # ==========================================
+    # 异步采集：有界并发 + 按域名令牌桶限速
+    # ==========================================
+    async def async_get_tool_count(self, session, repo_full_name):
         try:
-            r = requests.get(url, headers=self.gh_headers)
-            if r.status_code == 200:
-                return r.json()['created_at'][:10]
-            elif r.status_code == 403:
-                time.sleep(2)
-        except:
-            pass
-        return None
-
-    def run(self):
-        print("🚀 开始执行：Glama 实测爬虫 (使用 Chrome 伪装)...")
-        repos = self.fetch_repo_list_from_awesome()[253:264]
-        data_rows = []
-        print(f"🕷️ 正在分析 {len(repos)} 个仓库...")
-        
+            user, repo = repo_full_name.split('/')
+            target_url = f"https://glama.ai/mcp/servers/@{user}/{repo}/schema"
+            r = await self.cache.afetch(self._scheduled_get_async(session, "glama.ai"), target_url,
+                                        impersonate="chrome", timeout=15)
+            if r.status_code != 200:
+                return None, f"http {r.status_code}"
+            return self.parse_tool_count(repo_full_name, r.content)
+        except Exception as e:
+            self.metrics.event("glama.fetch_error", error=f"{repo_full_name}: {e!r}")
+            return None, f"error: {e}"
+
+    def _scheduled_get_async(self, session, host):
+        """只有真正发出网络请求时才经过调度器，缓存命中不受限速影响"""
+        async def get(url, **kwargs):
+            return await self.scheduler.request_async(lambda: session.get(url, **kwargs), host)
+        return get
+
+    async def _collect_one(self, session, semaphore, repo):
+        async with semaphore:
+            tool_count, note = await self.async_get_tool_count(session, repo)
+            self.record_count(repo, tool_count, note)
+
+    def record_count(self, repo, tool_count, note):
+        """
+        第一阶段：工具数量写入账本 (状态 counted)，创建日期留给第二阶段批量解析
+        页面不存在记为 missing；页面存在但解析不到表格记为 failed，不会当作 0 个工具
+        """
+        if tool_count is None:
+            status = "missing" if note == "http 404" else "failed"
+            self.db.record_repo_result(repo, status, error=note)
+        else:
+            self.db.record_repo_result(repo, "counted", tool_count=tool_count)
+
+    def resolve_created_dates(self, listed=None):
+        """
+        第二阶段：对账本中所有 counted 仓库 (包括上次中断遗留的) 批量解析创建日期
+        解析失败时保持 counted：工具数量已入账，下次只重试日期解析，不再请求 Glama；
+        连续失败 GLAMA_MAX_ATTEMPTS 次后不再重试
+        """
+        tool_counts = self.db.get_ledger_tool_counts("counted", max_attempts=GLAMA_MAX_ATTEMPTS, listed=listed)
+        if not tool_counts:
+            return
+        repos = sorted(tool_counts)
+        print(f"🔎 批量解析 {len(repos)} 个仓库的创建日期...")
+        metadata = self.resolver.resolve(repos)
+        for repo in repos:
+            meta = metadata.get(repo)
+            if meta:
+                self.db.record_repo_result(repo, "done", created_at=meta["created_at"])
+                self.db.record_repo_observation(self.run_id, repo, meta["created_at"], tool_counts[repo])
+            else:
+                self.db.record_repo_result(repo, "counted", error="no created_at")
+        print(f"   - GitHub 元数据: {self.resolver.stats}")
+
+    async def collect_async(self, repos, concurrency=GLAMA_CONCURRENCY):
+        """
+        并发采集多个仓库，总耗时取决于各域名的限速，而不是单次请求的往返延迟
+        """
+        semaphore = asyncio.Semaphore(concurrency)
+        async with AsyncSession(impersonate="chrome", max_clients=concurrency) as session:
+            tasks = [self._collect_one(session, semaphore, repo) for repo in repos]
+            for coro in tqdm(asyncio.as_completed(tasks), total=len(tasks), desc="Glama (async)"):
+                await coro
+
+    def collect_sync(self, repos):
         for repo in repos:
         # for repo in tqdm(repos):
-            tool_count = self.get_real_tool_count_from_glama(repo)
-            if tool_count is None:
-                continue 
-            
-            date_str = self.get_repo_created_date(repo)
-            if date_str:
-                data_rows.append({
-                    "date": date_str,
-                    "repo": repo,
-                    "tool_count": tool_count
-                })
-            
-            time.sleep(0.5) # 稍微快一点，因为 curl_cffi 性能更好
+            tool_count, note = self.get_real_tool_count_from_glama(repo)
+            self.record_count(repo, tool_count, note)
 
-        if not data_rows:
-            print("❌ 未获取到数据。")
-            return
+    def run(self, use_async=True, limit=None, stale_days=GLAMA_STALE_DAYS):
+        """
+        基于账本断点续爬：只处理未采集 / 失败 / 过期的仓库，limit 可限制本次处理数量
+        每个仓库的结果立即写入账本；完成的仓库作为本批次的观测追加保存，
+        累计曲线只根据本批次发生变化 (含下架) 的仓库增量更新
+        """
+        print("🚀 开始执行：Glama 实测爬虫 (使用 Chrome 伪装)...")
+        self.run_id = self.db.start_run("glama")
+        seeded = self.db.seed_repo_latest(self.run_id)
+        if seeded:
+            print(f"📦 从账本补录 {seeded} 个仓库的观测数据")
+        with self.metrics.span("glama.repo_list"):
+            all_repos = self.fetch_repo_list_from_awesome()
+        self.db.sync_ledger(all_repos)
+        repos = self.db.get_pending_repos(stale_days, GLAMA_MAX_ATTEMPTS, listed=all_repos)
+        if limit is not None:
+            repos = repos[:limit]
+        print(f"🕷️ 正在分析 {len(repos)} 个仓库 (账本共 {len(all_repos)} 个)...")
 
-        # 聚合与保存逻辑
-        df = pd.DataFrame(data_rows)
-        df['date'] = pd.to_datetime(df['date'])
-        df = df.sort_values('date')
-        
-        df_daily = df.groupby('date')['tool_count'].sum().reset_index()
-        df_daily['total_skills'] = df_daily['tool_count'].cumsum()
-        
-        data_to_save = []
-        for _, row in df_daily.iterrows():
-            d_str = row['date'].strftime('%Y-%m-%d')
-            data_to_save.append((d_str, "Available Skills (Tools)", int(row['total_skills'])))
-            
-        self.db.save_github_data(data_to_save)
-        
-        # 保存 Servers 计数
-        df_servers = df.groupby('date').size().reset_index(name='new_servers')
-        df_servers['total_servers'] = df_servers['new_servers'].cumsum()
-        server_data = [
-            (row['date'].strftime('%Y-%m-%d'), "MCP Servers", int(row['total_servers']))
-            for _, row in df_servers.iterrows()
-        ]
-        self.db.save_github_data(server_data)
-        
-        print(f"   - 最终 Tools 总数: {df_daily['total_skills'].iloc[-1]}")
\ No newline at end of file
+        with self.metrics.span("glama.collect", count=len(repos)):
+            if use_async:
+                asyncio.run(self.collect_async(repos))
+            else:
+                self.collect_sync(repos)
+        print(f"   - Tools 表格匹配策略: {self.strategy_counts}")
+        with self.metrics.span("glama.resolve_dates"):
+            self.resolve_created_dates(listed=all_repos)
+        with self.metrics.span("glama.finish_run"):
+            # 页面已消失 / 已不在列表中的仓库从总数中撤回
+            retracted = self.db.finish_run(self.run_id, listed=all_repos)
+        if retracted:
+            print(f"🗑️ 撤回 {retracted} 个已下架 / 页面不存在的仓库")
+        self.metrics.flush()
+
+        df_tools = self.db.query_tools_series(topics=["Available Skills (Tools)"])
+        if df_tools.empty:
+            print("❌ 未获取到数据。")
+        else:
+            print(f"   - 最终 Tools 总数: {df_tools['repo_count'].iloc[-1]}")
+        print(f"   - HTTP 缓存: {self.cache.stats()}")
+        print(f"   - 请求调度: {self.scheduler.metrics()}")
+        print(f"   - 请求 / 阶段耗时指标: run {self.metrics.run_id} (python metrics_report.py 查看)")
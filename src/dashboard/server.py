@@ -0,0 +1,217 @@
+import hashlib
+import json
+import os
+import threading
+import time
+import traceback
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+import numpy as np
+from config.settings import (DASHBOARD_HOST, DASHBOARD_PORT, DASHBOARD_CACHE_SIZE, DASHBOARD_VERSION_TTL,
+                             DASHBOARD_MAX_POINTS)
+from src.visualizers.downsampling import lttb_indices, density_bins
+from src.processors.data_cleaner import MIN_CONTEXT, MAX_CONTEXT
+
+STATIC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "static")
+# 单个 marker 在屏幕上大约占的像素，决定分箱网格的粗细
+PIXELS_PER_BIN = 6
+
+
+class DashboardServer:
+    """
+    本地看板：页面外壳只加载一次，数据通过 JSON 接口按当前时间窗口与分辨率按需获取
+    - /api/tools:  工具总数曲线 (窗口内 LTTB 降采样到屏幕宽度)
+    - /api/topics: 某一天的 Topic 细分 (悬停时才请求，不再预先生成全部 Hover 文本)
+    - /api/models: 模型散点 (窗口内点数过多时按屏幕分辨率分箱)
+    响应按 (数据版本, 路径, 参数) 缓存，数据库变化后自动失效；plotly.js 取自本地安装包，完全离线
+    """
+    def __init__(self, db_manager, host=DASHBOARD_HOST, port=DASHBOARD_PORT, cache_size=DASHBOARD_CACHE_SIZE,
+                 version_ttl=DASHBOARD_VERSION_TTL, max_points=DASHBOARD_MAX_POINTS):
+        self.db = db_manager
+        self.host = host
+        self.port = port
+        self.cache_size = cache_size
+        self.version_ttl = version_ttl
+        self.max_points = max_points
+        self.routes = {
+            "/api/meta": self.api_meta,
+            "/api/tools": self.api_tools,
+            "/api/topics": self.api_topics,
+            "/api/models": self.api_models,
+        }
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+        self._version = None
+        self._version_checked = 0.0
+        self._plotlyjs = None
+        self._plotlyjs_etag = None
+        self.counters = {"requests": 0, "cache_hits": 0}
+
+    # ------------------------------------------
+    # 缓存
+    # ------------------------------------------
+    @property
+    def version(self):
+        """data_version() 本身只读一张小表，但要先等写队列落盘；按 TTL 复用结果"""
+        now = time.time()
+        if self._version is None or now - self._version_checked > self.version_ttl:
+            version = hashlib.sha1(self.db.data_version().encode()).hexdigest()[:16]
+            with self._lock:
+                if version != self._version:
+                    self._cache.clear()
+                self._version, self._version_checked = version, now
+        return self._version
+
+    def handle(self, path, query):
+        """返回 (状态码, Content-Type, body, ETag)"""
+        if path == "/":
+            with open(os.path.join(STATIC_DIR, "index.html"), "rb") as f:
+                return 200, "text/html; charset=utf-8", f.read(), None
+        if path == "/plotly.min.js":
+            if self._plotlyjs is None:
+                from plotly.offline import get_plotlyjs
+                self._plotlyjs = get_plotlyjs().encode("utf-8")
+                self._plotlyjs_etag = hashlib.sha1(self._plotlyjs).hexdigest()[:16]
+            return 200, "application/javascript", self._plotlyjs, self._plotlyjs_etag
+        route = self.routes.get(path)
+        if route is None:
+            return 404, "application/json", b'{"error": "not found"}', None
+
+        params = {k: v[-1] for k, v in query.items()}
+        version = self.version
+        key = (version, path, tuple(sorted(params.items())))
+        with self._lock:
+            self.counters["requests"] += 1
+            body = self._cache.get(key)
+            if body is not None:
+                self._cache.move_to_end(key)
+                self.counters["cache_hits"] += 1
+        if body is None:
+            try:
+                body = json.dumps(route(params), ensure_ascii=False).encode("utf-8")
+            except ValueError as e:
+                return 400, "application/json", json.dumps({"error": str(e)}).encode("utf-8"), None
+            except Exception as e:
+                # 其余异常同样以 JSON 返回，不让请求线程带着异常退出 (客户端只会看到连接被断开)
+                traceback.print_exc()
+                return 500, "application/json", json.dumps({"error": f"internal error: {e!r}"}).encode("utf-8"), None
+            with self._lock:
+                self._cache[key] = body
+                while len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+        etag = hashlib.sha1(f"{key}".encode()).hexdigest()[:16]
+        return 200, "application/json", body, etag
+
+    # ------------------------------------------
+    # 数据接口
+    # ------------------------------------------
+    def _window(self, params):
+        return params.get("start") or None, params.get("end") or None
+
+    def _int(self, params, name, default, low=1, high=100000):
+        try:
+            value = int(float(params.get(name, default)))
+        except (ValueError, OverflowError): # "abc" / "nan" / "inf"
+            raise ValueError(f"invalid {name}: {params[name]}")
+        return max(low, min(value, high))
+
+    def api_meta(self, params):
+        start, end, models = self.db.date_bounds()
+        return {"version": self.version, "start": start, "end": end, "models": models}
+
+    def api_tools(self, params):
+        start, end = self._window(params)
+        topics = [t for t in params.get("topics", "").split(",") if t] or None
+        points = self._int(params, "points", 1500, low=3)
+        df = self.db.query_tools_series(start, end, topics)
+        total = len(df)
+        if total > points:
+            keep = lttb_indices(df['date'].to_numpy().astype("datetime64[ns]").astype(np.int64),
+                                df['repo_count'].to_numpy(), points)
+            df = df.iloc[keep]
+        return {"x": df['date'].dt.strftime('%Y-%m-%d').tolist(), "y": df['repo_count'].tolist(), "total": total}
+
+    def api_topics(self, params):
+        date = params.get("date")
+        if not date:
+            raise ValueError("date is required")
+        top = self._int(params, "top", 10, high=1000)
+        df = self.db.query_github_stats(start=date, end=date)
+        df = df[df['repo_count'] > 0].sort_values('repo_count', ascending=False)
+        return {
+            "date": date[:10],
+            "total": int(df['repo_count'].sum()),
+            "topics": [[str(t), int(c)] for t, c in zip(df['topic'].head(top), df['repo_count'].head(top))],
+            "more": max(0, len(df) - top),
+        }
+
+    def api_models(self, params):
+        """width / height 为前端绘图区的像素尺寸，即当前缩放级别下的分辨率"""
+        start, end = self._window(params)
+        width = self._int(params, "width", 1200, low=50, high=10000)
+        height = self._int(params, "height", 700, low=50, high=10000)
+        df = self.db.query_models(start, end, min_context=MIN_CONTEXT, max_context=MAX_CONTEXT)
+        milestones = df[df['downloads'] == -1]
+        others = df[df['downloads'] > 0]
+
+        def raw(frame):
+            return {
+                "x": frame['created_at'].dt.strftime('%Y-%m-%d').tolist(),
+                "y": frame['context_length'].tolist(),
+                "id": frame['model_id'].astype(str).tolist(),
+            }
+
+        result = {"milestones": raw(milestones), "total": len(others)}
+        if len(others) <= self.max_points:
+            result["models"] = {"binned": False, **raw(others)}
+        else:
+            bins = density_bins(others, 'created_at', 'context_length', width // PIXELS_PER_BIN,
+                                height // PIXELS_PER_BIN, log_y=True, weight_col='downloads', label_col='model_id')
+            result["models"] = {
+                "binned": True,
+                "x": bins['x'].dt.strftime('%Y-%m-%d').tolist(),
+                "y": bins['y'].round().tolist(),
+                "id": bins['label'].astype(str).tolist(),
+                "count": bins['count'].tolist(),
+            }
+        return result
+
+    # ------------------------------------------
+    # HTTP
+    # ------------------------------------------
+    def make_handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                url = urlparse(self.path)
+                status, content_type, body, etag = server.handle(url.path, parse_qs(url.query))
+                if etag and self.headers.get("If-None-Match") == etag:
+                    self.send_response(304)
+                    self.end_headers()
+                    return
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                if etag:
+                    self.send_header("ETag", etag)
+                    self.send_header("Cache-Control", "no-cache")
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass # 每次缩放都会发请求，不逐条打印
+
+        return Handler
+
+    def serve_forever(self):
+        httpd = ThreadingHTTPServer((self.host, self.port), self.make_handler())
+        print(f"📊 看板已启动: http://{self.host}:{self.port}/ (Ctrl+C 退出)")
+        try:
+            httpd.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            httpd.server_close()
+            print(f"👋 看板已关闭 (请求 {self.counters['requests']}，缓存命中 {self.counters['cache_hits']})")
@@ -1,16 +1,204 @@
 import sqlite3
+import atexit
+import queue
+import threading
 import pandas as pd
-from config.settings import DB_PATH
+from pandas.api.types import union_categoricals
+from config.settings import DB_PATH, DB_WRITE_BATCH, DB_PRAGMAS, DB_READ_CHUNK
+from src.monitoring.metrics import get_metrics
+from src.pipeline.runner import check_cancelled
 import os
+from datetime import datetime, timedelta
+
+try:
+    import pyarrow # noqa: F401 (仅检测是否可用)
+    _STRING_DTYPE = "string[pyarrow]"
+except ImportError:
+    _STRING_DTYPE = "string"
+
+class _WriteOp:
+    """写队列中的一项：任意 fn(conn)，或 sql + rows (executemany，整批失败时可逐行重试)"""
+    __slots__ = ("fn", "sql", "rows", "done", "error")
+
+    def __init__(self, fn=None, sql=None, rows=None):
+        self.fn = fn
+        self.sql = sql
+        self.rows = rows
+        self.done = None
+        self.error = None
+
+    def __call__(self, conn):
+        if self.fn is not None:
+            self.fn(conn)
+        else:
+            conn.executemany(self.sql, self.rows)
+
 
 class DBManager:
-    def __init__(self):
-        os.makedirs(os.path.dirname(DB_PATH), exist_ok=True)
-        self.conn = sqlite3.connect(DB_PATH)
-        self.create_tables()
+    """
+    并发安全的存储层
+    - WAL 模式：读写互不阻塞，多个进程也可以同时读
+    - 所有写操作进入队列，由唯一的写线程合并成批量事务提交，避免每次调用都 fsync
+    - 单个操作 / 单行出错只丢弃出错的部分，写线程本身不会退出 (见 _submit)
+    - 每个线程使用各自的只读连接；读之前会先等待已提交到队列的写操作落盘
+    """
+    def __init__(self, db_path=DB_PATH, batch_size=DB_WRITE_BATCH, pragmas=DB_PRAGMAS, metrics=None):
+        os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+        self.metrics = metrics or get_metrics()
+        self.db_path = db_path
+        self.batch_size = batch_size
+        self.pragmas = pragmas
+        self._local = threading.local()
+        self._queue = queue.Queue()
+        self._closed = False
+        self.write_errors = 0
+
+        setup = self._connect()
+        self.create_tables(setup)
+        setup.close()
+
+        self._writer = threading.Thread(target=self._writer_loop, name="db-writer", daemon=True)
+        self._writer.start()
+        atexit.register(self.close)
+
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=self.pragmas.get("busy_timeout", 30000) / 1000,
+                               check_same_thread=False)
+        for key, value in self.pragmas.items():
+            conn.execute(f"PRAGMA {key} = {value}")
+        return conn
+
+    @property
+    def conn(self):
+        """当前线程的读连接"""
+        if getattr(self._local, "conn", None) is None:
+            self._local.conn = self._connect()
+        return self._local.conn
+
+    def _reader(self):
+        self.flush()
+        return self.conn
+
+    # ==========================================
+    # 写线程
+    # ==========================================
+    def _submit(self, op, wait=False):
+        """
+        op(conn) 会在写线程的事务中执行；已超时的流水线阶段不能再写入
+        wait=True 时阻塞到该操作提交，写入失败的异常在调用方重新抛出；
+        否则失败只打印并记入 write_errors / metrics (写线程本身不会因此退出)
+        """
+        check_cancelled()
+        if self._closed:
+            raise RuntimeError("DBManager is closed")
+        if not isinstance(op, _WriteOp):
+            op = _WriteOp(op)
+        if wait:
+            op.done = threading.Event()
+        self._queue.put(op)
+        if wait:
+            op.done.wait()
+            if op.error is not None:
+                raise op.error
+
+    def _write_many(self, sql, rows):
+        rows = list(rows)
+        if rows:
+            self._submit(_WriteOp(sql=sql, rows=rows))
+
+    def _write(self, sql, params=()):
+        self._submit(_WriteOp(sql=sql, rows=[params]))
 
-    def create_tables(self):
-        cursor = self.conn.cursor()
+    def flush(self):
+        """阻塞直到此前提交的写操作全部处理完 (成功提交或已记录失败)"""
+        if self._closed or threading.current_thread() is self._writer:
+            return
+        done = threading.Event()
+        self._queue.put(done)
+        done.wait()
+
+    def close(self):
+        if self._closed:
+            return
+        self.flush()
+        self._closed = True
+        self._queue.put(None)
+        self._writer.join()
+
+    def _writer_loop(self):
+        conn = self._connect()
+        while True:
+            item = self._queue.get()
+            batch = [item]
+            # 把队列里已经积压的写操作合并到同一个事务
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            ops = [op for op in batch if isinstance(op, _WriteOp)]
+            if ops:
+                try:
+                    self._commit(conn, ops)
+                except Exception as e:
+                    # 兜底：写线程一旦退出，之后所有 flush() 都会永远等待
+                    for op in ops:
+                        if op.error is None:
+                            op.error = e
+                    self._write_failed(e)
+            for op in batch:
+                if isinstance(op, threading.Event):
+                    op.set()
+                elif isinstance(op, _WriteOp) and op.done is not None:
+                    op.done.set()
+            if None in batch:
+                conn.close()
+                return
+
+    def _commit(self, conn, ops):
+        with self.metrics.span("db.commit", count=len(ops)):
+            self._commit_ops(conn, ops)
+
+    def _commit_ops(self, conn, ops):
+        try:
+            with conn:
+                for op in ops:
+                    op(conn)
+        except Exception:
+            # 整批失败时逐个操作重试；批量写入的操作再逐行重试，只丢弃真正出错的那几行
+            for op in ops:
+                self._retry(conn, op)
+
+    def _retry(self, conn, op):
+        try:
+            with conn:
+                op(conn)
+            return
+        except Exception as e:
+            if op.rows is None or len(op.rows) == 1:
+                op.error = e
+                self._write_failed(e)
+                return
+        for row in op.rows:
+            try:
+                with conn:
+                    conn.execute(op.sql, row)
+            except Exception as e:
+                op.error = e
+                self._write_failed(e, row)
+
+    def _write_failed(self, error, row=None):
+        self.write_errors += 1
+        detail = f"{error!r}" if row is None else f"{error!r} row={row!r}"
+        print(f"❌ 数据库写入失败: {detail}")
+        self.metrics.event("db.write_error", error=detail)
+
+    # 影响图表的表：任何写入都会递增 data_versions 中对应的计数器
+    VERSIONED_TABLES = ("github_stats", "model_context_stats")
+
+    def create_tables(self, conn):
+        cursor = conn.cursor()
         # 存储 GitHub 工具数量快照
         cursor.execute('''
             CREATE TABLE IF NOT EXISTS github_stats (
@@ -29,43 +217,521 @@ class DBManager:
                 downloads INTEGER
             )
         ''')
-        self.conn.commit()
+        # Glama 采集任务账本：每个仓库的状态、尝试次数与最近一次结果
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS glama_ledger (
+                repo TEXT PRIMARY KEY,
+                status TEXT,
+                attempts INTEGER DEFAULT 0,
+                tool_count INTEGER,
+                created_at TEXT,
+                last_error TEXT,
+                first_seen TEXT,
+                updated_at TEXT
+            )
+        ''')
+        # GitHub 仓库元数据缓存 (创建日期 / stars / 是否归档)
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS repo_metadata (
+                repo TEXT PRIMARY KEY,
+                created_at TEXT,
+                stars INTEGER,
+                archived INTEGER,
+                fetched_at TEXT
+            )
+        ''')
+        # HF 模型修订版本：sha / lastModified 未变化时沿用上次解析出的 context length (可能为空)
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS model_revisions (
+                model_id TEXT PRIMARY KEY,
+                sha TEXT,
+                last_modified TEXT,
+                context_length INTEGER,
+                checked_at TEXT
+            )
+        ''')
+        # 采集批次：每次运行一条记录，观测数据按 run_id 追加而不是覆盖
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS collection_runs (
+                run_id INTEGER PRIMARY KEY AUTOINCREMENT,
+                source TEXT,
+                started_at TEXT,
+                finished_at TEXT,
+                dirty_from TEXT
+            )
+        ''')
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS repo_observations (
+                run_id INTEGER,
+                repo TEXT,
+                created_at TEXT,
+                tool_count INTEGER,
+                observed_at TEXT,
+                PRIMARY KEY (run_id, repo)
+            )
+        ''')
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS model_observations (
+                run_id INTEGER,
+                model_id TEXT,
+                created_at TEXT,
+                context_length INTEGER,
+                downloads INTEGER,
+                PRIMARY KEY (run_id, model_id)
+            )
+        ''')
+        # 增量聚合状态：每个仓库最近一次观测，以及按创建日期汇总的 (非累计) 工具数 / 仓库数
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS repo_latest (
+                repo TEXT PRIMARY KEY,
+                created_at TEXT,
+                tool_count INTEGER,
+                run_id INTEGER
+            )
+        ''')
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS tools_daily (
+                date TEXT PRIMARY KEY,
+                tool_sum INTEGER,
+                server_count INTEGER
+            )
+        ''')
+        # 绘图相关表的数据版本计数器：由触发器在每次写入时递增，读取数据版本只需查这一张小表
+        # epoch 在建表时随机生成，删库重建后版本号不会与旧缓存撞上
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS data_versions (
+                name TEXT PRIMARY KEY,
+                epoch TEXT,
+                version INTEGER
+            )
+        ''')
+        for table in self.VERSIONED_TABLES:
+            cursor.execute("INSERT OR IGNORE INTO data_versions VALUES (?, lower(hex(randomblob(8))), 0)", (table,))
+            for event in ("INSERT", "UPDATE", "DELETE"):
+                cursor.execute(f'''
+                    CREATE TRIGGER IF NOT EXISTS bump_{table}_{event.lower()} AFTER {event} ON {table}
+                    BEGIN UPDATE data_versions SET version = version + 1 WHERE name = '{table}'; END
+                ''')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_repo_obs_repo ON repo_observations (repo, run_id)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_model_obs_model ON model_observations (model_id, run_id)')
+        # 查询层所需的索引 (github_stats 的主键已覆盖按 date 的范围查询)
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_github_stats_topic ON github_stats (topic, date)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_model_created_at ON model_context_stats (created_at)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_model_downloads ON model_context_stats (downloads)')
+        conn.commit()
 
     def save_github_data(self, data_list):
-        cursor = self.conn.cursor()
-        cursor.executemany(
-            'INSERT OR REPLACE INTO github_stats VALUES (?, ?, ?)',
-            data_list
-        )
-        self.conn.commit()
+        self._write_many('INSERT OR REPLACE INTO github_stats VALUES (?, ?, ?)', data_list)
 
     def save_model_data(self, data_list):
-        cursor = self.conn.cursor()
-        cursor.executemany(
-            'INSERT OR REPLACE INTO model_context_stats VALUES (?, ?, ?, ?)',
-            data_list
-        )
-        self.conn.commit()
+        self._write_many('INSERT OR REPLACE INTO model_context_stats VALUES (?, ?, ?, ?)', data_list)
 
     def get_github_data(self):
-        return pd.read_sql("SELECT * FROM github_stats", self.conn)
+        return pd.read_sql("SELECT * FROM github_stats", self._reader())
 
     def get_model_data(self):
-        return pd.read_sql("SELECT * FROM model_context_stats", self.conn)
+        return pd.read_sql("SELECT * FROM model_context_stats", self._reader())
+
+    # ==========================================
+    # 类型化读取
+    # ==========================================
+    DATE_COLUMNS = ("date", "created_at")
+    CATEGORY_COLUMNS = ("topic",)
+    STRING_COLUMNS = ("model_id", "repo")
+
+    def read_typed(self, sql, params=(), chunksize=DB_READ_CHUNK):
+        """
+        分批读取并在读取时完成类型转换：
+        - date / created_at   -> datetime64 (读取时解析，下游无需再 pd.to_datetime)
+        - topic               -> category (多批之间用 union_categoricals 合并)
+        - model_id / repo     -> string[pyarrow] (未安装 pyarrow 时为 string)
+        - 整数列               -> 可容纳数据的最小整数类型
+
+        每行内存预算 (不含索引)：
+        - github_stats:        ~13 B  (datetime 8 + category 编码 1 + int32 4)，原先 ~80 B
+        - model_context_stats: ~25 B + model_id 长度 (datetime 8 + int32 4 + int32/int64 4~8 + 字符串偏移 4)，
+                               原先 ~100 B + model_id 长度
+        """
+        with self.metrics.span("db.read"):
+            return self._read_typed(sql, params, chunksize)
+
+    def _read_typed(self, sql, params, chunksize):
+        chunks = []
+        for chunk in pd.read_sql(sql, self._reader(), params=params, chunksize=chunksize):
+            chunks.append(self._compact(chunk))
+        if not chunks:
+            return self._compact(pd.read_sql(sql, self._reader(), params=params))
+        categories = {
+            col: union_categoricals([c[col] for c in chunks])
+            for col in self.CATEGORY_COLUMNS if col in chunks[0]
+        }
+        df = pd.concat(chunks, ignore_index=True)
+        for col, values in categories.items():
+            df[col] = pd.Categorical(values)
+        return df
+
+    def _compact(self, df):
+        for col in df.columns:
+            if col in self.DATE_COLUMNS:
+                df[col] = pd.to_datetime(df[col])
+            elif col in self.CATEGORY_COLUMNS:
+                df[col] = df[col].astype("category")
+            elif col in self.STRING_COLUMNS:
+                df[col] = df[col].astype(_STRING_DTYPE)
+            elif pd.api.types.is_integer_dtype(df[col]):
+                df[col] = pd.to_numeric(df[col], downcast="integer")
+        return df
+
+    def load_github_stats(self, chunksize=DB_READ_CHUNK):
+        return self.read_typed("SELECT date, topic, repo_count FROM github_stats", chunksize=chunksize)
+
+    def load_model_stats(self, chunksize=DB_READ_CHUNK):
+        return self.read_typed(
+            "SELECT model_id, created_at, context_length, downloads FROM model_context_stats", chunksize=chunksize
+        )
+
+    def data_version(self):
+        """
+        绘图相关表的数据版本：读取触发器维护的计数器，不扫描数据表
+        (PRAGMA data_version 只在同一连接存活期间有效，不能跨进程持久使用)
+        """
+        rows = self._reader().execute('SELECT name, epoch, version FROM data_versions ORDER BY name').fetchall()
+        return "-".join(f"{name}:{epoch}:{version}" for name, epoch, version in rows)
+
+    # ==========================================
+    # 查询层：过滤 / 聚合 / Top-N 下推到 SQLite
+    # ==========================================
+    def _where(self, clauses):
+        """clauses: list of (sql 片段, 参数列表)，用 AND 连接"""
+        parts, params = [], []
+        for sql, values in clauses:
+            parts.append(sql)
+            params.extend(values)
+        return (" WHERE " + " AND ".join(parts)) if parts else "", params
+
+    def _github_filters(self, start, end, topics):
+        clauses = []
+        if start is not None:
+            clauses.append(("date >= ?", [str(start)[:10]]))
+        if end is not None:
+            clauses.append(("date <= ?", [str(end)[:10]]))
+        if topics:
+            clauses.append((f"topic IN ({','.join('?' * len(topics))})", list(topics)))
+        return self._where(clauses)
+
+    def query_github_stats(self, start=None, end=None, topics=None):
+        """按日期区间 / Topic 过滤后的原始行 (date, topic, repo_count)"""
+        where, params = self._github_filters(start, end, topics)
+        return self.read_typed(f"SELECT date, topic, repo_count FROM github_stats{where} ORDER BY date", params)
+
+    def date_bounds(self):
+        """两张绘图表的最早 / 最晚日期与模型数，返回 (start, end, model_count)"""
+        cursor = self._reader().cursor()
+        gh_min, gh_max = cursor.execute('SELECT MIN(date), MAX(date) FROM github_stats').fetchone()
+        m_min, m_max, count = cursor.execute(
+            'SELECT MIN(created_at), MAX(created_at), COUNT(*) FROM model_context_stats'
+        ).fetchone()
+        starts = [d for d in (gh_min, m_min) if d]
+        ends = [d for d in (gh_max, m_max) if d]
+        return (min(starts)[:10] if starts else None), (max(ends)[:10] if ends else None), count
+
+    def query_tools_series(self, start=None, end=None, topics=None):
+        """按日期汇总所有 (或指定) Topic 的数量，结果列为 date, repo_count"""
+        where, params = self._github_filters(start, end, topics)
+        return self.read_typed(
+            f"SELECT date, SUM(repo_count) AS repo_count FROM github_stats{where} GROUP BY date ORDER BY date", params
+        )
+
+    def query_models(self, start=None, end=None, min_context=None, max_context=None, kind=None, top_n=None):
+        """
+        kind: None = 全部, "milestone" = 手动里程碑 (downloads = -1), "hf" = 有下载量的爬取模型 (downloads > 0),
+              "crawled" = 全部爬取的模型 (downloads != -1，包括下载量为 0 的)
+        top_n: 按下载量倒序只取前 N 个
+        """
+        clauses = []
+        if start is not None:
+            clauses.append(("created_at >= ?", [str(start)[:10]]))
+        if end is not None:
+            clauses.append(("created_at <= ?", [str(end)[:10]]))
+        if min_context is not None:
+            clauses.append(("context_length >= ?", [min_context]))
+        if max_context is not None:
+            clauses.append(("context_length <= ?", [max_context]))
+        if kind == "milestone":
+            clauses.append(("downloads = -1", []))
+        elif kind == "hf":
+            clauses.append(("downloads > 0", []))
+        elif kind == "crawled":
+            clauses.append(("downloads != -1", []))
+        where, params = self._where(clauses)
+        sql = f"SELECT model_id, created_at, context_length, downloads FROM model_context_stats{where}"
+        if top_n is not None:
+            sql += " ORDER BY downloads DESC LIMIT ?"
+            params.append(int(top_n))
+        return self.read_typed(sql, params)
     
     def save_milestones(self, milestones):
         """
         保存手动定义的里程碑数据
         milestones: list of tuples (name, date, context)
         """
-        cursor = self.conn.cursor()
         # 我们复用 model_context_stats 表，但把 downloads 设为 -1 以标记为手动数据
         data_to_insert = [
             (name, date, context, -1) 
             for name, date, context in milestones
         ]
-        cursor.executemany(
-            'INSERT OR REPLACE INTO model_context_stats VALUES (?, ?, ?, ?)',
-            data_to_insert
+        self._write_many('INSERT OR REPLACE INTO model_context_stats VALUES (?, ?, ?, ?)', data_to_insert)
+
+    # ==========================================
+    # Glama 任务账本 (断点续爬)
+    # ==========================================
+    def sync_ledger(self, repos):
+        """把最新的仓库列表登记进账本，已存在的条目保持原状态；曾经下架 (delisted) 又重新出现的仓库重新排队"""
+        now = datetime.now().isoformat(timespec='seconds')
+        self._write_many('''
+            INSERT INTO glama_ledger (repo, status, attempts, first_seen) VALUES (?, 'pending', 0, ?)
+            ON CONFLICT(repo) DO UPDATE SET status = 'pending', attempts = 0 WHERE status = 'delisted'
+        ''', [(repo, now) for repo in repos])
+
+    def get_pending_repos(self, stale_days, max_attempts, listed=None):
+        """
+        需要(重新)采集的仓库：未采集、失败且未超过重试上限、或结果已过期
+        listed 为本次列表中的仓库：已从列表中移除的仓库不再采集 (finish_run 会把它们撤回)；
+        为空时不过滤 (与 finish_run 一致，列表获取失败不代表所有仓库都已下架)
+        已数完工具、只差创建日期的 counted 仓库不在其中，由第二阶段单独重试
+        """
+        stale_before = (datetime.now() - timedelta(days=stale_days)).isoformat(timespec='seconds')
+        cursor = self._reader().cursor()
+        cursor.execute('''
+            SELECT repo FROM glama_ledger
+            WHERE status = 'pending'
+               OR (status = 'failed' AND attempts < ?)
+               OR (status IN ('done', 'missing') AND updated_at < ?)
+            ORDER BY repo
+        ''', (max_attempts, stale_before))
+        repos = [row[0] for row in cursor.fetchall()]
+        if listed:
+            listed = set(listed)
+            repos = [repo for repo in repos if repo in listed]
+        return repos
+
+    def record_repo_result(self, repo, status, tool_count=None, created_at=None, error=None):
+        """
+        单个仓库采集完立即提交写入，由写线程合并落盘
+        attempts 记录连续失败次数：带 error 的结果加一，不带 error 的 (done / counted) 清零
+        """
+        now = datetime.now().isoformat(timespec='seconds')
+        self._write('''
+            UPDATE glama_ledger
+            SET status = ?, attempts = CASE WHEN ? IS NULL THEN 0 ELSE attempts + 1 END,
+                tool_count = COALESCE(?, tool_count), created_at = COALESCE(?, created_at),
+                last_error = ?, updated_at = ?
+            WHERE repo = ?
+        ''', (status, error, tool_count, created_at, error, now, repo))
+
+    def get_ledger_tool_counts(self, status, max_attempts=None, listed=None):
+        """
+        {repo: tool_count}，例如取出所有已数完工具、等待解析创建日期的仓库
+        max_attempts: 只取连续失败次数未到上限的；listed: 只取本次列表中的仓库 (为空时不过滤)
+        """
+        cursor = self._reader().cursor()
+        if max_attempts is None:
+            cursor.execute("SELECT repo, tool_count FROM glama_ledger WHERE status = ?", (status,))
+        else:
+            cursor.execute("SELECT repo, tool_count FROM glama_ledger WHERE status = ? AND attempts < ?",
+                           (status, max_attempts))
+        counts = dict(cursor.fetchall())
+        if listed:
+            listed = set(listed)
+            counts = {repo: count for repo, count in counts.items() if repo in listed}
+        return counts
+
+    # ==========================================
+    # GitHub 仓库元数据缓存
+    # ==========================================
+    def get_repo_metadata(self, repos, max_age_days):
+        fresh_after = (datetime.now() - timedelta(days=max_age_days)).isoformat(timespec='seconds')
+        cursor = self._reader().cursor()
+        results = {}
+        # SQLite 单条语句的参数数量有限，分批查询
+        for i in range(0, len(repos), 500):
+            batch = repos[i:i + 500]
+            placeholders = ",".join("?" * len(batch))
+            cursor.execute(
+                f"SELECT repo, created_at, stars, archived FROM repo_metadata "
+                f"WHERE fetched_at >= ? AND repo IN ({placeholders})",
+                [fresh_after, *batch]
+            )
+            for repo, created_at, stars, archived in cursor.fetchall():
+                results[repo] = {"created_at": created_at, "stars": stars, "archived": bool(archived)}
+        return results
+
+    def save_repo_metadata(self, data_list):
+        """data_list: list of tuples (repo, created_at, stars, archived)"""
+        now = datetime.now().isoformat(timespec='seconds')
+        self._write_many(
+            'INSERT OR REPLACE INTO repo_metadata VALUES (?, ?, ?, ?, ?)',
+            [(*row, now) for row in data_list]
         )
-        self.conn.commit()
\ No newline at end of file
+
+    def get_model_revisions(self, model_ids):
+        """返回 {model_id: {"sha", "last_modified", "context_length"}}"""
+        cursor = self._reader().cursor()
+        results = {}
+        for i in range(0, len(model_ids), 500):
+            batch = model_ids[i:i + 500]
+            placeholders = ",".join("?" * len(batch))
+            cursor.execute(
+                f"SELECT model_id, sha, last_modified, context_length FROM model_revisions "
+                f"WHERE model_id IN ({placeholders})",
+                batch
+            )
+            for model_id, sha, last_modified, context_length in cursor.fetchall():
+                results[model_id] = {"sha": sha, "last_modified": last_modified, "context_length": context_length}
+        return results
+
+    def save_model_revisions(self, data_list):
+        """data_list: list of tuples (model_id, sha, last_modified, context_length)"""
+        now = datetime.now().isoformat(timespec='seconds')
+        self._write_many(
+            'INSERT OR REPLACE INTO model_revisions VALUES (?, ?, ?, ?, ?)',
+            [(*row, now) for row in data_list]
+        )
+
+    # ==========================================
+    # 追加式观测数据与增量聚合
+    # ==========================================
+    def start_run(self, source):
+        """登记一次采集批次，返回 run_id"""
+        now = datetime.now().isoformat(timespec='seconds')
+        holder = {}
+        def op(conn):
+            cur = conn.execute('INSERT INTO collection_runs (source, started_at) VALUES (?, ?)', (source, now))
+            holder["run_id"] = cur.lastrowid
+        self._submit(op, wait=True)
+        return holder["run_id"]
+
+    def record_repo_observation(self, run_id, repo, created_at, tool_count):
+        """
+        追加一条仓库观测，并只根据它相对该仓库上一次观测的变化量更新 tools_daily
+        同时记下受影响的最早日期，finish_run 时只重算该日期之后的累计值
+        """
+        now = datetime.now().isoformat(timespec='seconds')
+        def op(conn):
+            conn.execute('INSERT OR REPLACE INTO repo_observations VALUES (?, ?, ?, ?, ?)',
+                         (run_id, repo, created_at, tool_count, now))
+            self._apply_repo_delta(conn, run_id, repo, (created_at, tool_count))
+        self._submit(op)
+
+    def _apply_repo_delta(self, conn, run_id, repo, new):
+        """
+        把仓库从上一次观测 (repo_latest) 改为 new = (created_at, tool_count)，new 为 None 表示撤回该仓库
+        tools_daily 中先减去旧值再加上新值，两者相同时不做任何事
+        """
+        old = conn.execute('SELECT created_at, tool_count FROM repo_latest WHERE repo = ?', (repo,)).fetchone()
+        if old == new:
+            return
+        if old:
+            conn.execute('UPDATE tools_daily SET tool_sum = tool_sum - ?, server_count = server_count - 1 WHERE date = ?',
+                         (old[1], old[0]))
+        if new:
+            conn.execute('''
+                INSERT INTO tools_daily (date, tool_sum, server_count) VALUES (?, ?, 1)
+                ON CONFLICT(date) DO UPDATE SET tool_sum = tool_sum + excluded.tool_sum, server_count = server_count + 1
+            ''', new)
+            conn.execute('INSERT OR REPLACE INTO repo_latest VALUES (?, ?, ?, ?)', (repo, *new, run_id))
+        else:
+            conn.execute('DELETE FROM repo_latest WHERE repo = ?', (repo,))
+        dirty = min(d for d in (old and old[0], new and new[0]) if d)
+        conn.execute('''
+            UPDATE collection_runs SET dirty_from = CASE
+                WHEN dirty_from IS NULL OR dirty_from > ? THEN ? ELSE dirty_from END
+            WHERE run_id = ?
+        ''', (dirty, dirty, run_id))
+
+    def _retract_absent_repos(self, conn, run_id, listed):
+        """
+        撤回不应再计入总数的仓库：Glama 页面已不存在 (missing)，或不在本次的仓库列表中
+        后者在账本中标记为 delisted，之后不再补录或重爬，重新出现在列表中时 sync_ledger 会把它恢复为 pending
+        """
+        absent = [row[0] for row in conn.execute('''
+            SELECT l.repo FROM repo_latest l JOIN glama_ledger g ON g.repo = l.repo WHERE g.status = 'missing'
+        ''')]
+        if listed:
+            conn.execute('CREATE TEMP TABLE IF NOT EXISTS listed_repos (repo TEXT PRIMARY KEY)')
+            conn.execute('DELETE FROM listed_repos')
+            conn.executemany('INSERT OR IGNORE INTO listed_repos VALUES (?)', [(repo,) for repo in listed])
+            delisted = [row[0] for row in conn.execute(
+                'SELECT repo FROM repo_latest WHERE repo NOT IN (SELECT repo FROM listed_repos)'
+            )]
+            conn.executemany("UPDATE glama_ledger SET status = 'delisted' WHERE repo = ?", [(r,) for r in delisted])
+            absent += delisted
+        for repo in set(absent):
+            self._apply_repo_delta(conn, run_id, repo, None)
+        return len(set(absent))
+
+    def record_model_observations(self, run_id, data_list):
+        """data_list: list of tuples (model_id, created_at, context_length, downloads)"""
+        self._write_many('INSERT OR REPLACE INTO model_observations VALUES (?, ?, ?, ?, ?)',
+                         [(run_id, *row) for row in data_list])
+
+    def seed_repo_latest(self, run_id):
+        """首次启用观测表时，把账本里已完成但尚无观测的仓库补录进来"""
+        cursor = self._reader().cursor()
+        cursor.execute('''
+            SELECT repo, created_at, tool_count FROM glama_ledger
+            WHERE status = 'done' AND created_at IS NOT NULL
+              AND repo NOT IN (SELECT repo FROM repo_latest)
+        ''')
+        rows = cursor.fetchall()
+        for repo, created_at, tool_count in rows:
+            self.record_repo_observation(run_id, repo, created_at, tool_count)
+        return len(rows)
+
+    def finish_run(self, run_id, listed=None):
+        """
+        结束批次并增量刷新 github_stats 中的累计曲线：
+        dirty_from 之前的累计值直接取已有结果，只重算 dirty_from 之后的日期
+        listed: 本次采集到的完整仓库列表 (Glama)，不在其中的仓库会从总数中撤回；为空时不按列表撤回
+        (列表获取失败时不能把所有仓库都当作下架)；页面已不存在的 missing 仓库总是撤回
+        返回撤回的仓库数
+        """
+        now = datetime.now().isoformat(timespec='seconds')
+        holder = {}
+        def op(conn):
+            conn.execute('UPDATE collection_runs SET finished_at = ? WHERE run_id = ?', (now, run_id))
+            holder["retracted"] = self._retract_absent_repos(conn, run_id, listed)
+            row = conn.execute('SELECT dirty_from FROM collection_runs WHERE run_id = ?', (run_id,)).fetchone()
+            dirty_from = row[0] if row else None
+            if dirty_from is None:
+                return
+            for topic, column in (("Available Skills (Tools)", "tool_sum"), ("MCP Servers", "server_count")):
+                prev = conn.execute(
+                    'SELECT repo_count FROM github_stats WHERE topic = ? AND date < ? ORDER BY date DESC LIMIT 1',
+                    (topic, dirty_from)
+                ).fetchone()
+                total = prev[0] if prev else 0
+                conn.execute('DELETE FROM github_stats WHERE topic = ? AND date >= ?', (topic, dirty_from))
+                rows = []
+                for date, value in conn.execute(
+                    f'SELECT date, {column} FROM tools_daily WHERE date >= ? AND server_count > 0 ORDER BY date',
+                    (dirty_from,)
+                ):
+                    total += value
+                    rows.append((date, topic, total))
+                conn.executemany('INSERT OR REPLACE INTO github_stats VALUES (?, ?, ?)', rows)
+            conn.execute('DELETE FROM tools_daily WHERE server_count <= 0')
+        self._submit(op, wait=True)
+        return holder["retracted"]
+
+    def get_repo_history(self, repo=None):
+        """各批次观测到的工具数量，可用于分析工具数随时间的变化"""
+        sql = '''
+            SELECT o.run_id, r.started_at, o.repo, o.created_at, o.tool_count
+            FROM repo_observations o JOIN collection_runs r ON r.run_id = o.run_id
+        '''
+        params = []
+        if repo:
+            sql += " WHERE o.repo = ?"
+            params.append(repo)
+        return pd.read_sql(sql + " ORDER BY o.repo, o.run_id", self._reader(), params=params)
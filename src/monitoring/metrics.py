@@ -0,0 +1,114 @@
+import atexit
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from urllib.parse import urlparse
+from config.settings import METRICS_ENABLED, METRICS_DB_PATH, METRICS_FLUSH_SIZE
+
+
+class Metrics:
+    """
+    轻量指标记录器：
+    - request: 每个 HTTP 请求的 host / 状态码 / 延迟 / 字节数 / 是否命中缓存 / 重试次数
+    - span:    阶段耗时 (采集阶段、数据库提交等)，count 记录处理条数
+    - event:   被吞掉的异常等离散事件
+    记录只追加到内存缓冲，攒够一批后写入 metrics 表；分位数等汇总由 metrics_report.py 从表中计算
+    """
+    def __init__(self, path=METRICS_DB_PATH, flush_size=METRICS_FLUSH_SIZE, enabled=METRICS_ENABLED):
+        self.path = path
+        self.flush_size = flush_size
+        self.enabled = enabled
+        self.run_id = time.strftime("%Y%m%d-%H%M%S-") + uuid.uuid4().hex[:6]
+        self._buffer = []
+        self._lock = threading.Lock()
+        self._conn = None
+        if enabled:
+            atexit.register(self.flush)
+
+    def _connection(self):
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode = WAL")
+            self._conn.execute('''
+                CREATE TABLE IF NOT EXISTS metrics (
+                    run_id TEXT,
+                    ts REAL,
+                    kind TEXT,
+                    name TEXT,
+                    status INTEGER,
+                    seconds REAL,
+                    bytes INTEGER,
+                    cache_hit INTEGER,
+                    retries INTEGER,
+                    count INTEGER,
+                    error TEXT
+                )
+            ''')
+            self._conn.execute('CREATE INDEX IF NOT EXISTS idx_metrics_run ON metrics (run_id, kind, name)')
+        return self._conn
+
+    def _record(self, kind, name, status=None, seconds=0.0, nbytes=None, cache_hit=None, retries=None,
+                count=None, error=None):
+        if not self.enabled:
+            return
+        row = (self.run_id, time.time(), kind, name, status, seconds, nbytes, cache_hit, retries, count, error)
+        with self._lock:
+            self._buffer.append(row)
+            if len(self._buffer) >= self.flush_size:
+                self._write()
+
+    def _write(self):
+        rows, self._buffer = self._buffer, []
+        if not rows:
+            return
+        try:
+            with self._connection() as conn:
+                conn.executemany('INSERT INTO metrics VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)', rows)
+        except sqlite3.Error as e:
+            print(f"⚠️ 指标写入失败: {e}")
+
+    def flush(self):
+        with self._lock:
+            self._write()
+
+    # ------------------------------------------
+    # 对外接口
+    # ------------------------------------------
+    def record_request(self, url_or_host, status, seconds, nbytes=None, cache_hit=False, retries=0, error=None):
+        host = urlparse(url_or_host).netloc or url_or_host
+        self._record("request", host, status, seconds, nbytes, int(cache_hit), retries, error=error)
+
+    def event(self, name, error=None):
+        self._record("event", name, error=error)
+
+    @contextmanager
+    def span(self, name, count=None):
+        """
+        with metrics.span("hf.resolve", count=len(chunk)): ...
+        块内抛出的异常会记录到 error 后继续向外抛出
+        """
+        start = time.perf_counter()
+        error = None
+        try:
+            yield
+        except Exception as e:
+            error = repr(e)
+            raise
+        finally:
+            self._record("span", name, seconds=time.perf_counter() - start, count=count, error=error)
+
+
+_default_metrics = None
+_default_metrics_lock = threading.Lock()
+
+def get_metrics():
+    """进程内共享的指标记录器，采集器、调度器、缓存与 DBManager 都写入它"""
+    global _default_metrics
+    with _default_metrics_lock:
+        if _default_metrics is None:
+            _default_metrics = Metrics()
+    return _default_metrics
@@ -0,0 +1,87 @@
+import os
+import sqlite3
+import pandas as pd
+from config.settings import METRICS_DB_PATH
+
+
+def load_metrics(path=METRICS_DB_PATH, run_id=None):
+    """读取某次运行的指标 (run_id 为 None 时取最近一次)"""
+    if not os.path.exists(path):
+        return None, pd.DataFrame()
+    conn = sqlite3.connect(path)
+    try:
+        if run_id is None:
+            row = conn.execute('SELECT run_id FROM metrics ORDER BY ts DESC LIMIT 1').fetchone()
+            if row is None:
+                return None, pd.DataFrame()
+            run_id = row[0]
+        df = pd.read_sql('SELECT * FROM metrics WHERE run_id = ?', conn, params=(run_id,))
+    finally:
+        conn.close()
+    return run_id, df
+
+
+def request_table(df):
+    """
+    按 host 汇总请求：网络请求次数、缓存命中次数、错误、重试、流量与延迟分位数 (毫秒)
+    缓存命中 (HTTPCache 直接由本地副本应答) 耗时接近 0，单独计数，不参与延迟与流量统计
+    """
+    req = df[df['kind'] == 'request']
+    if req.empty:
+        return pd.DataFrame()
+    hits = req[req['cache_hit'] == 1]
+    g = req[req['cache_hit'] != 1].groupby('name')
+    table = pd.DataFrame({
+        "requests": g.size(),
+        "cache_hits": hits.groupby('name').size(),
+        "errors": g['status'].apply(lambda s: int((s.isna() | (s >= 400)).sum())),
+        "retries": g['retries'].sum(),
+        "MB": (g['bytes'].sum() / 2**20).round(2),
+        "p50_ms": (g['seconds'].quantile(0.50) * 1000).round(1),
+        "p95_ms": (g['seconds'].quantile(0.95) * 1000).round(1),
+        "p99_ms": (g['seconds'].quantile(0.99) * 1000).round(1),
+        "total_s": g['seconds'].sum().round(2),
+    })
+    counts = ["requests", "cache_hits", "errors", "retries"]
+    table[counts] = table[counts].fillna(0).astype(int)
+    return table.sort_values("total_s", ascending=False)
+
+
+def span_table(df):
+    """按阶段汇总耗时，按总耗时排序，看时间花在哪里"""
+    spans = df[df['kind'] == 'span']
+    if spans.empty:
+        return pd.DataFrame()
+    g = spans.groupby('name')
+    table = pd.DataFrame({
+        "calls": g.size(),
+        "items": g['count'].sum().astype(int),
+        "total_s": g['seconds'].sum().round(3),
+        "p50_s": g['seconds'].quantile(0.50).round(4),
+        "p95_s": g['seconds'].quantile(0.95).round(4),
+        "max_s": g['seconds'].max().round(4),
+        "failed": g['error'].count(),
+    })
+    return table.sort_values("total_s", ascending=False)
+
+
+def event_table(df):
+    events = df[df['kind'] == 'event']
+    if events.empty:
+        return pd.DataFrame()
+    g = events.groupby('name')
+    return pd.DataFrame({"count": g.size(), "last_error": g['error'].last()}).sort_values("count", ascending=False)
+
+
+def print_report(path=METRICS_DB_PATH, run_id=None):
+    run_id, df = load_metrics(path, run_id)
+    if df.empty:
+        print(f"❌ {path} 中没有指标记录，请先运行一次采集。")
+        return
+    duration = df['ts'].max() - df['ts'].min()
+    print(f"📈 Run {run_id} ({len(df)} 条记录，跨度 {duration:.1f}s)")
+    with pd.option_context("display.width", 160, "display.max_columns", 20, "display.max_colwidth", 80):
+        for title, table in (("按域名的请求", request_table(df)), ("阶段耗时", span_table(df)), ("事件", event_table(df))):
+            if not table.empty:
+                print(f"\n--- {title} ---")
+                print(table.to_string())
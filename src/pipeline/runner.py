@@ -0,0 +1,157 @@
+import queue
+import threading
+import time
+import traceback
+
+_current = threading.local()
+
+
+class StageCancelled(BaseException):
+    """
+    阶段已超时后仍在运行时抛出
+    与 asyncio.CancelledError 一样继承 BaseException，不会被采集器中宽泛的 except Exception 吞掉
+    """
+
+
+def check_cancelled():
+    """在阶段线程中调用：所在阶段已超时则抛出 StageCancelled；不在流水线阶段中时不做任何事"""
+    event = getattr(_current, "cancelled", None)
+    if event is not None and event.is_set():
+        raise StageCancelled(f"stage '{_current.stage}' timed out")
+
+
+class Stage:
+    """
+    流水线中的一个阶段
+    func(inputs) 接收 {依赖阶段名: 返回值}，返回值会传给下游阶段
+    - deps: 依赖的阶段
+    - timeout: 超时秒数，超时视为失败。线程无法被强制结束，取消是协作式的：
+      超时后下游照常启动，而超时阶段的线程下一次调用 check_cancelled() (DBManager 每次写入前都会调用)
+      时抛出 StageCancelled 退出，不会再与下游同时写库；尚未走到检查点的网络请求等仍会执行完
+    - allow_failed_deps: 依赖失败时是否仍然执行 (例如采集失败时用库里已有的数据继续处理)
+    - main_thread: 在主线程中内联执行 (matplotlib 等 GUI 相关操作)；执行期间无法检查超时，因此不能设置 timeout
+    """
+    def __init__(self, name, func, deps=(), timeout=None, allow_failed_deps=False, main_thread=False):
+        if main_thread and timeout:
+            raise ValueError(f"Stage '{name}' runs on the main thread and cannot have a timeout")
+        self.name = name
+        self.func = func
+        self.deps = tuple(deps)
+        self.timeout = timeout
+        self.allow_failed_deps = allow_failed_deps
+        self.main_thread = main_thread
+
+
+class PipelineRunner:
+    """
+    按依赖关系 (DAG) 执行各阶段：互不依赖的阶段并发运行，依赖一旦就绪下游立即启动
+    某个阶段失败 / 超时只会跳过依赖它的下游，其他分支照常执行
+    超时的阶段会被标记为取消 (见 Stage.timeout)，之后它的数据库写入会抛出 StageCancelled
+    """
+    def __init__(self, stages):
+        self.stages = {stage.name: stage for stage in stages}
+        for stage in stages:
+            for dep in stage.deps:
+                if dep not in self.stages:
+                    raise ValueError(f"Stage '{stage.name}' depends on unknown stage '{dep}'")
+
+    def select(self, only=None):
+        """
+        only 指定的阶段及其全部下游，再补上这些下游所需的非源头上游 (处理阶段需要重新计算)
+        未选中的源头阶段 (采集器) 视为已完成，数据已在库中
+        """
+        if not only:
+            return set(self.stages)
+        unknown = set(only) - set(self.stages)
+        if unknown:
+            raise ValueError(f"Unknown stages: {', '.join(sorted(unknown))}")
+        selected = set(only)
+        changed = True
+        while changed:
+            changed = False
+            for stage in self.stages.values():
+                if stage.name not in selected and selected.intersection(stage.deps):
+                    selected.add(stage.name)
+                    changed = True
+        changed = True
+        while changed:
+            changed = False
+            for name in list(selected):
+                for dep in self.stages[name].deps:
+                    if dep not in selected and self.stages[dep].deps:
+                        selected.add(dep)
+                        changed = True
+        return selected
+
+    def run(self, only=None):
+        selected = self.select(only)
+        results = {}
+        outputs = {}
+        running = {}
+        cancel_events = {}
+        done_queue = queue.Queue()
+
+        def worker(stage, inputs):
+            _current.stage, _current.cancelled = stage.name, cancel_events[stage.name]
+            try:
+                done_queue.put((stage.name, "ok", stage.func(inputs), None))
+            except StageCancelled as e:
+                print(f"[pipeline] {stage.name}: cancelled after timeout ({e})")
+                done_queue.put((stage.name, "cancelled", None, repr(e)))
+            except Exception as e:
+                traceback.print_exc()
+                done_queue.put((stage.name, "failed", None, repr(e)))
+            finally:
+                _current.cancelled = None
+
+        def finish(name, status, output, error):
+            started = running.pop(name)
+            results[name] = {"status": status, "seconds": round(time.time() - started, 2), "error": error}
+            if status == "ok":
+                outputs[name] = output
+            print(f"[pipeline] {name}: {status} ({results[name]['seconds']}s)")
+
+        while True:
+            # 启动所有依赖已就绪的阶段
+            for name in sorted(selected):
+                if name in results or name in running:
+                    continue
+                stage = self.stages[name]
+                pending = [d for d in stage.deps if d in selected and d not in results]
+                if pending:
+                    continue
+                failed = [d for d in stage.deps if d in selected and results[d]["status"] != "ok"]
+                if failed and not stage.allow_failed_deps:
+                    results[name] = {"status": "skipped", "seconds": 0.0, "error": f"upstream failed: {', '.join(failed)}"}
+                    print(f"[pipeline] {name}: skipped ({results[name]['error']})")
+                    continue
+                inputs = {d: outputs.get(d) for d in stage.deps}
+                running[name] = time.time()
+                cancel_events[name] = threading.Event()
+                print(f"[pipeline] {name}: started")
+                if stage.main_thread:
+                    worker(stage, inputs)
+                else:
+                    threading.Thread(target=worker, args=(stage, inputs), name=f"stage-{name}", daemon=True).start()
+
+            if not running:
+                if all(name in results for name in selected):
+                    break
+                continue
+
+            # 等待任意阶段结束，同时检查超时
+            try:
+                name, status, output, error = done_queue.get(timeout=0.5)
+                if name in running:
+                    finish(name, status, output, error)
+            except queue.Empty:
+                pass
+            now = time.time()
+            for name, started in list(running.items()):
+                timeout = self.stages[name].timeout
+                if timeout and now - started > timeout:
+                    # 线程无法强制结束：标记取消后不再等待它，它下一次写库时会抛出 StageCancelled
+                    cancel_events[name].set()
+                    finish(name, "timeout", None, f"exceeded {timeout}s")
+
+        return results
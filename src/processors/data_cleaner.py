@@ -1,34 +1,52 @@
 import pandas as pd
+from config.settings import PLOT_MAX_BACKGROUND_MODELS
+
+# 有效 Context 范围：超出的视为脏数据
+MIN_CONTEXT = 1
+MAX_CONTEXT = 10000000
 
 class DataProcessor:
     def __init__(self, db_manager):
         self.db = db_manager
 
-    def get_plotting_data(self):
+    def get_plotting_data(self, start=None, end=None, topics=None, **model_filters):
+        df_tools = self.get_tools_data(start, end, topics)
+        df_scatter = self.get_models_data(start, end, **model_filters)
+        # 这里的 df_scatter 包含了具体的模型名称和长度，用于画点和标签
+        # df_tools 用于画另一条曲线
+        return df_tools, df_scatter
+
+    def get_tools_data(self, start=None, end=None, topics=None):
         # --- 1. GitHub 数据 (Tools) ---
-        df_gh = self.db.get_github_data()
-        df_gh['date'] = pd.to_datetime(df_gh['date'])
-        # 累加所有 Topic 的数量
-        df_tools = df_gh.groupby('date')['repo_count'].sum().reset_index().sort_values('date')
+        # 累加所有 Topic 的数量 (在 SQLite 中完成 GROUP BY)
+        # 日期在读取时已解析为 datetime64
+        df_tools = self.db.query_tools_series(start, end, topics)
+        return df_tools
 
+    def get_models_data(self, start=None, end=None, min_context=MIN_CONTEXT, max_context=MAX_CONTEXT,
+                        top_n=50, max_background=PLOT_MAX_BACKGROUND_MODELS):
+        """
+        top_n: 额外叠加的 HF 下载量前 N 名
+        max_background: 背景模型最多取下载量前 N 个 (None 表示全部)；里程碑始终全部保留
+        """
         # --- 2. Model 数据 (Context) ---
-        df_model = self.db.get_model_data()
-        df_model['created_at'] = pd.to_datetime(df_model['created_at'])
-        
-        # 过滤无效数据
-        df_model = df_model[(df_model['context_length'] > 0) & (df_model['context_length'] <= 10000000)]
+        # 过滤无效数据 (在 SQL 中完成)
+        filters = dict(start=start, end=end, min_context=min_context, max_context=max_context)
+        if max_background is None:
+            df_model = self.db.query_models(**filters)
+        else:
+            df_model = pd.concat([
+                self.db.query_models(kind="milestone", **filters),
+                self.db.query_models(kind="crawled", top_n=max_background, **filters),
+            ], ignore_index=True)
         
         # 区分：关键里程碑 vs 普通爬取数据
         # 约定：downloads = -1 是我们在 milestones.py 里定义的关键模型
-        df_milestones = df_model[df_model['downloads'] == -1].copy()
         
         # 另外提取 HF 上下载量最高的前 50 个模型作为背景散点（避免图太乱）
-        df_hf_top = df_model[df_model['downloads'] > 0].sort_values('downloads', ascending=False).head(50)
+        df_hf_top = self.db.query_models(kind="hf", top_n=top_n, **filters)
         
         # 合并用于画散点
         # df_scatter = pd.concat([df_milestones, df_hf_top])
         df_scatter = pd.concat([df_model, df_hf_top])
-
-        # 这里的 df_scatter 包含了具体的模型名称和长度，用于画点和标签
-        # df_tools 用于画另一条曲线
-        return df_tools, df_scatter
\ No newline at end of file
+        return df_scatter
@@ -0,0 +1,68 @@
+import glob
+import hashlib
+import os
+from config.settings import FRAME_CACHE_DIR
+
+try:
+    import pyarrow as pa
+except ImportError: # pyarrow 为可选依赖，缺失时缓存自动关闭
+    pa = None
+
+
+def read_arrow(path):
+    """内存映射读取 Arrow IPC 文件 (多个进程可同时只读打开)"""
+    with pa.memory_map(path) as source:
+        table = pa.ipc.open_file(source).read_all()
+    return table.to_pandas()
+
+
+class FrameCache:
+    """
+    处理后数据帧的磁盘缓存 (Arrow IPC 文件，读取时内存映射)
+    缓存键 = 帧名 + 数据库数据版本；数据库一变，旧缓存自动失效并被清理
+    """
+    def __init__(self, db_manager, cache_dir=FRAME_CACHE_DIR):
+        self.db = db_manager
+        self.cache_dir = cache_dir
+        self.enabled = pa is not None
+        self._version = None
+        if self.enabled:
+            os.makedirs(cache_dir, exist_ok=True)
+
+    @property
+    def version(self):
+        if self._version is None:
+            self._version = hashlib.sha1(self.db.data_version().encode()).hexdigest()[:16]
+        return self._version
+
+    def path(self, name):
+        return os.path.join(self.cache_dir, f"{name}-{self.version}.arrow")
+
+    def load(self, name):
+        if not self.enabled or not os.path.exists(self.path(name)):
+            return None
+        return read_arrow(self.path(name))
+
+    def save(self, name, df):
+        if not self.enabled:
+            return
+        # 列名必须是字符串 (透视表的列是 Topic 名)
+        table = pa.Table.from_pandas(df.rename(columns=str), preserve_index=True)
+        tmp_path = self.path(name) + ".tmp"
+        with pa.OSFile(tmp_path, "wb") as sink:
+            with pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+        os.replace(tmp_path, self.path(name))
+        # 清理同名帧的旧版本
+        for old in glob.glob(os.path.join(self.cache_dir, f"{name}-*.arrow")):
+            if old != self.path(name):
+                os.remove(old)
+
+    def get_or_build(self, name, builder):
+        """命中时直接返回缓存的帧，否则调用 builder() 生成并写入缓存"""
+        df = self.load(name)
+        if df is not None:
+            return df
+        df = builder()
+        self.save(name, df)
+        return df
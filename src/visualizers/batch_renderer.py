@@ -0,0 +1,131 @@
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import pandas as pd
+from config.settings import BATCH_OUTPUT_DIR, BATCH_WORKERS
+from src.processors.frame_cache import FrameCache, read_arrow
+from src.visualizers.render_cache import RenderCache
+
+# 工作进程内的只读数据帧，由 _init_worker 从内存映射的 Arrow 文件加载一次
+_frames = {}
+# 工作进程内的渲染缓存：只暂存 manifest 记录，随结果返回给主进程统一写入
+_render_cache = None
+
+
+def default_specs(df_gh, top_topics=5):
+    """全部 Topic + 数量最多的几个 Topic，各自输出 log / linear 的 PNG 与 HTML"""
+    topics = df_gh.groupby('topic', observed=True)['repo_count'].max().nlargest(top_topics).index
+    specs = []
+    for topic in [None, *topics]:
+        for yscale in ("log", "linear"):
+            for fmt in ("png", "html"):
+                slug = "all" if topic is None else "".join(c if c.isalnum() else "_" for c in str(topic))
+                specs.append({"name": f"{slug}-{yscale}", "topics": None if topic is None else [topic],
+                              "yscale": yscale, "format": fmt})
+    return specs
+
+
+def _init_worker(paths):
+    global _render_cache
+    _render_cache = RenderCache(defer_manifest=True)
+    import matplotlib
+    matplotlib.use("Agg") # 无界面后端，工作进程中不弹窗
+    for name, path in paths.items():
+        _frames[name] = read_arrow(path)
+
+
+def _select(spec):
+    df_gh = _frames["github"]
+    df_models = _frames["models"]
+    if spec.get("topics"):
+        df_gh = df_gh[df_gh['topic'].isin(spec["topics"])]
+    if spec.get("start"):
+        df_gh = df_gh[df_gh['date'] >= pd.Timestamp(spec["start"])]
+        df_models = df_models[df_models['created_at'] >= pd.Timestamp(spec["start"])]
+    if spec.get("end"):
+        df_gh = df_gh[df_gh['date'] <= pd.Timestamp(spec["end"])]
+        df_models = df_models[df_models['created_at'] <= pd.Timestamp(spec["end"])]
+    return df_gh.reset_index(drop=True), df_models.reset_index(drop=True)
+
+
+def render_spec(spec, output_dir):
+    """在工作进程中渲染一个图表规格，返回耗时等信息及渲染缓存的 manifest 记录"""
+    start = time.perf_counter()
+    fmt = spec.get("format", "png")
+    yscale = spec.get("yscale", "log")
+    path = os.path.join(output_dir, f"{spec['name']}.{fmt}")
+    df_gh, df_models = _select(spec)
+
+    if fmt == "html":
+        from src.visualizers.interactive_visualizer import InteractiveChartGenerator
+        hit = InteractiveChartGenerator(_render_cache).generate_html_chart(df_gh, df_models, output_path=path, yscale=yscale)
+    else:
+        from src.visualizers.chart_generator import ChartGenerator
+        df_tools = df_gh.groupby('date', as_index=False)['repo_count'].sum()
+        hit = ChartGenerator(_render_cache).generate_comparison_chart(df_tools, df_models, save_path=path, yscale=yscale, show=False)
+    return {"path": path, "seconds": time.perf_counter() - start, "bytes": os.path.getsize(path), "cached": hit,
+            "records": _render_cache.take_records()}
+
+
+class BatchRenderer:
+    """
+    批量渲染图表变体：数据在主进程中只读取一次并写成 Arrow 文件，
+    各工作进程内存映射只读加载，按规格 (Topic / 时间窗口 / log-linear / png-svg-html) 并行渲染
+    """
+    def __init__(self, db_manager, output_dir=BATCH_OUTPUT_DIR, workers=BATCH_WORKERS):
+        self.db = db_manager
+        self.output_dir = output_dir
+        self.workers = workers or os.cpu_count()
+        os.makedirs(output_dir, exist_ok=True)
+
+    def prepare_data(self):
+        from src.processors.data_cleaner import DataProcessor
+        cache = FrameCache(self.db)
+        if not cache.enabled:
+            raise RuntimeError("批量渲染需要 pyarrow 在进程间共享数据")
+        df_gh = cache.get_or_build("batch_github", self.db.load_github_stats)
+        cache.get_or_build("batch_models", DataProcessor(self.db).get_models_data)
+        return df_gh, {"github": cache.path("batch_github"), "models": cache.path("batch_models")}
+
+    def run(self, specs=None):
+        df_gh, paths = self.prepare_data()
+        specs = specs or default_specs(df_gh)
+        print(f"🖼️ 批量渲染 {len(specs)} 个图表，{self.workers} 个进程...")
+
+        start = time.perf_counter()
+        results = {}
+        records = []
+        # spawn：不继承主进程中的数据库写线程等状态
+        context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=self.workers, mp_context=context,
+                                 initializer=_init_worker, initargs=(paths,)) as pool:
+            futures = {pool.submit(render_spec, spec, self.output_dir): spec["name"] + "." + spec.get("format", "png")
+                       for spec in specs}
+            for future in as_completed(futures):
+                name = futures[future]
+                try:
+                    result = future.result()
+                    records.extend(result.pop("records"))
+                    results[name] = {"status": "ok", **result}
+                except Exception as e:
+                    results[name] = {"status": "failed", "error": repr(e)}
+                    print(f"❌ {name} 渲染失败: {e}")
+        wall = time.perf_counter() - start
+        # manifest 只由主进程写一次：工作进程各自读-改-写会互相覆盖
+        RenderCache().apply_records(records)
+
+        self.print_summary(results, wall)
+        return results
+
+    def print_summary(self, results, wall):
+        print("\n--- Batch Render Summary ---")
+        for name in sorted(results):
+            r = results[name]
+            if r["status"] == "ok":
+                flag = "cached" if r["cached"] else "rendered"
+                print(f"{name:<40} {flag:<9} {r['seconds']:>7.2f}s {r['bytes'] / 1024:>9.0f} KB")
+            else:
+                print(f"{name:<40} failed    {r['error']}")
+        busy = sum(r.get("seconds", 0) for r in results.values())
+        print(f"总计 {len(results)} 个图表：墙钟 {wall:.2f}s，累计渲染 {busy:.2f}s (并行加速 {busy / wall if wall else 0:.1f}x)")
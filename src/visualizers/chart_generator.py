@@ -1,18 +1,12 @@
-import matplotlib.pyplot as plt
-import seaborn as sns
 import pandas as pd
 import numpy as np
-import matplotlib.dates as mdates
-from matplotlib.ticker import FuncFormatter, LogLocator
-from adjustText import adjust_text # 关键库
-import os
+from src.visualizers.render_cache import RenderCache
+from src.visualizers.label_placer import LabelPlacer
+from config.settings import LABEL_MAX_COUNT, LABEL_TIME_BUDGET
 
 class ChartGenerator:
-    def __init__(self):
-        os.makedirs("output", exist_ok=True)
-        # 设置更专业的绘图风格
-        plt.style.use('seaborn-v0_8-whitegrid')
-        plt.rcParams['font.family'] = 'sans-serif'
+    def __init__(self, render_cache=None):
+        self.render_cache = render_cache or RenderCache()
 
     def format_tokens(self, x, pos):
         """格式化 Token 数量显示"""
@@ -22,7 +16,39 @@ class ChartGenerator:
             return f'{int(x/1000)}k'
         return int(x)
 
-    def generate_comparison_chart(self, df_tools, df_models):
+    def generate_comparison_chart(self, df_tools, df_models, save_path="output/detailed_model_comparison.png",
+                                  yscale="log", show=True):
+        """
+        save_path 的扩展名决定输出格式 (png / svg)；yscale: 上下文轴 log / linear
+        show=False 时不弹窗，画完立即关闭图像 (批量渲染)；返回是否命中渲染缓存
+        """
+        # 先查渲染缓存 (只需要数据帧指纹)，命中时不导入任何绘图库
+        options = {"chart": "comparison", "figsize": (16, 10), "dpi": 300, "style": "seaborn-v0_8-whitegrid",
+                   "max_labels": LABEL_MAX_COUNT, "label_time_budget": LABEL_TIME_BUDGET, "yscale": yscale}
+        hit = self.render_cache.render(
+            save_path, [df_tools, df_models], options,
+            lambda path: self._draw_comparison_chart(df_tools, df_models, path, yscale)
+        )
+        if hit:
+            print(f"♻️ 输入未变化，复用已渲染的图表: {save_path}")
+            return hit
+        print(f"✨ 高级图表已生成: {save_path}")
+        import matplotlib.pyplot as plt
+        if show:
+            plt.show()
+        plt.close("all")
+        return hit
+
+    def _draw_comparison_chart(self, df_tools, df_models, save_path, yscale="log"):
+        # matplotlib / seaborn 导入耗时超过 1 秒：只在缓存未命中、真正绘图时才导入
+        import matplotlib.pyplot as plt
+        import matplotlib.dates as mdates
+        import seaborn as sns
+        from matplotlib.ticker import FuncFormatter, LogLocator
+        # 设置更专业的绘图风格
+        plt.style.use('seaborn-v0_8-whitegrid')
+        plt.rcParams['font.family'] = 'sans-serif'
+
         fig, ax1 = plt.subplots(figsize=(16, 10))
 
         # 颜色定义
@@ -50,32 +76,14 @@ class ChartGenerator:
 
         # 趋势线 (为了看清走势，连接里程碑的最大值)
         # 提取外包络线
-        max_line = df_models.set_index('created_at').resample('Q')['context_length'].max().fillna(method='ffill')
+        max_line = df_models.set_index('created_at').resample('QE')['context_length'].max().ffill()
         ax1.plot(max_line.index, max_line.values, color=color_ctx, alpha=0.2, linestyle='--', linewidth=2)
 
-        # 设置对数坐标
-        ax1.set_yscale('log')
+        # 设置对数坐标 (默认)
+        ax1.set_yscale(yscale)
         ax1.yaxis.set_major_formatter(FuncFormatter(self.format_tokens))
         ax1.tick_params(axis='y', labelcolor=color_ctx, labelsize=12)
 
-        # --- 智能添加标签 (最重要的一步) ---
-        texts = []
-        for _, row in milestones.iterrows():
-            # 格式化日期以便绘图
-            texts.append(ax1.text(row['created_at'], row['context_length'], 
-                                  f"  {row['model_id']} ({self.format_tokens(row['context_length'],0)})", 
-                                  fontsize=10, color='#1b5e20', fontweight='bold'))
-        for _, row in others.iterrows():
-            # 格式化日期以便绘图
-            texts.append(ax1.text(row['created_at'], row['context_length'], 
-                                  f"  {row['model_id']} ({self.format_tokens(row['context_length'],0)})", 
-                                  fontsize=10, color='#1b5e20', fontweight='bold'))
-        # 使用 adjust_text 自动避让重叠
-        # arrowprops=dict(arrowstyle='-', color='gray', alpha=0.5) 会自动画出指向线
-        adjust_text(texts, ax=ax1, 
-                    arrowprops=dict(arrowstyle='->', color='gray', lw=0.5),
-                    time_lim=1) # 限制计算时间，防止卡死
-
         # ==========================================
         # 2. 绘制 Tools/Skills Growth (曲线) - 右轴
         # ==========================================
@@ -111,7 +119,16 @@ class ChartGenerator:
         plt.xticks(rotation=45)
 
         plt.tight_layout()
-        save_path = "output/detailed_model_comparison.png"
-        plt.savefig(save_path, dpi=300)
-        print(f"✨ 高级图表已生成: {save_path}")
-        plt.show()
\ No newline at end of file
+
+        # --- 智能添加标签 (最重要的一步) ---
+        # 在布局确定后放置：里程碑优先，其余按下载量，只放不重叠的标签，受数量 / 时间预算约束
+        labeled = pd.concat([milestones, others])
+        labels = [f"{model_id} ({self.format_tokens(ctx, 0)})"
+                  for model_id, ctx in zip(labeled['model_id'], labeled['context_length'])]
+        priorities = np.where(labeled['downloads'] == -1, np.inf, labeled['downloads'])
+        placer = LabelPlacer(ax1)
+        placer.place(mdates.date2num(labeled['created_at']), labeled['context_length'].to_numpy(),
+                     labels, priorities, fontsize=10, color='#1b5e20', fontweight='bold')
+        print(f"🏷️ 已放置 {placer.stats['placed']}/{len(labels)} 个标签")
+
+        plt.savefig(save_path, dpi=300)
\ No newline at end of file
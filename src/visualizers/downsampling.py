@@ -0,0 +1,73 @@
+import numpy as np
+import pandas as pd
+
+
+def lttb_indices(x, y, threshold):
+    """
+    Largest-Triangle-Three-Buckets 降采样，返回保留点的下标 (升序)
+    保留首尾点；每个桶中选与前一个选中点、下一个桶均值构成三角形面积最大的点，峰谷形状得以保留
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    edges = np.linspace(1, n - 1, threshold - 1).astype(int)
+    selected = np.empty(threshold, dtype=int)
+    selected[0] = 0
+    selected[-1] = n - 1
+    a = 0
+    for i in range(threshold - 2):
+        start, end = edges[i], edges[i + 1]
+        # 下一个桶的均值作为三角形第三个顶点 (最后一个桶用末尾点)
+        if i + 2 < len(edges):
+            next_start, next_end = edges[i + 1], edges[i + 2]
+            avg_x = x[next_start:next_end].mean()
+            avg_y = y[next_start:next_end].mean()
+        else:
+            avg_x, avg_y = x[-1], y[-1]
+        area = np.abs((x[a] - avg_x) * (y[start:end] - y[a]) - (x[a] - x[start:end]) * (avg_y - y[a]))
+        a = start + int(np.argmax(area))
+        selected[i + 1] = a
+    return selected
+
+
+def density_bins(df, x_col, y_col, x_bins, y_bins, log_y=False, weight_col=None, label_col=None):
+    """
+    将散点按二维网格分箱：每个非空格子输出一行
+    x / y: 格内点的均值 (log_y 时 y 为几何均值)；count: 点数
+    label: 格内 weight_col 最大的那个点的 label_col (例如下载量最高的模型)
+    """
+    if df.empty:
+        return pd.DataFrame(columns=["x", "y", "count", "label"])
+    x = df[x_col]
+    x_num = x.to_numpy().astype("datetime64[ns]").astype(np.int64) if pd.api.types.is_datetime64_any_dtype(x) else x.to_numpy(dtype=float)
+    y_num = df[y_col].to_numpy(dtype=float)
+    if log_y:
+        y_num = np.log10(y_num)
+
+    def bin_ids(values, bins):
+        lo, hi = values.min(), values.max()
+        if hi == lo:
+            return np.zeros(len(values), dtype=np.int64)
+        return np.minimum(((values - lo) / (hi - lo) * bins).astype(np.int64), bins - 1)
+
+    cell = bin_ids(x_num, x_bins) * y_bins + bin_ids(y_num, y_bins)
+    work = pd.DataFrame({"cell": cell, "x": x_num, "y": y_num})
+    grouped = work.groupby("cell", sort=True)
+    out = grouped.agg(x=("x", "mean"), y=("y", "mean"), count=("x", "size"))
+
+    if label_col is not None:
+        order = df[weight_col].to_numpy() if weight_col else np.zeros(len(df))
+        top = pd.DataFrame({"cell": cell, "w": order, "label": df[label_col].to_numpy()})
+        top = top.sort_values("w", ascending=False, kind="stable").drop_duplicates("cell").set_index("cell")
+        out["label"] = top["label"]
+    else:
+        out["label"] = None
+
+    if pd.api.types.is_datetime64_any_dtype(x):
+        out["x"] = pd.to_datetime(out["x"].round().astype(np.int64), unit="ns")
+    if log_y:
+        out["y"] = 10 ** out["y"]
+    return out.reset_index(drop=True)
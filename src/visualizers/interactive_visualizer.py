@@ -1,11 +1,55 @@
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
 import pandas as pd
+import numpy as np
 import os
+from src.visualizers.render_cache import RenderCache
+from src.visualizers.downsampling import lttb_indices, density_bins
+from config.settings import (WEBGL_POINT_THRESHOLD, SCATTER_BIN_THRESHOLD, SCATTER_BINS, GROWTH_LINE_MAX_POINTS,
+                             HTML_EXPORT_MODE)
+
+# Hover 中展示的细分 Topic 数量
+TOP_CONTRIBUTORS = 5
+
+# compact 导出时与 HTML 放在同一目录的 plotly.js
+PLOTLYJS_FILENAME = "plotly.min.js"
+
+# compact 导出的 Hover 模板：固定文字只写一次，逐点数据放在 customdata 里
+MODEL_HOVER_TEMPLATE = (
+    "<b>🤖 %{customdata[0]}</b><br>"
+    "📅 Release: %{x|%Y-%m-%d}<br>"
+    "🧠 Context: <b>%{customdata[1]}</b> Tokens<br>"
+    "🏷️ Type: {type}<extra></extra>"
+)
+TOOLS_HOVER_TEMPLATE = (
+    "<b>📅 %{x|%Y-%m-%d}</b><br>"
+    "<b>Total Ecosystem Repos: %{y:d}</b><br>"
+    "------------------<br>"
+    "%{customdata}<extra></extra>"
+)
+
+def ensure_plotlyjs(directory):
+    """
+    确保 directory 下有与当前 plotly 版本一致的 plotly.min.js，返回是否重新写入
+    (plotly 的 include_plotlyjs="directory" 在文件已存在时不会覆盖，版本可能过旧)
+    """
+    from plotly.offline import get_plotlyjs, get_plotlyjs_version
+    path = os.path.join(directory, PLOTLYJS_FILENAME)
+    if os.path.exists(path):
+        with open(path, encoding="utf-8", errors="replace") as f:
+            head = f.read(256)
+        if f"plotly.js v{get_plotlyjs_version()}" in head:
+            return False
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(get_plotlyjs())
+    os.replace(tmp_path, path)
+    return True
+
 
 class InteractiveChartGenerator:
-    def __init__(self):
-        os.makedirs("output", exist_ok=True)
+    def __init__(self, render_cache=None):
+        self.render_cache = render_cache or RenderCache()
 
     def format_tokens(self, x):
         """将数值格式化为 1M, 128k 等"""
@@ -15,41 +59,165 @@ class InteractiveChartGenerator:
             return f'{int(x/1000)}k'
         return str(x)
 
-    def prepare_tools_data_with_details(self, df_gh):
+    def pivot_tools(self, df_gh):
         """
-        处理工具数据：不仅计算总和，还准备 hover 时的细分详情
+        透视表：行=日期，列=Topic，值=数量，另加 Total 列
+        不修改传入的 df_gh：它随后还要参与渲染缓存的指纹计算
         """
-        # 1. 确保日期格式
-        df_gh['date'] = pd.to_datetime(df_gh['date'])
+        # 1. 确保日期格式 (类型化读取的数据已是 datetime64，这里不再转换)
+        if not pd.api.types.is_datetime64_any_dtype(df_gh['date']):
+            df_gh = df_gh.assign(date=pd.to_datetime(df_gh['date']))
         
         # 2. 透视表：行=日期，列=Topic，值=数量
-        df_pivot = df_gh.pivot_table(index='date', columns='topic', values='repo_count', aggfunc='sum').fillna(0)
+        df_pivot = df_gh.pivot_table(index='date', columns='topic', values='repo_count', aggfunc='sum',
+                                     observed=True).fillna(0)
         
         # 3. 计算总和
         df_pivot['Total'] = df_pivot.sum(axis=1)
+        return df_pivot
+
+    def prepare_tools_data_with_details(self, df_gh, df_pivot=None, header=True):
+        """
+        处理工具数据：不仅计算总和，还准备 hover 时的细分详情
+        df_pivot 可传入缓存的透视表，跳过重新透视
+        header=False 时只返回 Topic 细分部分 (日期与总数由 Hover 模板渲染)
+        """
+        if df_pivot is None:
+            df_pivot = self.pivot_tools(df_gh)
         
-        # 4. 构建 Hover 详情字符串
+        # 4. 构建 Hover 详情字符串 (整列批量拼接，不逐行 iterrows)
         # 格式: "Total: 100<br>LangChain: 60<br>AutoGen: 40"
-        hover_texts = []
-        for index, row in df_pivot.iterrows():
-            # 按数量降序排列，取前5个展示，避免列表太长
-            top_contributors = row.drop('Total').sort_values(ascending=False).head(5)
-            
-            detail_str = f"<b>📅 {index.strftime('%Y-%m-%d')}</b><br>"
-            detail_str += f"<b>Total Ecosystem Repos: {int(row['Total'])}</b><br>"
-            detail_str += "------------------<br>"
-            
-            for topic, count in top_contributors.items():
-                if count > 0:
-                    detail_str += f"{topic}: {int(count)}<br>"
-            
-            hover_texts.append(detail_str)
+        topics = df_pivot.columns.drop('Total')
+        if header:
+            hover = (
+                "<b>📅 " + pd.Series(df_pivot.index.strftime('%Y-%m-%d'), dtype=object) + "</b><br>"
+                + "<b>Total Ecosystem Repos: " + pd.Series(df_pivot['Total'].to_numpy().astype(np.int64).astype(str), dtype=object) + "</b><br>"
+                + "------------------<br>"
+            )
+        else:
+            hover = pd.Series([""] * len(df_pivot), dtype=object)
+
+        # 按数量降序取每个日期的前 5 个 Topic，避免列表太长
+        values = df_pivot[topics].to_numpy()
+        k = min(TOP_CONTRIBUTORS, len(topics))
+        if k:
+            top_idx = np.argpartition(-values, k - 1, axis=1)[:, :k]
+            top_vals = np.take_along_axis(values, top_idx, axis=1)
+            order = np.argsort(-top_vals, axis=1, kind='stable')
+            top_idx = np.take_along_axis(top_idx, order, axis=1)
+            top_vals = np.take_along_axis(top_vals, order, axis=1)
+            names = np.asarray(topics.astype(str), dtype=object)
+            for j in range(k):
+                line = pd.Series(names[top_idx[:, j]]) + ": " + pd.Series(top_vals[:, j].astype(np.int64).astype(str), dtype=object) + "<br>"
+                hover += line.where(top_vals[:, j] > 0, "")
+
+        hover_texts = hover.tolist()
             
         return df_pivot.index, df_pivot['Total'], hover_texts
 
-    def generate_html_chart(self, df_gh, df_models):
-        """生成交互式 HTML 文件"""
-        
+    def context_labels(self, ctx):
+        """上下文长度的取值很少，对去重后的值格式化再映射回去"""
+        return ctx.map({v: self.format_tokens(v) for v in pd.unique(ctx)})
+
+    def model_hover_kwargs(self, df, model_type, hover=None):
+        """
+        模型轨迹的 Hover 参数：传入 hover 时逐点写完整文本 (standalone)
+        否则用 customdata + hovertemplate，每个点只存模型名与上下文标签 (compact)
+        """
+        if hover is not None:
+            return dict(hovertext=hover, hoverinfo='text')
+        customdata = np.column_stack([
+            df['model_id'].astype(str).to_numpy(dtype=object),
+            self.context_labels(df['context_length']).astype(str).to_numpy(dtype=object),
+        ]) if len(df) else None
+        return dict(customdata=customdata, hovertemplate=MODEL_HOVER_TEMPLATE.replace("{type}", model_type))
+
+    def axis_values(self, values, compact, dates=False):
+        """compact 导出时转成数值 numpy 数组，由 plotly 编码为 base64 typed array；日期用毫秒时间戳"""
+        if not compact:
+            return values
+        values = np.asarray(values)
+        if dates:
+            return values.astype("datetime64[ms]").astype(np.int64).astype(float)
+        return values.astype(float)
+
+    def model_hover_texts(self, df_models):
+        """批量生成每个模型的 Hover 文本，返回与 df_models 行一一对应的数组"""
+        downloads = df_models['downloads'].to_numpy()
+        model_type = np.where(downloads > 0, "HuggingFace Model",
+                              np.where(downloads == -1, "Closed", "Open Source"))
+        ctx_labels = self.context_labels(df_models['context_length'])
+        hover = (
+            "<b>🤖 " + df_models['model_id'].astype(str).astype(object) + "</b><br>"
+            + "📅 Release: " + df_models['created_at'].dt.strftime('%Y-%m-%d').astype(object) + "<br>"
+            + "🧠 Context: <b>" + ctx_labels.astype(str).astype(object) + "</b> Tokens<br>"
+            + "🏷️ Type: " + pd.Series(model_type, index=df_models.index, dtype=object)
+        )
+        return hover.to_numpy(dtype=object)
+
+    def scatter_class(self, n_points):
+        """点数超过阈值时改用 WebGL 轨迹，浏览器端不再为每个点创建 SVG 节点"""
+        return go.Scattergl if n_points > WEBGL_POINT_THRESHOLD else go.Scatter
+
+    def open_models_trace(self, milestones_open, hover=None, binned=False, compact=False):
+        """开源 / HF 模型轨迹；binned 时按密度分箱"""
+        style = dict(mode='markers', name='Open Source (Llama/Mistral)')
+        if not binned:
+            return self.scatter_class(len(milestones_open))(
+                x=self.axis_values(milestones_open['created_at'], compact, dates=True),
+                y=self.axis_values(milestones_open['context_length'], compact),
+                marker=dict(symbol='diamond', color='#2ca02c', size=12, line=dict(width=2, color='white')),
+                **self.model_hover_kwargs(milestones_open, "HuggingFace Model", hover),
+                **style
+            )
+
+        x_bins, y_bins = SCATTER_BINS
+        bins = density_bins(milestones_open, 'created_at', 'context_length', x_bins, y_bins,
+                            log_y=True, weight_col='downloads', label_col='model_id')
+        scale = np.sqrt(bins['count'].to_numpy() / bins['count'].max())
+        bin_hover = (
+            "<b>" + bins['count'].astype(str) + " models</b><br>"
+            + "📅 ~" + bins['x'].dt.strftime('%Y-%m') + "<br>"
+            + "🧠 Context: ~<b>" + bins['y'].map(self.format_tokens) + "</b> Tokens<br>"
+            + "⭐ Top: " + bins['label'].astype(str)
+        )
+        return go.Scattergl(
+            x=self.axis_values(bins['x'], compact, dates=True),
+            y=bins['y'],
+            marker=dict(symbol='diamond', color='#2ca02c', size=5 + 15 * scale, opacity=0.25 + 0.75 * scale),
+            hovertext=bin_hover.to_numpy(),
+            hoverinfo='text',
+            **style
+        )
+
+    def generate_html_chart(self, df_gh, df_models, df_pivot=None, export_mode=HTML_EXPORT_MODE,
+                            output_path="output/interactive_ecosystem_chart.html", yscale="log"):
+        """
+        生成交互式 HTML 文件 (输入与选项未变化时直接复用上次的产物)；返回是否命中渲染缓存
+        export_mode: compact (共享同目录的 plotly.min.js，坐标为二进制编码的数值数组；
+                     Hover 用模板，逐点只在 customdata 中保留模型名 / Topic 细分等字符串，它们仍以 JSON 写出)
+                     / standalone (单个自包含文件)
+        yscale: 上下文轴 log / linear
+        """
+        options = {"chart": "interactive", "height": 800, "template": "plotly_white", "export_mode": export_mode,
+                   "yscale": yscale,
+                   "webgl_threshold": WEBGL_POINT_THRESHOLD, "bin_threshold": SCATTER_BIN_THRESHOLD,
+                   "bins": SCATTER_BINS, "line_points": GROWTH_LINE_MAX_POINTS}
+        hit = self.render_cache.render(
+            output_path, [df_gh, df_models], options,
+            lambda path: self._build_html_chart(df_gh, df_models, df_pivot, path, export_mode == "compact", yscale)
+        )
+        if export_mode == "compact":
+            # plotly.min.js 不在缓存产物内：命中缓存时输出目录里可能没有它，或是旧版本 plotly 留下的
+            ensure_plotlyjs(os.path.dirname(output_path) or ".")
+        if hit:
+            print(f"♻️ 输入未变化，复用已生成的交互式图表: {output_path}")
+        else:
+            print(f"✨ 交互式图表已生成: {output_path}")
+        print("👉 请在浏览器中打开该文件查看。")
+        return hit
+
+    def _build_html_chart(self, df_gh, df_models, df_pivot, output_path, compact, yscale="log"):
         # --- 1. 创建双轴图表 ---
         fig = make_subplots(
             specs=[[{"secondary_y": True}]], # 启用双Y轴
@@ -60,88 +228,62 @@ class InteractiveChartGenerator:
         # 左轴：Context Window (散点图)
         # ==========================================================
         
-        # A. 分离数据
+        # A. 分离数据 (旧版的灰色背景轨迹与开源轨迹是同一批点，只画一次)
         milestones_closed = df_models[df_models['downloads'] == -1]
         milestones_open = df_models[df_models['downloads'] > 0]
-        background_models = df_models[df_models['downloads'] > 0]
-
-        # B. 辅助函数：生成模型 Hover 信息
-        def create_model_hover(row):
-            t = "Closed" if row['downloads'] == -1 else "Open Source"
-            if row['downloads'] > 0: t = "HuggingFace Model"
-            return (
-                f"<b>🤖 {row['model_id']}</b><br>"
-                f"📅 Release: {row['created_at'].strftime('%Y-%m-%d')}<br>"
-                f"🧠 Context: <b>{self.format_tokens(row['context_length'])}</b> Tokens<br>"
-                f"🏷️ Type: {t}"
-            )
 
-        # C. 绘制背景模型 (灰色小点)
-        fig.add_trace(
-            go.Scatter(
-                x=background_models['created_at'],
-                y=background_models['context_length'],
-                mode='markers',
-                name='Other Models',
-                marker=dict(color='gray', size=5, opacity=0.3),
-                text=[create_model_hover(r) for _, r in background_models.iterrows()],
-                hoverinfo='text'
-            ),
-            secondary_y=False
-        )
+        # B. 模型 Hover 信息：compact 导出用模板，否则整表只计算一次完整文本，各轨迹按掩码取用
+        closed_mask = (df_models['downloads'] == -1).to_numpy()
+        open_mask = (df_models['downloads'] > 0).to_numpy()
+        binned = len(milestones_open) > SCATTER_BIN_THRESHOLD
+        hover_closed = hover_open = None
+        if not compact:
+            hover = self.model_hover_texts(df_models[closed_mask] if binned else df_models)
+            hover_closed = hover if binned else hover[closed_mask]
+            hover_open = None if binned else hover[open_mask]
 
-        # D. 绘制闭源模型 (蓝色大圆点)
+        # C. 绘制闭源模型 (蓝色大圆点)
         fig.add_trace(
-            go.Scatter(
-                x=milestones_closed['created_at'],
-                y=milestones_closed['context_length'],
+            self.scatter_class(len(milestones_closed))(
+                x=self.axis_values(milestones_closed['created_at'], compact, dates=True),
+                y=self.axis_values(milestones_closed['context_length'], compact),
                 # mode='markers+text', # 显示文字
                 mode='markers', # 显示文字
                 name='Closed Source (GPT/Gemini)',
-                text=milestones_closed['model_id'], # 直接显示名字
-                textposition="top center",
                 marker=dict(color='#1f77b4', size=12, line=dict(width=2, color='white')),
-                textfont=dict(size=10, color='#1f77b4'),
-                hovertext=[create_model_hover(r) for _, r in milestones_closed.iterrows()],
-                hoverinfo='text'
+                **self.model_hover_kwargs(milestones_closed, "Closed", hover_closed)
             ),
             secondary_y=False
         )
 
-        # E. 绘制开源模型 (绿色菱形)
-        fig.add_trace(
-            go.Scatter(
-                x=milestones_open['created_at'],
-                y=milestones_open['context_length'],
-                # mode='markers+text',
-                mode='markers',
-                name='Open Source (Llama/Mistral)',
-                text=milestones_open['model_id'],
-                textposition="bottom center",
-                marker=dict(symbol='diamond', color='#2ca02c', size=12, line=dict(width=2, color='white')),
-                textfont=dict(size=10, color='#2ca02c'),
-                hovertext=[create_model_hover(r) for _, r in milestones_open.iterrows()],
-                hoverinfo='text'
-            ),
-            secondary_y=False
-        )
+        # D. 绘制开源模型 (绿色菱形)；点数过多时按密度分箱，点的大小 / 透明度表示格内模型数
+        fig.add_trace(self.open_models_trace(milestones_open, hover_open, binned, compact), secondary_y=False)
 
         # ==========================================================
         # 右轴：Tools Growth (折线图)
         # ==========================================================
         
-        # 准备带详情的数据
-        dates, total_counts, hover_details = self.prepare_tools_data_with_details(df_gh)
+        # 准备带详情的数据；日期过多时先用 LTTB 选出保留形状的点，只为这些点生成 Hover
+        if df_pivot is None:
+            df_pivot = self.pivot_tools(df_gh)
+        if len(df_pivot) > GROWTH_LINE_MAX_POINTS:
+            keep = lttb_indices(df_pivot.index.to_numpy().astype("datetime64[ns]").astype(np.int64),
+                                df_pivot['Total'].to_numpy(), GROWTH_LINE_MAX_POINTS)
+            df_pivot = df_pivot.iloc[keep]
+        dates, total_counts, hover_details = self.prepare_tools_data_with_details(df_gh, df_pivot, header=not compact)
+        if compact:
+            line_hover = dict(customdata=hover_details, hovertemplate=TOOLS_HOVER_TEMPLATE)
+        else:
+            line_hover = dict(hovertext=hover_details, hoverinfo='text') # 关键：这里放入了 LangChain 等细分数据
 
         fig.add_trace(
-            go.Scatter(
-                x=dates,
-                y=total_counts,
+            self.scatter_class(len(dates))(
+                x=self.axis_values(dates, compact, dates=True),
+                y=self.axis_values(total_counts, compact),
                 mode='lines',
                 name='AI Ecosystem Growth',
                 line=dict(color='#d62728', width=4), # 红色粗线
-                hovertext=hover_details, # 关键：这里放入了 LangChain 等细分数据
-                hoverinfo='text'
+                **line_hover
             ),
             secondary_y=True
         )
@@ -151,11 +293,11 @@ class InteractiveChartGenerator:
         # ==========================================================
         
         # 设置 Y 轴类型 (对数轴)
-        fig.update_yaxes(title_text="Context Window (Tokens)", type="log", secondary_y=False, showgrid=True, gridcolor='rgba(0,0,0,0.1)')
+        fig.update_yaxes(title_text="Context Window (Tokens)", type=yscale, secondary_y=False, showgrid=True, gridcolor='rgba(0,0,0,0.1)')
         fig.update_yaxes(title_text="Total Ecosystem Repos", type="linear", secondary_y=True, showgrid=False) # 工具数量可以用线性或对数，视增长爆发程度而定
 
-        # 设置 X 轴
-        fig.update_xaxes(title_text="Timeline", showgrid=True)
+        # 设置 X 轴 (compact 导出时日期是毫秒时间戳，需显式声明为日期轴)
+        fig.update_xaxes(title_text="Timeline", showgrid=True, type="date")
 
         # 整体布局
         fig.update_layout(
@@ -174,8 +316,5 @@ class InteractiveChartGenerator:
             font=dict(family="Arial, sans-serif")
         )
 
-        # 导出
-        output_path = "output/interactive_ecosystem_chart.html"
-        fig.write_html(output_path)
-        print(f"✨ 交互式图表已生成: {output_path}")
-        print("👉 请在浏览器中打开该文件查看。")
\ No newline at end of file
+        # 导出：compact 时 plotly.js 写成同目录的 plotly.min.js，所有图表共用且无需联网
+        fig.write_html(output_path, include_plotlyjs="directory" if compact else True)
\ No newline at end of file
@@ -0,0 +1,87 @@
+import time
+from collections import defaultdict
+import numpy as np
+from config.settings import LABEL_MAX_COUNT, LABEL_TIME_BUDGET, LABEL_GRID_PX
+
+# 候选位置：相对数据点的偏移 (单位: 点)，依次尝试 右 / 左 / 上 / 下 / 右上 / 右下
+CANDIDATE_OFFSETS = [(6, -4), (-6, -4), (0, 6), (0, -14), (6, 6), (6, -14)]
+
+
+class LabelPlacer:
+    """
+    带预算的标签放置：按优先级依次尝试几个候选位置，只放置与已放置标签不重叠的那些
+    已放置的标签框登记在均匀网格 (空间索引) 中，碰撞检测只查相邻格子，整体近似线性
+    超过标签数量或时间预算后停止，剩下的低优先级标签直接放弃
+    """
+    def __init__(self, ax, max_labels=LABEL_MAX_COUNT, time_budget=LABEL_TIME_BUDGET, cell_px=LABEL_GRID_PX):
+        self.ax = ax
+        self.max_labels = max_labels
+        self.time_budget = time_budget
+        self.cell_px = cell_px
+        self.grid = defaultdict(list)
+        self.stats = {"candidates": 0, "placed": 0, "collisions": 0, "budget_exhausted": False}
+
+    def _cells(self, box):
+        x0, y0, x1, y1 = box
+        for cx in range(int(x0 // self.cell_px), int(x1 // self.cell_px) + 1):
+            for cy in range(int(y0 // self.cell_px), int(y1 // self.cell_px) + 1):
+                yield cx, cy
+
+    def _collides(self, box):
+        x0, y0, x1, y1 = box
+        for cell in self._cells(box):
+            for bx0, by0, bx1, by1 in self.grid[cell]:
+                if x0 < bx1 and bx0 < x1 and y0 < by1 and by0 < y1:
+                    return True
+        return False
+
+    def _insert(self, box):
+        for cell in self._cells(box):
+            self.grid[cell].append(box)
+
+    def place(self, xs, ys, labels, priorities, **text_kwargs):
+        """
+        xs / ys: 数据坐标；priorities: 越大越优先
+        返回实际创建的 Text 对象列表
+        """
+        fontsize = text_kwargs.setdefault("fontsize", 10)
+        fig = self.ax.figure
+        px_per_pt = fig.dpi / 72.0
+        # 文本框尺寸按字符数估算，避免为每个候选标签真正测量文字
+        char_w = 0.6 * fontsize * px_per_pt
+        line_h = 1.2 * fontsize * px_per_pt
+
+        points = self.ax.transData.transform(np.column_stack([np.asarray(xs, dtype=float), np.asarray(ys, dtype=float)]))
+        bounds = self.ax.get_window_extent()
+        order = np.argsort(-np.asarray(priorities, dtype=float), kind="stable")
+
+        start = time.perf_counter()
+        placed = []
+        for i in order:
+            if len(placed) >= self.max_labels:
+                break
+            if time.perf_counter() - start > self.time_budget:
+                self.stats["budget_exhausted"] = True
+                break
+            px, py = points[i]
+            if not np.isfinite(px) or not np.isfinite(py):
+                continue
+            width = len(labels[i]) * char_w
+            for dx, dy in CANDIDATE_OFFSETS:
+                self.stats["candidates"] += 1
+                x0 = px + dx * px_per_pt - (width if dx < 0 else 0)
+                y0 = py + dy * px_per_pt
+                box = (x0, y0, x0 + width, y0 + line_h)
+                if box[0] < bounds.x0 or box[2] > bounds.x1 or box[1] < bounds.y0 or box[3] > bounds.y1:
+                    continue
+                if self._collides(box):
+                    self.stats["collisions"] += 1
+                    continue
+                self._insert(box)
+                placed.append(self.ax.annotate(
+                    labels[i], (xs[i], ys[i]), xytext=(dx, dy), textcoords="offset points",
+                    ha="right" if dx < 0 else "left", va="bottom", **text_kwargs
+                ))
+                break
+        self.stats["placed"] = len(placed)
+        return placed
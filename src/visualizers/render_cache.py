@@ -0,0 +1,176 @@
+import glob
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+from datetime import datetime
+from functools import lru_cache
+from importlib import metadata
+import pandas as pd
+import config.settings as settings
+from config.settings import (RENDER_CACHE_DIR, RENDER_MANIFEST_PATH, RENDER_CACHE_MAX_BYTES,
+                             RENDER_CACHE_MAX_AGE_DAYS)
+
+# 影响渲染结果的库，版本变化时缓存失效
+RENDER_LIBRARIES = ("pandas", "numpy", "matplotlib", "seaborn", "plotly")
+
+# 影响渲染结果的配置项，取值变化时缓存失效
+RENDER_SETTINGS = (
+    "WEBGL_POINT_THRESHOLD", "SCATTER_BIN_THRESHOLD", "SCATTER_BINS", "GROWTH_LINE_MAX_POINTS",
+    "HTML_EXPORT_MODE", "LABEL_MAX_COUNT", "LABEL_TIME_BUDGET", "LABEL_GRID_PX",
+)
+
+# 绘图代码：本包 (src/visualizers) 下的全部模块，包括图表生成器依赖的降采样 / 标签放置与缓存本身
+RENDER_CODE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def library_versions():
+    versions = {}
+    for name in RENDER_LIBRARIES:
+        try:
+            versions[name] = metadata.version(name)
+        except metadata.PackageNotFoundError:
+            versions[name] = None
+    return versions
+
+
+def render_settings():
+    return {name: getattr(settings, name, None) for name in RENDER_SETTINGS}
+
+
+@lru_cache(maxsize=None)
+def code_digest(paths):
+    """绘图代码的摘要 (每个进程计算一次)"""
+    h = hashlib.sha256()
+    for path in paths:
+        h.update(os.path.basename(path).encode())
+        with open(path, "rb") as f:
+            h.update(f.read())
+    return h.hexdigest()
+
+
+class RenderCache:
+    """
+    图表产物缓存：键 = 输入数据帧指纹 + 图表选项 + 渲染相关配置 + 库版本 + 绘图代码 (整个 visualizers 包)
+    命中时直接复制已有的 PNG / HTML；manifest 记录每个产物的命中次数与渲染耗时
+    defer_manifest=True 时不写 manifest，记录暂存在内存中，由 take_records() 取出后交给
+    apply_records() 统一写入 (批量渲染：各工作进程返回记录，主进程只写一次，避免多进程读-改-写互相覆盖)
+    缓存目录按最近使用时间淘汰：超过 max_age_days 未使用或总大小超过 max_bytes 时删除最旧的产物
+    """
+    def __init__(self, cache_dir=RENDER_CACHE_DIR, manifest_path=RENDER_MANIFEST_PATH,
+                 max_bytes=RENDER_CACHE_MAX_BYTES, max_age_days=RENDER_CACHE_MAX_AGE_DAYS, defer_manifest=False):
+        self.cache_dir = cache_dir
+        self.manifest_path = manifest_path
+        self.max_bytes = max_bytes
+        self.max_age_days = max_age_days
+        self.defer_manifest = defer_manifest
+        self._pending = []
+        self._lock = threading.Lock()
+
+    def fingerprint(self, frames, options, code_files=()):
+        """code_files: 本包以外、同样影响绘图结果的源文件"""
+        h = hashlib.sha256()
+        for df in frames:
+            h.update(json.dumps([list(map(str, df.columns)), list(map(str, df.dtypes))]).encode())
+            h.update(pd.util.hash_pandas_object(df, index=True).values.tobytes())
+        h.update(json.dumps(options, sort_keys=True, default=str).encode())
+        h.update(json.dumps(render_settings(), sort_keys=True, default=str).encode())
+        h.update(json.dumps(library_versions(), sort_keys=True).encode())
+        paths = sorted(glob.glob(os.path.join(RENDER_CODE_DIR, "*.py"))) + [os.path.abspath(p) for p in code_files]
+        h.update(code_digest(tuple(paths)).encode())
+        return h.hexdigest()[:24]
+
+    def render(self, output_path, frames, options, render_fn, code_files=()):
+        """
+        render_fn(output_path) 负责真正的绘图；返回 True 表示命中缓存
+        """
+        start = time.perf_counter()
+        key = self.fingerprint(frames, options, code_files)
+        artifact = os.path.join(self.cache_dir, key + os.path.splitext(output_path)[1])
+        # 目录在真正写入时才创建：只构造生成器 (例如基准测试) 不会在当前目录留下 output/
+        os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+
+        if os.path.exists(artifact):
+            shutil.copyfile(artifact, output_path)
+            # 以修改时间作为最近使用时间，淘汰时据此排序
+            os.utime(artifact)
+            self._record(output_path, key, hit=True, seconds=time.perf_counter() - start)
+            return True
+
+        os.makedirs(self.cache_dir, exist_ok=True)
+        render_fn(output_path)
+        shutil.copyfile(output_path, artifact)
+        self.evict()
+        self._record(output_path, key, hit=False, seconds=time.perf_counter() - start)
+        return False
+
+    def evict(self):
+        """删除超过 max_age_days 未使用的产物，再按最近使用时间从旧到新删除，直到总大小不超过 max_bytes"""
+        entries = []
+        for path in glob.glob(os.path.join(self.cache_dir, "*")):
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError: # 批量渲染时其他进程可能同时在淘汰
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        entries.sort()
+        total = sum(size for _, size, _ in entries)
+        expire_before = time.time() - self.max_age_days * 86400
+        removed = 0
+        for mtime, size, path in entries:
+            if mtime >= expire_before and total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+                removed += 1
+            except FileNotFoundError:
+                pass
+            total -= size
+        return removed
+
+    def _record(self, output_path, key, hit, seconds):
+        record = {"path": output_path, "key": key, "hit": hit, "seconds": round(seconds, 4),
+                  "at": datetime.now().isoformat(timespec="seconds")}
+        if self.defer_manifest:
+            with self._lock:
+                self._pending.append(record)
+        else:
+            self.apply_records([record])
+
+    def take_records(self):
+        """取出并清空暂存的记录 (defer_manifest=True 时)"""
+        with self._lock:
+            records, self._pending = self._pending, []
+        return records
+
+    def apply_records(self, records):
+        """把一批记录合并进 manifest，只读写一次文件"""
+        if not records:
+            return
+        with self._lock:
+            manifest = self.load_manifest()
+            for record in records:
+                entry = manifest.setdefault(record["path"], {"hits": 0, "renders": 0})
+                entry["key"] = record["key"]
+                if record["hit"]:
+                    entry["hits"] += 1
+                    entry["last_hit_at"] = record["at"]
+                    entry["last_hit_seconds"] = record["seconds"]
+                else:
+                    entry["renders"] += 1
+                    entry["last_render_at"] = record["at"]
+                    entry["last_render_seconds"] = record["seconds"]
+            # 先写临时文件再原子替换，读者不会看到写了一半的文件
+            os.makedirs(os.path.dirname(self.manifest_path) or ".", exist_ok=True)
+            tmp_path = f"{self.manifest_path}.{os.getpid()}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(manifest, f, indent=2, ensure_ascii=False)
+            os.replace(tmp_path, self.manifest_path)
+
+    def load_manifest(self):
+        if not os.path.exists(self.manifest_path):
+            return {}
+        with open(self.manifest_path, encoding="utf-8") as f:
+            return json.load(f)
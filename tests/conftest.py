@@ -0,0 +1,22 @@
+import os
+import sys
+import pytest
+
+# 项目代码以仓库根目录为导入根 (from src.xxx import ...)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.monitoring.metrics import Metrics
+from src.database.db_manager import DBManager
+
+
+@pytest.fixture
+def metrics():
+    """不落盘的指标记录器，避免测试写入 data/metrics.db"""
+    return Metrics(enabled=False)
+
+
+@pytest.fixture
+def db(tmp_path, metrics):
+    manager = DBManager(db_path=str(tmp_path / "ecosystem.db"), metrics=metrics)
+    yield manager
+    manager.close()
@@ -0,0 +1,19 @@
+import pytest
+from main import parse_args
+
+
+@pytest.mark.parametrize("argv", [["--only", "hf"], ["--only", "hf", "models"], ["run", "--only", "hf"]])
+def test_only_maps_to_run(argv):
+    args = parse_args(argv)
+    assert args.command == "run" and args.only[0] == "hf"
+
+
+def test_default_is_full_run():
+    args = parse_args([])
+    assert (args.command, args.only) == ("run", None)
+
+
+
+def test_only_rejected_for_other_commands():
+    with pytest.raises(SystemExit):
+        parse_args(["--only=hf", "collect"])
@@ -0,0 +1,38 @@
+import json
+import pytest
+from src.dashboard.server import DashboardServer
+
+
+@pytest.fixture
+def server(db):
+    db.save_github_data([("2024-01-01", "agents", 3), ("2024-01-02", "agents", 5)])
+    db.flush()
+    return DashboardServer(db, port=0)
+
+
+def call(server, path, **query):
+    status, _, body, _ = server.handle(path, {k: [v] for k, v in query.items()})
+    return status, json.loads(body)
+
+
+@pytest.mark.parametrize("points", ["inf", "-inf", "nan", "abc"])
+def test_bad_numeric_params_are_400(server, points):
+    status, body = call(server, "/api/tools", points=points)
+    assert status == 400
+    assert body["error"] == f"invalid points: {points}"
+
+
+def test_route_errors_become_500_json(server, monkeypatch):
+    def boom(params):
+        raise KeyError("date")
+
+    monkeypatch.setitem(server.routes, "/api/tools", boom)
+    status, body = call(server, "/api/tools")
+    assert status == 500
+    assert "KeyError" in body["error"]
+
+
+def test_valid_request_is_served(server):
+    status, body = call(server, "/api/tools", points="10")
+    assert status == 200
+    assert body["y"] == [3, 5]
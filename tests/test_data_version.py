@@ -0,0 +1,49 @@
+from src.database.db_manager import DBManager
+
+
+def test_version_changes_on_every_plotted_write(db):
+    versions = [db.data_version()]
+    db.save_github_data([("2024-01-01", "a", 1)])
+    versions.append(db.data_version())
+    db.save_github_data([("2024-01-01", "a", 2)]) # INSERT OR REPLACE，行数不变
+    versions.append(db.data_version())
+    db.save_model_data([("m", "2024-01-01", 4096, 5)])
+    versions.append(db.data_version())
+    db._write("DELETE FROM model_context_stats WHERE model_id = 'm'")
+    versions.append(db.data_version())
+    assert len(set(versions)) == len(versions)
+
+
+def test_unrelated_writes_keep_version(db):
+    before = db.data_version()
+    db.sync_ledger(["a/a"])
+    db.save_repo_metadata([("a/a", "2024-01-01", 1, 0)])
+    assert db.data_version() == before
+
+
+def test_version_is_persistent_and_reads_no_data_tables(tmp_path, metrics):
+    path = str(tmp_path / "v.db")
+    first = DBManager(db_path=path, metrics=metrics)
+    first.save_github_data([("2024-01-01", "a", 1)])
+    version = first.data_version()
+    first.close()
+
+    second = DBManager(db_path=path, metrics=metrics)
+    statements = []
+    second.conn.set_trace_callback(statements.append)
+    assert second.data_version() == version
+    assert not any("github_stats" in sql or "model_context_stats" in sql for sql in statements)
+    second.close()
+
+
+def test_recreated_database_gets_new_epoch(tmp_path, metrics):
+    path = tmp_path / "v.db"
+    versions = []
+    for _ in range(2):
+        manager = DBManager(db_path=str(path), metrics=metrics)
+        versions.append(manager.data_version())
+        manager.close()
+        for suffix in ("", "-wal", "-shm"):
+            if (tmp_path / f"v.db{suffix}").exists():
+                (tmp_path / f"v.db{suffix}").unlink()
+    assert versions[0] != versions[1]
@@ -0,0 +1,52 @@
+import threading
+import pytest
+
+
+def test_bad_row_only_drops_that_row(db):
+    db.save_github_data([
+        ("2024-01-01", "a", 1),
+        ("2024-01-02", "b", {"not": "bindable"}),
+        ("2024-01-03", "c", 3),
+    ])
+    db.save_model_data([("m1", "2024-01-01", 4096, 10)])
+    db.flush()
+    assert sorted(db.get_github_data()["topic"]) == ["a", "c"]
+    assert db.get_model_data()["model_id"].tolist() == ["m1"]
+    assert db.write_errors == 1
+
+
+def test_non_sqlite_error_does_not_kill_writer(db):
+    def buggy(conn):
+        raise TypeError("bug in op")
+
+    db._submit(buggy)
+    db.save_github_data([("2024-01-01", "after", 1)])
+    flushed = threading.Event()
+    threading.Thread(target=lambda: (db.flush(), flushed.set()), daemon=True).start()
+    assert flushed.wait(timeout=5), "flush() hung: writer thread died"
+    assert db.get_github_data()["topic"].tolist() == ["after"]
+    assert db._writer.is_alive()
+    assert db.write_errors == 1
+
+
+def test_waited_write_raises_in_caller(db):
+    def buggy(conn):
+        conn.execute("INSERT INTO github_stats VALUES ('2024-01-01', 'x', 1)")
+        raise ValueError("bad op")
+
+    with pytest.raises(ValueError, match="bad op"):
+        db._submit(buggy, wait=True)
+    # 出错的操作整体回滚，不留下半截写入
+    assert db.get_github_data().empty
+
+
+def test_batched_writes_are_visible_to_readers_in_other_threads(db):
+    def writer(i):
+        db.save_github_data([(f"2024-01-{d:02d}", f"t{i}", d) for d in range(1, 11)])
+
+    threads = [threading.Thread(target=writer, args=(i,)) for i in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(db.get_github_data()) == 80
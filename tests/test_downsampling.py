@@ -0,0 +1,80 @@
+import numpy as np
+import pandas as pd
+import pytest
+from src.visualizers.downsampling import lttb_indices, density_bins
+
+
+@pytest.mark.parametrize("n,threshold", [(10, 3), (1000, 100), (5000, 1500), (101, 100)])
+def test_lttb_keeps_endpoints_and_returns_sorted_unique_indices(n, threshold):
+    rng = np.random.default_rng(0)
+    x = np.arange(n)
+    y = rng.normal(size=n).cumsum()
+    idx = lttb_indices(x, y, threshold)
+    assert len(idx) == threshold
+    assert idx[0] == 0 and idx[-1] == n - 1
+    assert np.all(np.diff(idx) > 0)
+
+
+@pytest.mark.parametrize("threshold", [2, 50, 51])
+def test_lttb_returns_everything_when_nothing_to_drop(threshold):
+    assert lttb_indices(np.arange(50), np.zeros(50), threshold).tolist() == list(range(50))
+
+
+def test_lttb_preserves_spikes():
+    y = np.zeros(1000)
+    y[[123, 517, 888]] = [50, -40, 30]
+    idx = lttb_indices(np.arange(1000), y, 60)
+    assert {123, 517, 888} <= set(idx.tolist())
+
+
+def test_lttb_handles_datetime_like_int_x():
+    x = pd.date_range("2020-01-01", periods=500).to_numpy().astype("datetime64[ns]").astype(np.int64)
+    idx = lttb_indices(x, np.arange(500) % 17, 40)
+    assert len(idx) == 40 and idx[-1] == 499
+
+
+@pytest.fixture
+def models():
+    rng = np.random.default_rng(1)
+    n = 5000
+    return pd.DataFrame({
+        "created_at": pd.Timestamp("2020-01-01") + pd.to_timedelta(rng.integers(0, 1500, n), unit="D"),
+        "context_length": rng.choice([2048, 4096, 32768, 131072, 1000000], n),
+        "downloads": rng.integers(1, 10**6, n),
+        "model_id": [f"m{i}" for i in range(n)],
+    })
+
+
+def test_density_bins_conserve_count_and_stay_in_range(models):
+    bins = density_bins(models, "created_at", "context_length", 40, 20, log_y=True,
+                        weight_col="downloads", label_col="model_id")
+    assert bins["count"].sum() == len(models)
+    assert len(bins) <= 40 * 20
+    assert bins["x"].min() >= models["created_at"].min() and bins["x"].max() <= models["created_at"].max()
+    # 对数轴上取几何均值：结果落在原始取值范围内
+    assert bins["y"].min() >= models["context_length"].min() * (1 - 1e-9)
+    assert bins["y"].max() <= models["context_length"].max() * (1 + 1e-9)
+
+
+def test_density_bins_label_is_heaviest_point_in_cell(models):
+    one_cell = models.assign(created_at=pd.Timestamp("2024-01-01"), context_length=4096)
+    bins = density_bins(one_cell, "created_at", "context_length", 10, 10, log_y=True,
+                        weight_col="downloads", label_col="model_id")
+    assert len(bins) == 1
+    assert bins["count"].iloc[0] == len(models)
+    assert bins["label"].iloc[0] == models.loc[models["downloads"].idxmax(), "model_id"]
+    assert bins["x"].iloc[0] == pd.Timestamp("2024-01-01")
+    assert bins["y"].iloc[0] == pytest.approx(4096)
+
+
+def test_density_bins_numeric_without_labels():
+    df = pd.DataFrame({"x": [0.0, 0.1, 9.9, 10.0], "y": [1.0, 1.0, 5.0, 5.0]})
+    bins = density_bins(df, "x", "y", 2, 2)
+    assert bins["count"].tolist() == [2, 2]
+    assert bins["x"].tolist() == pytest.approx([0.05, 9.95])
+    assert bins["label"].isna().all()
+
+
+def test_density_bins_empty_frame():
+    empty = pd.DataFrame({"x": pd.Series(dtype=float), "y": pd.Series(dtype=float)})
+    assert density_bins(empty, "x", "y", 10, 10).empty
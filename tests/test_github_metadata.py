@@ -0,0 +1,132 @@
+import json
+import re
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+from src.collectors.github_metadata import GitHubMetadataResolver
+from src.collectors.http_cache import HTTPCache
+from src.collectors.request_scheduler import RequestScheduler
+
+REPOS = {
+    "alice/alpha": {"createdAt": "2023-01-02T00:00:00Z", "stargazerCount": 10, "isArchived": False},
+    "bob/beta": {"createdAt": "2023-05-06T00:00:00Z", "stargazerCount": 3, "isArchived": True},
+    "carol/gamma": {"createdAt": "2024-02-03T00:00:00Z", "stargazerCount": 0, "isArchived": False},
+    # GraphQL 查不到，只能通过 REST 回退解析
+    "dave/delta": {"createdAt": "2024-07-08T00:00:00Z", "stargazerCount": 7, "isArchived": False},
+}
+GRAPHQL_MISSING = {"dave/delta"}
+ALIAS = re.compile(r'(r\d+): repository\(owner: "([^"]+)", name: "([^"]+)"\)')
+
+
+class StubGitHub:
+    """本地 stub：POST /graphql 按别名返回仓库，GET /repos/{owner}/{name} 模拟 REST"""
+    def __init__(self, graphql_status=200):
+        self.graphql_status = graphql_status
+        self.graphql_batches = []
+        self.rest_requests = []
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                query = json.loads(self.rfile.read(int(self.headers["Content-Length"])))["query"]
+                aliases = ALIAS.findall(query)
+                stub.graphql_batches.append([f"{owner}/{name}" for _, owner, name in aliases])
+                if stub.graphql_status != 200:
+                    return self._reply(stub.graphql_status, {"message": "boom"})
+                data = {"rateLimit": {"cost": 1, "remaining": 4999, "resetAt": "2030-01-01T00:00:00Z"}}
+                for alias, owner, name in aliases:
+                    repo = f"{owner}/{name}"
+                    found = repo in REPOS and repo not in GRAPHQL_MISSING
+                    data[alias] = {"nameWithOwner": repo, **REPOS[repo]} if found else None
+                self._reply(200, {"data": data})
+
+            def do_GET(self):
+                repo = self.path[len("/repos/"):]
+                stub.rest_requests.append(repo)
+                node = REPOS.get(repo)
+                if node is None:
+                    return self._reply(404, {"message": "Not Found"})
+                self._reply(200, {"created_at": node["createdAt"], "stargazers_count": node["stargazerCount"],
+                                  "archived": node["isArchived"]})
+
+            def _reply(self, status, payload):
+                body = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.httpd.server_address[1]}"
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+@pytest.fixture
+def make_resolver(tmp_path, db, metrics):
+    servers = []
+
+    def make(token="test-token", graphql_status=200, batch_size=2):
+        stub = StubGitHub(graphql_status)
+        servers.append(stub)
+        resolver = GitHubMetadataResolver(
+            db, token=token, api_url=stub.url, graphql_url=f"{stub.url}/graphql", batch_size=batch_size,
+            cache=HTTPCache(path=str(tmp_path / "http_cache.db"), metrics=metrics),
+            scheduler=RequestScheduler(rates={}, default_rate=1000.0, metrics=metrics),
+        )
+        return resolver, stub
+
+    yield make
+    for stub in servers:
+        stub.close()
+
+
+def test_graphql_batches_with_rest_fallback(make_resolver):
+    resolver, stub = make_resolver()
+    repos = sorted(REPOS) + ["eve/missing"]
+    result = resolver.resolve(repos)
+
+    assert stub.graphql_batches == [repos[0:2], repos[2:4], repos[4:5]]
+    # GraphQL 返回 null 的仓库逐个回退到 REST，REST 也查不到的不出现在结果里
+    assert sorted(stub.rest_requests) == ["dave/delta", "eve/missing"]
+    assert sorted(result) == sorted(REPOS)
+    assert result["bob/beta"] == {"created_at": "2023-05-06", "stars": 3, "archived": True}
+    assert result["dave/delta"]["created_at"] == "2024-07-08"
+    assert resolver.stats["graphql_resolved"] == 3
+    assert resolver.stats["rest_resolved"] == 1
+
+
+def test_resolved_metadata_is_cached_in_db(make_resolver):
+    resolver, stub = make_resolver()
+    resolver.resolve(sorted(REPOS))
+    resolver, stub = make_resolver()
+    result = resolver.resolve(sorted(REPOS))
+
+    assert stub.graphql_batches == [] and stub.rest_requests == []
+    assert resolver.stats["cached"] == len(REPOS)
+    assert result["alice/alpha"]["stars"] == 10
+
+
+def test_graphql_failure_falls_back_to_rest(make_resolver):
+    resolver, stub = make_resolver(graphql_status=502)
+    result = resolver.resolve(sorted(REPOS))
+
+    assert len(stub.graphql_batches) == 2
+    assert sorted(stub.rest_requests) == sorted(REPOS)
+    assert sorted(result) == sorted(REPOS)
+
+
+def test_without_token_only_rest_is_used(make_resolver):
+    resolver, stub = make_resolver(token="YOUR_GITHUB_TOKEN_HERE")
+    result = resolver.resolve(["alice/alpha"])
+
+    assert stub.graphql_batches == []
+    assert stub.rest_requests == ["alice/alpha"]
+    assert result["alice/alpha"]["created_at"] == "2023-01-02"
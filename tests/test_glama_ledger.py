@@ -0,0 +1,128 @@
+from datetime import datetime, timedelta
+import pytest
+from src.collectors.http_cache import HTTPCache
+from src.collectors.request_scheduler import RequestScheduler
+from src.collectors.tools_collector import GlamaCollector
+
+MAX_ATTEMPTS = 3
+
+
+def age(db, repo, days):
+    updated_at = (datetime.now() - timedelta(days=days)).isoformat(timespec="seconds")
+    db._write("UPDATE glama_ledger SET updated_at = ? WHERE repo = ?", (updated_at, repo))
+
+
+def pending(db, listed=None):
+    return db.get_pending_repos(stale_days=7, max_attempts=MAX_ATTEMPTS, listed=listed)
+
+
+def test_pending_selection(db):
+    db.sync_ledger(["new/new", "fresh/done", "stale/done", "stale/missing", "retry/failed", "given-up/failed"])
+    db.record_repo_result("fresh/done", "done", tool_count=1, created_at="2024-01-01")
+    db.record_repo_result("stale/done", "done", tool_count=1, created_at="2024-01-01")
+    db.record_repo_result("stale/missing", "missing", error="http 404")
+    age(db, "stale/done", 8)
+    age(db, "stale/missing", 8)
+    db.record_repo_result("retry/failed", "failed", error="tool table not found")
+    for _ in range(MAX_ATTEMPTS):
+        db.record_repo_result("given-up/failed", "failed", error="http 500")
+
+    assert pending(db) == ["new/new", "retry/failed", "stale/done", "stale/missing"]
+
+
+def test_pending_is_limited_to_the_current_listing(db):
+    db.sync_ledger(["kept/a", "dropped/b"])
+    assert pending(db, listed=["kept/a"]) == ["kept/a"]
+    # 列表获取失败 (为空) 时不过滤
+    assert pending(db, listed=[]) == ["dropped/b", "kept/a"]
+
+
+def test_success_resets_attempts(db):
+    db.sync_ledger(["a/a"])
+    for _ in range(MAX_ATTEMPTS - 1):
+        db.record_repo_result("a/a", "failed", error="http 500")
+    db.record_repo_result("a/a", "counted", tool_count=4)
+    db.record_repo_result("a/a", "counted", error="no created_at")
+    assert db.get_ledger_tool_counts("counted", max_attempts=2) == {"a/a": 4}
+    assert db.get_ledger_tool_counts("counted", max_attempts=1) == {}
+
+
+class StubbedCollector(GlamaCollector):
+    """列表、Glama 页面与 GitHub 创建日期都由测试给出，记录每次 Glama 请求"""
+    def __init__(self, db, tmp_path, metrics, listing, tools, dates):
+        super().__init__(db, cache=HTTPCache(path=str(tmp_path / "http_cache.db"), metrics=metrics),
+                         scheduler=RequestScheduler(rates={}, metrics=metrics), metrics=metrics)
+        self.listing, self.tools, self.dates = listing, tools, dates
+        self.glama_requests = []
+        self.resolver.resolve = lambda repos: {r: {"created_at": self.dates[r]} for r in repos if r in self.dates}
+
+    def fetch_repo_list_from_awesome(self):
+        return list(self.listing)
+
+    def get_real_tool_count_from_glama(self, repo):
+        self.glama_requests.append(repo)
+        if repo not in self.tools:
+            return None, "http 404"
+        return self.tools[repo], "stub"
+
+
+@pytest.fixture
+def collector(db, tmp_path, metrics):
+    def make(listing, tools, dates):
+        return StubbedCollector(db, tmp_path, metrics, listing, tools, dates)
+    return make
+
+
+def ledger_row(db, repo):
+    return db._reader().execute(
+        "SELECT status, attempts, tool_count, created_at FROM glama_ledger WHERE repo = ?", (repo,)
+    ).fetchone()
+
+
+def test_dropped_stale_repo_is_not_scraped_again(db, collector):
+    collector(["a/a", "b/b"], {"a/a": 1, "b/b": 2}, {"a/a": "2024-01-01", "b/b": "2024-02-01"}).run(use_async=False)
+    age(db, "a/a", 30)
+    age(db, "b/b", 30)
+
+    second = collector(["a/a"], {"a/a": 1}, {"a/a": "2024-01-01"})
+    second.run(use_async=False)
+    assert second.glama_requests == ["a/a"]
+    assert ledger_row(db, "b/b")[0] == "delisted"
+
+
+def test_failed_date_lookup_keeps_tool_count_and_retries_dates_only(db, collector):
+    first = collector(["a/a"], {"a/a": 5}, {})
+    first.run(use_async=False)
+    assert first.glama_requests == ["a/a"]
+    assert ledger_row(db, "a/a") == ("counted", 1, 5, None)
+
+    second = collector(["a/a"], {}, {"a/a": "2024-03-01"})
+    second.run(use_async=False)
+    assert second.glama_requests == []
+    assert ledger_row(db, "a/a") == ("done", 0, 5, "2024-03-01")
+    assert db.query_tools_series(topics=["Available Skills (Tools)"])["repo_count"].tolist() == [5]
+
+
+def test_date_lookup_gives_up_after_max_attempts(db, collector, monkeypatch):
+    monkeypatch.setattr("src.collectors.tools_collector.GLAMA_MAX_ATTEMPTS", 2)
+    for _ in range(3):
+        collector(["a/a"], {"a/a": 5}, {}).run(use_async=False)
+    assert ledger_row(db, "a/a") == ("counted", 2, 5, None)
+
+
+def test_resume_after_crash_between_phases(db, collector, monkeypatch):
+    crashed = collector(["a/a", "b/b"], {"a/a": 1, "b/b": 2}, {"a/a": "2024-01-01", "b/b": "2024-02-01"})
+
+    def crash(listed=None):
+        raise KeyboardInterrupt
+
+    monkeypatch.setattr(crashed, "resolve_created_dates", crash)
+    with pytest.raises(KeyboardInterrupt):
+        crashed.run(use_async=False)
+    assert ledger_row(db, "a/a")[0] == "counted"
+
+    resumed = collector(["a/a", "b/b"], {"a/a": 1, "b/b": 2}, {"a/a": "2024-01-01", "b/b": "2024-02-01"})
+    resumed.run(use_async=False)
+    assert resumed.glama_requests == []
+    assert [ledger_row(db, r)[0] for r in ("a/a", "b/b")] == ["done", "done"]
+    assert db.query_tools_series(topics=["Available Skills (Tools)"])["repo_count"].tolist() == [1, 3]
@@ -0,0 +1,68 @@
+import pytest
+from src.collectors.glama_parser import ToolCountExtractor, count_tools
+
+
+def rows(n, cell="td"):
+    return "".join(f"<tr><{cell}>tool_{i}</{cell}><{cell}>desc</{cell}></tr>" for i in range(n))
+
+
+def table(n, header=True, tbody=True):
+    head = "<thead><tr><th>Name</th><th>Description</th></tr></thead>" if header else ""
+    body = f"<tbody>{rows(n)}</tbody>" if tbody else rows(n)
+    return f"<table>{head}{body}</table>"
+
+
+def page(main):
+    return f"<html><body><header><nav>menu</nav></header><main>{main}</main></body></html>".encode()
+
+
+def test_heading_strategy_wins_over_other_tables():
+    html = page(f"<section><h2>Resources</h2>{table(2)}</section>"
+                f"<section><h2>Tools</h2>{table(5)}</section>"
+                f"<section>{table(9)}</section>")
+    assert count_tools(html) == (5, "heading")
+
+
+def test_header_row_without_tbody_is_not_counted():
+    html = page(f"<h3>Available tools</h3><table><tr><th>Name</th></tr>{rows(4)}</table>")
+    assert count_tools(html) == (4, "heading")
+
+
+def test_legacy_section_strategy():
+    html = page(f"<section>{table(1)}</section><section>{table(2)}</section><section>{table(7)}</section>")
+    assert count_tools(html) == (7, "legacy-section")
+
+
+def test_single_table_strategy():
+    html = page(f"<section><h2>Schema</h2>{table(3)}</section><section>{table(0)}</section>")
+    assert count_tools(html) == (3, "single-table")
+
+
+def test_no_match_returns_none_not_zero():
+    html = page(f"<section>{table(2)}</section><section>{table(3)}</section>")
+    assert count_tools(html) == (None, "none")
+    assert count_tools(page("<p>no tables here</p>")) == (None, "none")
+
+
+def test_empty_tools_table_counts_zero():
+    assert count_tools(page(f"<h2>Tools</h2>{table(0)}")) == (0, "heading")
+
+
+def test_nested_tables_do_not_add_rows():
+    inner = f"<table>{rows(3)}</table>"
+    html = page(f"<h2>Tools</h2><table><tbody><tr><td>a</td><td>{inner}</td></tr>{rows(1)}</tbody></table>")
+    assert count_tools(html) == (2, "heading")
+
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 64, 1 << 16])
+def test_result_is_independent_of_chunking(chunk_size):
+    html = page(f"<section><h2>Prompts</h2>{table(2)}</section><section><h2>Tools</h2>{table(11)}</section>")
+    assert count_tools(html, chunk_size=chunk_size) == (11, "heading")
+
+
+def test_extractor_stops_after_match():
+    extractor = ToolCountExtractor()
+    assert extractor.feed(page(f"<h2>Tools</h2>{table(2)}")[:-len("</main></body></html>")])
+    # 匹配后继续喂入的数据被忽略
+    assert extractor.feed(b"<table><tbody><tr><td>x</td></tr></tbody></table>")
+    assert extractor.close() == (2, "heading")
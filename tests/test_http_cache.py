@@ -0,0 +1,58 @@
+import pytest
+from src.collectors.http_cache import HTTPCache
+
+
+class RecordingMetrics:
+    def __init__(self):
+        self.requests = []
+
+    def record_request(self, url, status, seconds, nbytes=None, cache_hit=False, retries=0, error=None):
+        self.requests.append((status, cache_hit))
+
+
+class FakeResponse:
+    def __init__(self, status_code, content=b"", headers=None):
+        self.status_code = status_code
+        self.content = content
+        self.headers = headers or {}
+
+
+@pytest.fixture
+def recorder():
+    return RecordingMetrics()
+
+
+def make_cache(tmp_path, recorder, ttl):
+    return HTTPCache(path=str(tmp_path / "http_cache.db"), ttl_rules=[], default_ttl=ttl, metrics=recorder)
+
+
+def test_only_fresh_serves_count_as_cache_hits(tmp_path, recorder):
+    cache = make_cache(tmp_path, recorder, ttl=3600)
+    calls = []
+
+    def get(url, headers=None, **kwargs):
+        calls.append(headers)
+        return FakeResponse(200, b"{}", {"ETag": '"v1"'})
+
+    cache.fetch(get, "https://example.com/a")
+    r = cache.fetch(get, "https://example.com/a")
+    assert r.from_cache and len(calls) == 1
+    assert recorder.requests == [(200, True)]
+
+
+def test_revalidation_is_not_recorded_as_a_hit(tmp_path, recorder):
+    cache = make_cache(tmp_path, recorder, ttl=0)
+    responses = [FakeResponse(200, b"{}", {"ETag": '"v1"'}), FakeResponse(304)]
+    calls = []
+
+    def get(url, headers=None, **kwargs):
+        calls.append(headers)
+        return responses.pop(0)
+
+    cache.fetch(get, "https://example.com/a")
+    r = cache.fetch(get, "https://example.com/a")
+    assert r.status_code == 200 and r.content == b"{}"
+    assert calls[1]["If-None-Match"] == '"v1"'
+    assert cache.counters["revalidated"] == 1
+    # 两次都是真实的网络请求，由调度器记录；缓存层不再额外记一次命中
+    assert recorder.requests == []
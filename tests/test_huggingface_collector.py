@@ -0,0 +1,136 @@
+import json
+import pytest
+from src.collectors.huggingface_collector import HuggingFaceCollector
+from src.collectors.http_cache import HTTPCache
+from src.collectors.request_scheduler import RequestScheduler
+
+SHA = "0123456789abcdef0123456789abcdef01234567"
+
+
+class FakeResponse:
+    def __init__(self, config):
+        self.status_code = 200
+        self.content = json.dumps(config).encode()
+
+    def json(self):
+        return json.loads(self.content)
+
+
+class FakeCache:
+    def __init__(self):
+        self.urls = []
+
+    def fetch(self, get, url, **kwargs):
+        self.urls.append(url)
+        return FakeResponse({"max_position_embeddings": 4096})
+
+    def stats(self):
+        return {}
+
+
+def test_config_is_fetched_at_the_listed_revision(db, metrics):
+    cache = FakeCache()
+    collector = HuggingFaceCollector(db, max_workers=2, cache=cache, metrics=metrics,
+                                     scheduler=RequestScheduler(rates={}, metrics=metrics))
+    models = [{"id": "org/pinned", "sha": SHA, "createdAt": "2024-01-01T00:00:00"},
+              {"id": "org/unpinned", "lastModified": "2024-02-01T00:00:00", "createdAt": "2024-02-01T00:00:00"}]
+    rows = collector.resolve_models(models)
+
+    assert sorted(cache.urls) == [f"https://huggingface.co/org/pinned/resolve/{SHA}/config.json",
+                                  "https://huggingface.co/org/unpinned/resolve/main/config.json"]
+    assert [row[2] for row in rows] == [4096, 4096]
+
+
+def test_pinned_configs_outlive_main_in_the_http_cache(tmp_path, metrics):
+    cache = HTTPCache(path=str(tmp_path / "http_cache.db"), metrics=metrics)
+    pinned = cache.ttl_for(f"https://huggingface.co/org/m/resolve/{SHA}/config.json")
+    main = cache.ttl_for("https://huggingface.co/org/m/resolve/main/config.json")
+    assert pinned > main
+
+
+LIST_URL = "https://huggingface.co/api/models"
+NEXT_URL = "https://huggingface.co/api/models?cursor=abc&limit=3"
+
+
+class ListingResponse:
+    def __init__(self, models, next_url=None, status_code=200):
+        self.status_code = status_code
+        self.headers = {}
+        self.content = json.dumps(models).encode()
+        self.links = {"next": {"url": next_url}} if next_url else {}
+
+    def json(self):
+        return json.loads(self.content)
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise RuntimeError(f"HTTP {self.status_code}")
+
+
+class StubListingSession:
+    """两页模型列表：第一页通过 Link: rel="next" 指向第二页"""
+    def __init__(self, second_page_status=200):
+        self.second_page_status = second_page_status
+        self.requests = []
+
+    def get(self, url, params=None, **kwargs):
+        self.requests.append((url, params))
+        if url == LIST_URL:
+            return ListingResponse([model(i) for i in range(3)], next_url=NEXT_URL)
+        return ListingResponse([model(i) for i in range(3, 5)], status_code=self.second_page_status)
+
+
+def model(i):
+    return {"id": f"org/m{i}", "sha": f"{i:040x}", "createdAt": "2024-01-01T00:00:00", "downloads": 100 - i}
+
+
+@pytest.fixture
+def listing_collector(db, metrics, monkeypatch):
+    def make(session):
+        collector = HuggingFaceCollector(db, max_workers=2, cache=FakeCache(), metrics=metrics,
+                                         scheduler=RequestScheduler(rates={}, default_rate=1000.0, metrics=metrics))
+        collector.session = session
+        saved = []
+        original = db.save_model_data
+
+        def save_model_data(rows):
+            saved.append([row[0] for row in rows])
+            original(rows)
+
+        monkeypatch.setattr(db, "save_model_data", save_model_data)
+        return collector, saved
+    return make
+
+
+def test_cursor_pagination_follows_next_link(listing_collector):
+    session = StubListingSession()
+    collector, _ = listing_collector(session)
+    ids = [m["id"] for m in collector.iter_models(page_size=3)]
+
+    assert ids == [f"org/m{i}" for i in range(5)]
+    (first_url, first_params), (second_url, second_params) = session.requests
+    assert first_url == LIST_URL and first_params["limit"] == 3
+    # 下一页地址已带全部查询参数，不再重复传 params
+    assert (second_url, second_params) == (NEXT_URL, None)
+
+
+def test_max_models_stops_before_fetching_more_pages(listing_collector):
+    session = StubListingSession()
+    collector, _ = listing_collector(session)
+    assert len(list(collector.iter_models(page_size=3, max_models=2))) == 2
+    assert len(session.requests) == 1
+
+
+def test_models_are_flushed_per_chunk(listing_collector, db):
+    collector, saved = listing_collector(StubListingSession())
+    collector.fetch_model_info(flush_size=2)
+    assert saved == [["org/m0", "org/m1"], ["org/m2", "org/m3"], ["org/m4"]]
+    assert sorted(db.get_model_data()["model_id"]) == [f"org/m{i}" for i in range(5)]
+
+
+def test_chunks_saved_before_an_error_survive(listing_collector, db):
+    collector, saved = listing_collector(StubListingSession(second_page_status=500))
+    collector.fetch_model_info(flush_size=2)
+    # 第二页失败时，第一个分块已写入；跨页的第二个分块尚未凑齐，不会写入
+    assert saved == [["org/m0", "org/m1"]]
+    assert sorted(db.get_model_data()["model_id"]) == ["org/m0", "org/m1"]
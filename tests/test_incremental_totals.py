@@ -0,0 +1,80 @@
+import pandas as pd
+import pytest
+
+TOOLS = "Available Skills (Tools)"
+SERVERS = "MCP Servers"
+
+
+def totals(db):
+    """github_stats 中的累计曲线 -> {topic: {date: value}}"""
+    df = db.get_github_data()
+    return {topic: dict(zip(g["date"], g["repo_count"])) for topic, g in df.groupby("topic")}
+
+
+def rebuild(observations):
+    """与增量聚合对照的全量重算：observations = {repo: (created_at, tool_count)}"""
+    df = pd.DataFrame([(d, c) for d, c in observations.values()], columns=["date", "tools"])
+    daily = df.groupby("date").agg(tools=("tools", "sum"), servers=("tools", "size")).sort_index().cumsum()
+    return {TOOLS: daily["tools"].to_dict(), SERVERS: daily["servers"].to_dict()}
+
+
+@pytest.fixture
+def ledger(db):
+    def run(observations, listed=None, missing=()):
+        """模拟一次 Glama 采集：observations 为本批次完成的仓库，missing 为页面已消失的仓库"""
+        repos = sorted(set(listed if listed is not None else observations) | set(missing))
+        db.sync_ledger(repos)
+        run_id = db.start_run("glama")
+        for repo, (created_at, tool_count) in observations.items():
+            db.record_repo_result(repo, "done", tool_count=tool_count, created_at=created_at)
+            db.record_repo_observation(run_id, repo, created_at, tool_count)
+        for repo in missing:
+            db.record_repo_result(repo, "missing", error="http 404")
+        return db.finish_run(run_id, listed=repos if listed is not None else None)
+    return run
+
+
+def test_first_run_matches_full_rebuild(db, ledger):
+    obs = {"a/a": ("2024-01-01", 3), "b/b": ("2024-01-01", 2), "c/c": ("2024-02-01", 5)}
+    ledger(obs)
+    assert totals(db) == rebuild(obs)
+
+
+def test_changed_repo_applies_delta_only(db, ledger):
+    ledger({"a/a": ("2024-01-01", 3), "b/b": ("2024-02-01", 2)})
+    ledger({"a/a": ("2024-01-01", 7)}, listed=["a/a", "b/b"])
+    assert totals(db) == rebuild({"a/a": ("2024-01-01", 7), "b/b": ("2024-02-01", 2)})
+
+
+def test_repo_dropping_to_zero_tools_is_subtracted(db, ledger):
+    ledger({"a/a": ("2024-01-01", 3), "b/b": ("2024-02-01", 2)})
+    ledger({"b/b": ("2024-02-01", 0)}, listed=["a/a", "b/b"])
+    assert totals(db)[TOOLS] == {"2024-01-01": 3, "2024-02-01": 3}
+    assert totals(db)[SERVERS] == {"2024-01-01": 1, "2024-02-01": 2}
+
+
+def test_missing_repo_is_retracted(db, ledger):
+    ledger({"a/a": ("2024-01-01", 3), "b/b": ("2024-02-01", 2), "c/c": ("2024-03-01", 4)})
+    assert ledger({}, listed=["a/a", "b/b", "c/c"], missing=["b/b"]) == 1
+    assert totals(db) == rebuild({"a/a": ("2024-01-01", 3), "c/c": ("2024-03-01", 4)})
+
+
+def test_delisted_repo_is_retracted_and_restored_when_relisted(db, ledger):
+    obs = {"a/a": ("2024-01-01", 3), "b/b": ("2024-01-15", 2)}
+    ledger(obs)
+    assert ledger({}, listed=["a/a"]) == 1
+    assert totals(db) == rebuild({"a/a": ("2024-01-01", 3)})
+    # 下架的仓库不会从账本补录，也不在待采集队列中
+    assert db.get_pending_repos(stale_days=7, max_attempts=5) == []
+
+    db.sync_ledger(["a/a", "b/b"])
+    assert db.get_pending_repos(stale_days=7, max_attempts=5) == ["b/b"]
+    ledger({"b/b": ("2024-01-15", 2)}, listed=["a/a", "b/b"])
+    assert totals(db) == rebuild(obs)
+
+
+def test_failed_listing_does_not_retract_everything(db, ledger):
+    obs = {"a/a": ("2024-01-01", 3)}
+    ledger(obs)
+    assert ledger({}, listed=[]) == 0
+    assert totals(db) == rebuild(obs)
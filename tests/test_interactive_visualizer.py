@@ -0,0 +1,92 @@
+import numpy as np
+import pandas as pd
+from benchmarks.bench_hover import make_data, legacy_tools_hover, legacy_model_hover, vectorized_model_hover
+from src.visualizers.interactive_visualizer import InteractiveChartGenerator
+from src.visualizers.render_cache import RenderCache
+
+
+def make_viz(tmp_path):
+    return InteractiveChartGenerator(RenderCache(str(tmp_path / "cache"), str(tmp_path / "manifest.json")))
+
+
+def test_tools_hover_matches_row_by_row_version(tmp_path):
+    rng = np.random.default_rng(3)
+    dates = pd.date_range("2024-01-01", periods=30)
+    # 每行取值互不相同，避免旧实现不稳定排序在并列时的顺序差异
+    values = np.stack([rng.permutation(12) for _ in dates]).astype(float)
+    values[::4, :6] = 0 # 部分日期只有少量非零 Topic
+    pivot = pd.DataFrame(values, index=dates, columns=[f"topic-{i}" for i in range(12)])
+    pivot["Total"] = pivot.sum(axis=1)
+
+    index, total, hover = make_viz(tmp_path).prepare_tools_data_with_details(None, pivot)
+    assert hover == legacy_tools_hover(pivot)
+    assert total.tolist() == pivot["Total"].tolist()
+    assert list(index) == list(dates)
+
+
+def test_tools_hover_without_header_is_breakdown_only(tmp_path):
+    pivot = pd.DataFrame({"a": [3.0, 0.0], "b": [1.0, 0.0]}, index=pd.date_range("2024-01-01", periods=2))
+    pivot["Total"] = pivot.sum(axis=1)
+    _, _, hover = make_viz(tmp_path).prepare_tools_data_with_details(None, pivot, header=False)
+    assert hover == ["a: 3<br>b: 1<br>", ""]
+
+
+def test_model_hover_matches_row_by_row_version(tmp_path):
+    _, models = make_data(n_models=500, n_topics=1, n_dates=1)
+    viz = make_viz(tmp_path)
+    expected = legacy_model_hover(viz, models)
+    actual = vectorized_model_hover(viz, models)
+    assert [list(a) for a in actual] == expected
+
+
+def chart_inputs():
+    pivot, models = make_data(n_models=300, n_topics=5, n_dates=40)
+    df_gh = pivot.drop(columns="Total").rename_axis("date").reset_index().melt(
+        id_vars="date", var_name="topic", value_name="repo_count")
+    return df_gh, models
+
+
+def test_compact_cache_hit_restores_plotlyjs(tmp_path):
+    viz = make_viz(tmp_path)
+    df_gh, models = chart_inputs()
+    first, second = tmp_path / "a" / "chart.html", tmp_path / "b" / "chart.html"
+    first.parent.mkdir()
+    second.parent.mkdir()
+
+    assert viz.generate_html_chart(df_gh.copy(), models, output_path=str(first), export_mode="compact") is False
+    assert (first.parent / "plotly.min.js").exists()
+    # 命中缓存，输出到一个没有 plotly.min.js 的新目录
+    assert viz.generate_html_chart(df_gh.copy(), models, output_path=str(second), export_mode="compact") is True
+    assert (second.parent / "plotly.min.js").read_text()[:200] == (first.parent / "plotly.min.js").read_text()[:200]
+
+
+def test_stale_plotlyjs_is_replaced(tmp_path):
+    from plotly.offline import get_plotlyjs_version
+    from src.visualizers.interactive_visualizer import ensure_plotlyjs
+    (tmp_path / "plotly.min.js").write_text("/**\n* plotly.js v0.0.1\n*/")
+    assert ensure_plotlyjs(str(tmp_path)) is True
+    assert f"plotly.js v{get_plotlyjs_version()}" in (tmp_path / "plotly.min.js").read_text()[:256]
+    assert ensure_plotlyjs(str(tmp_path)) is False
+
+
+def test_compact_export_binary_encodes_coordinates(tmp_path):
+    df_gh, models = chart_inputs()
+    out = tmp_path / "chart.html"
+    make_viz(tmp_path).generate_html_chart(df_gh.copy(), models, output_path=str(out), export_mode="compact")
+    html = out.read_text()
+    assert html.count('"bdata"') >= 6 # 三条轨迹的 x / y
+    assert "plotly.min.js" in html and len(html) < 200_000
+
+
+def test_pivot_tools_leaves_its_input_unchanged(tmp_path):
+    df_gh = pd.DataFrame({"date": ["2024-01-02", "2024-01-01", "2024-01-02"], "topic": ["a", "a", "b"],
+                          "repo_count": [2, 1, 5]})
+    before = df_gh.copy()
+    cache = RenderCache(str(tmp_path / "cache"), str(tmp_path / "manifest.json"))
+    fingerprint = cache.fingerprint([df_gh], {})
+
+    pivot = make_viz(tmp_path).pivot_tools(df_gh)
+    pd.testing.assert_frame_equal(df_gh, before)
+    assert cache.fingerprint([df_gh], {}) == fingerprint
+    assert pivot["Total"].tolist() == [1.0, 7.0]
+    assert list(pivot.index) == list(pd.to_datetime(["2024-01-01", "2024-01-02"]))
@@ -0,0 +1,62 @@
+import itertools
+from types import SimpleNamespace
+import numpy as np
+import pytest
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+import src.visualizers.label_placer as label_placer
+from src.visualizers.label_placer import LabelPlacer
+
+
+@pytest.fixture
+def ax():
+    fig = Figure(figsize=(6, 4), dpi=100)
+    FigureCanvasAgg(fig) # Agg 画布，不需要图形界面
+    ax = fig.add_subplot()
+    ax.set_xlim(0, 100)
+    ax.set_ylim(0, 100)
+    return ax
+
+
+def placed_labels(texts):
+    return [t.get_text() for t in texts]
+
+
+def test_places_by_priority_up_to_max_labels(ax):
+    xs, ys = [10, 50, 80, 30], [20, 50, 80, 70]
+    labels = ["low", "milestone", "high", "mid"]
+    priorities = [1, np.inf, 100, 10] # 里程碑 (inf) 优先，其余按下载量
+    placer = LabelPlacer(ax, max_labels=3, time_budget=10)
+    assert placed_labels(placer.place(xs, ys, labels, priorities)) == ["milestone", "high", "mid"]
+    assert placer.stats["placed"] == 3
+    assert not placer.stats["budget_exhausted"]
+
+
+def test_crowded_labels_do_not_overlap(ax):
+    rng = np.random.default_rng(0)
+    n = 200
+    xs, ys = rng.uniform(40, 60, n), rng.uniform(40, 60, n)
+    labels = [f"model-{i}" for i in range(n)]
+    placer = LabelPlacer(ax, max_labels=n, time_budget=10)
+    texts = placer.place(xs, ys, labels, rng.uniform(0, 1, n))
+
+    assert 0 < len(texts) < n
+    assert placer.stats["collisions"] > 0
+    boxes = {box for cell in placer.grid.values() for box in cell}
+    assert len(boxes) == len(texts)
+    for (ax0, ay0, ax1, ay1), (bx0, by0, bx1, by1) in itertools.combinations(boxes, 2):
+        assert not (ax0 < bx1 and bx0 < ax1 and ay0 < by1 and by0 < ay1)
+    # 所有标签框都在坐标轴范围内
+    bounds = ax.get_window_extent()
+    assert all(bounds.x0 <= x0 and x1 <= bounds.x1 and bounds.y0 <= y0 and y1 <= bounds.y1
+               for x0, y0, x1, y1 in boxes)
+
+
+def test_stops_when_time_budget_is_exhausted(ax, monkeypatch):
+    clock = itertools.count(0, 0.3)
+    monkeypatch.setattr(label_placer, "time", SimpleNamespace(perf_counter=lambda: next(clock)))
+    placer = LabelPlacer(ax, max_labels=10, time_budget=0.5)
+    texts = placer.place([10, 50, 80], [10, 50, 80], ["a", "b", "c"], [3, 2, 1])
+
+    assert placed_labels(texts) == ["a"]
+    assert placer.stats["budget_exhausted"]
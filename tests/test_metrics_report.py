@@ -0,0 +1,29 @@
+import pandas as pd
+from src.monitoring.metrics import Metrics
+from src.monitoring.report import load_metrics, request_table
+
+
+def test_cache_hits_are_counted_apart_from_network_latency(tmp_path):
+    path = str(tmp_path / "metrics.db")
+    metrics = Metrics(path=path, enabled=True)
+    for seconds in (0.2, 0.4, 0.6):
+        metrics.record_request("https://glama.ai/mcp/servers/a", 200, seconds, nbytes=1024)
+    metrics.record_request("https://glama.ai/mcp/servers/b", 500, 1.0, nbytes=0, retries=2)
+    for _ in range(20):
+        metrics.record_request("https://glama.ai/mcp/servers/a", 200, 0.0001, nbytes=4096, cache_hit=True)
+    metrics.record_request("https://huggingface.co/x/config.json", 200, 0.0001, cache_hit=True)
+    metrics.flush()
+
+    run_id, df = load_metrics(path)
+    assert run_id == metrics.run_id
+    table = request_table(df)
+
+    glama = table.loc["glama.ai"]
+    assert (glama["requests"], glama["cache_hits"], glama["errors"], glama["retries"]) == (4, 20, 1, 2)
+    # 分位数只在网络请求上计算，不被 20 次近乎 0 耗时的命中拉低
+    assert glama["p50_ms"] == 500.0
+    assert glama["MB"] == round(3 * 1024 / 2**20, 2)
+
+    hf = table.loc["huggingface.co"]
+    assert (hf["requests"], hf["cache_hits"]) == (0, 1)
+    assert pd.isna(hf["p50_ms"])
@@ -0,0 +1,86 @@
+import threading
+import time
+import pytest
+from src.pipeline.runner import Stage, PipelineRunner, StageCancelled
+
+
+def test_independent_stages_run_concurrently_and_pass_outputs():
+    both_started = threading.Barrier(2, timeout=5)
+
+    def source(value):
+        def run(inputs):
+            both_started.wait()
+            return value
+        return run
+
+    runner = PipelineRunner([
+        Stage("a", source(1)),
+        Stage("b", source(2)),
+        Stage("sum", lambda inputs: inputs["a"] + inputs["b"], deps=["a", "b"]),
+    ])
+    results = runner.run()
+    assert {name: r["status"] for name, r in results.items()} == {"a": "ok", "b": "ok", "sum": "ok"}
+
+
+def test_failed_stage_skips_strict_downstream_only():
+    def boom(inputs):
+        raise RuntimeError("collector down")
+
+    seen = {}
+    runner = PipelineRunner([
+        Stage("collect", boom),
+        Stage("process", lambda inputs: seen.setdefault("process", inputs), deps=["collect"], allow_failed_deps=True),
+        Stage("strict", lambda inputs: None, deps=["collect"]),
+    ])
+    results = runner.run()
+    assert results["collect"]["status"] == "failed"
+    assert results["process"]["status"] == "ok"
+    assert seen["process"] == {"collect": None}
+    assert results["strict"]["status"] == "skipped"
+
+
+def test_timed_out_stage_cannot_write_after_downstream_starts(db):
+    downstream_started = threading.Event()
+    outcome = {}
+
+    def slow_collector(inputs):
+        db.save_github_data([("2024-01-01", "early", 1)])
+        downstream_started.wait(timeout=5)
+        try:
+            db.save_github_data([("2024-01-02", "late", 2)])
+        except StageCancelled:
+            outcome["cancelled"] = True
+            raise
+
+    def process(inputs):
+        downstream_started.set()
+        time.sleep(0.2)
+        return db.get_github_data()["topic"].tolist()
+
+    runner = PipelineRunner([
+        Stage("collect", slow_collector, timeout=0.1),
+        Stage("process", process, deps=["collect"], allow_failed_deps=True),
+    ])
+    results = runner.run()
+    assert results["collect"]["status"] == "timeout"
+    assert results["process"]["status"] == "ok"
+    assert outcome == {"cancelled": True}
+    assert db.get_github_data()["topic"].tolist() == ["early"]
+
+
+def test_main_thread_stage_rejects_timeout():
+    with pytest.raises(ValueError):
+        Stage("render", lambda inputs: None, timeout=10, main_thread=True)
+
+
+def test_only_reruns_stage_and_downstream():
+    runner = PipelineRunner([
+        Stage("glama", lambda i: None),
+        Stage("hf", lambda i: None),
+        Stage("tools", lambda i: None, deps=["glama"]),
+        Stage("models", lambda i: None, deps=["hf"]),
+        Stage("render", lambda i: None, deps=["tools", "models"]),
+    ])
+    assert runner.select(["hf"]) == {"hf", "models", "render", "tools"}
+    with pytest.raises(ValueError):
+        runner.select(["nope"])
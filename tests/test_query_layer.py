@@ -0,0 +1,74 @@
+import inspect
+import pytest
+import config.settings as settings
+from src.processors.data_cleaner import DataProcessor
+
+
+@pytest.fixture
+def seeded(db):
+    db.save_github_data([
+        ("2024-01-01", "agents", 1), ("2024-01-01", "rag", 10),
+        ("2024-02-01", "agents", 2), ("2024-02-01", "rag", 20), ("2024-02-01", "mcp", 100),
+        ("2024-03-01", "agents", 3),
+    ])
+    db.save_model_data([
+        ("GPT-4", "2023-03-14", 8192, -1),
+        ("Claude", "2024-03-04", 200000, -1),
+        ("org/small", "2024-01-10", 2048, 50),
+        ("org/popular", "2024-02-10", 32768, 9000),
+        ("org/mid", "2024-02-20", 131072, 500),
+        ("org/unused", "2024-02-25", 4096, 0),
+        ("org/broken", "2024-03-01", 0, 10),
+        ("org/huge", "2024-03-02", 20000000, 20),
+    ])
+    return db
+
+
+def ids(df):
+    return df["model_id"].astype(str).tolist()
+
+
+def test_github_stats_date_bounds_are_inclusive_and_topics_filtered(seeded):
+    df = seeded.query_github_stats(start="2024-02-01", end="2024-03-01 12:00:00", topics=["agents", "mcp"])
+    rows = [(d.strftime("%Y-%m-%d"), str(t), c) for d, t, c in df.itertuples(index=False)]
+    assert sorted(rows) == [("2024-02-01", "agents", 2), ("2024-02-01", "mcp", 100), ("2024-03-01", "agents", 3)]
+    assert df["date"].is_monotonic_increasing
+
+
+def test_tools_series_sums_topics_per_date(seeded):
+    df = seeded.query_tools_series()
+    assert df["date"].dt.strftime("%Y-%m-%d").tolist() == ["2024-01-01", "2024-02-01", "2024-03-01"]
+    assert df["repo_count"].tolist() == [11, 122, 3]
+    assert seeded.query_tools_series(end="2024-02-01", topics=["rag"])["repo_count"].tolist() == [10, 20]
+
+
+def test_models_filters(seeded):
+    assert sorted(ids(seeded.query_models(kind="milestone"))) == ["Claude", "GPT-4"]
+    assert sorted(ids(seeded.query_models(kind="hf"))) == ["org/broken", "org/huge", "org/mid", "org/popular", "org/small"]
+    assert "org/unused" in ids(seeded.query_models(kind="crawled"))
+    assert "GPT-4" not in ids(seeded.query_models(kind="crawled"))
+    assert sorted(ids(seeded.query_models(start="2024-02-20", end="2024-03-01"))) == \
+        ["org/broken", "org/mid", "org/unused"]
+    assert sorted(ids(seeded.query_models(min_context=100000, max_context=1000000))) == ["Claude", "org/mid"]
+
+
+def test_models_top_n_orders_by_downloads(seeded):
+    assert ids(seeded.query_models(kind="hf", top_n=3)) == ["org/popular", "org/mid", "org/small"]
+    assert ids(seeded.query_models(kind="hf", top_n=2, max_context=100000)) == ["org/popular", "org/small"]
+
+
+def test_date_bounds(seeded):
+    assert seeded.date_bounds() == ("2023-03-14", "2024-03-04", 8)
+
+
+def test_models_data_is_bounded_by_default(seeded):
+    processor = DataProcessor(seeded)
+    default = inspect.signature(processor.get_models_data).parameters["max_background"].default
+    assert default == settings.PLOT_MAX_BACKGROUND_MODELS
+    assert default is not None
+
+    df = processor.get_models_data(max_background=2, top_n=1)
+    # 里程碑全部保留 + 下载量前 2 的背景模型 + 叠加的前 1 名；超出 Context 范围的被过滤
+    assert sorted(ids(df)) == ["Claude", "GPT-4", "org/mid", "org/popular", "org/popular"]
+    assert "org/broken" not in ids(processor.get_models_data(max_background=None))
+    assert "org/huge" not in ids(processor.get_models_data(max_background=None))
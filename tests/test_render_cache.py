@@ -0,0 +1,86 @@
+import os
+import time
+import pandas as pd
+import pytest
+import config.settings as settings
+from src.visualizers.render_cache import RenderCache
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return RenderCache(cache_dir=str(tmp_path / "cache"), manifest_path=str(tmp_path / "manifest.json"))
+
+
+@pytest.fixture
+def frame():
+    return pd.DataFrame({"date": pd.date_range("2024-01-01", periods=5), "value": range(5)})
+
+
+def test_fingerprint_tracks_inputs_options_and_settings(cache, frame, monkeypatch):
+    base = cache.fingerprint([frame], {"yscale": "log"})
+    assert cache.fingerprint([frame], {"yscale": "log"}) == base
+    assert cache.fingerprint([frame.assign(value=frame["value"] + 1)], {"yscale": "log"}) != base
+    assert cache.fingerprint([frame], {"yscale": "linear"}) != base
+    monkeypatch.setattr(settings, "LABEL_GRID_PX", settings.LABEL_GRID_PX * 2)
+    assert cache.fingerprint([frame], {"yscale": "log"}) != base
+
+
+def test_fingerprint_covers_extra_code_files(cache, frame, tmp_path):
+    extra = tmp_path / "extra.py"
+    extra.write_text("A = 1\n")
+    assert cache.fingerprint([frame], {}, code_files=[str(extra)]) != cache.fingerprint([frame], {})
+
+
+def test_render_hits_after_first_render(cache, frame, tmp_path):
+    calls = []
+
+    def render(path):
+        calls.append(path)
+        with open(path, "w") as f:
+            f.write("chart")
+
+    out = str(tmp_path / "chart.png")
+    assert cache.render(out, [frame], {}, render) is False
+    os.remove(out)
+    assert cache.render(out, [frame], {}, render) is True
+    assert len(calls) == 1
+    assert open(out).read() == "chart"
+    entry = cache.load_manifest()[out]
+    assert (entry["renders"], entry["hits"]) == (1, 1)
+
+
+def test_evicts_expired_then_least_recently_used(tmp_path):
+    cache = RenderCache(cache_dir=str(tmp_path / "cache"), manifest_path=str(tmp_path / "m.json"),
+                        max_bytes=250, max_age_days=30)
+    (tmp_path / "cache").mkdir()
+    now = time.time()
+    for name, age_days in (("expired", 40), ("old", 3), ("mid", 2), ("new", 1)):
+        path = tmp_path / "cache" / f"{name}.png"
+        path.write_bytes(b"x" * 100)
+        os.utime(path, (now - age_days * 86400,) * 2)
+
+    assert cache.evict() == 2
+    assert sorted(os.listdir(tmp_path / "cache")) == ["mid.png", "new.png"]
+
+
+def test_deferred_records_from_several_workers_are_all_applied(tmp_path, frame):
+    manifest = str(tmp_path / "manifest.json")
+    workers = [RenderCache(cache_dir=str(tmp_path / "cache"), manifest_path=manifest, defer_manifest=True)
+               for _ in range(2)]
+
+    def render(path):
+        with open(path, "w") as f:
+            f.write("chart")
+
+    outputs = [str(tmp_path / f"chart{i}.png") for i in range(2)]
+    for worker, out in zip(workers, outputs):
+        worker.render(out, [frame], {"out": out}, render)
+        worker.render(out, [frame], {"out": out}, render)
+    assert not os.path.exists(manifest)
+
+    parent = RenderCache(cache_dir=str(tmp_path / "cache"), manifest_path=manifest)
+    parent.apply_records([r for worker in workers for r in worker.take_records()])
+    entries = parent.load_manifest()
+    assert {out: (entries[out]["renders"], entries[out]["hits"]) for out in outputs} == \
+        {outputs[0]: (1, 1), outputs[1]: (1, 1)}
+    assert workers[0].take_records() == []
@@ -0,0 +1,41 @@
+import json
+import os
+import subprocess
+import sys
+import main
+import src.monitoring.metrics as metrics_module
+from src.database.db_manager import DBManager
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def seed(metrics):
+    db = DBManager("data/ecosystem.db", metrics=metrics)
+    db.save_github_data([(f"2024-{m:02d}-01", topic, m * 3 + i) for m in range(1, 7)
+                         for i, topic in enumerate(["agents", "rag", "mcp"])])
+    db.save_model_data([(f"org/model-{i}", f"2024-{i % 6 + 1:02d}-15", 4096 * (i + 1), 100 + i) for i in range(20)]
+                       + [("GPT-4", "2024-03-14", 128000, -1)])
+    db.close()
+
+
+def test_unchanged_db_hits_render_cache_from_the_second_run(tmp_path, monkeypatch, metrics, capsys):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(metrics_module, "_default_metrics", metrics)
+    seed(metrics)
+
+    for _ in range(3):
+        main.main(["render", "png", "html", "--no-show"])
+
+    manifest = json.load(open("output/render_manifest.json"))
+    assert {path: (entry["renders"], entry["hits"]) for path, entry in manifest.items()} == {
+        "output/detailed_model_comparison.png": (1, 2),
+        "output/interactive_ecosystem_chart.html": (1, 2),
+    }
+
+    # 新进程中命中缓存的 PNG 渲染不导入 matplotlib / seaborn
+    script = ("import sys, main; main.main(['render', 'png', '--no-show']); "
+              "print(sorted(m for m in ('matplotlib', 'seaborn') if m in sys.modules))")
+    out = subprocess.run([sys.executable, "-c", script], cwd=tmp_path, capture_output=True, text=True, check=True,
+                         env={**os.environ, "PYTHONPATH": REPO_ROOT}).stdout
+    assert "复用已渲染的图表" in out
+    assert out.strip().splitlines()[-1] == "[]"
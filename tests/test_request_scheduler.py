@@ -0,0 +1,102 @@
+import asyncio
+import threading
+import time
+from src.collectors.request_scheduler import RequestScheduler, PRIORITY_HIGH, PRIORITY_LOW, PRIORITY_NORMAL
+
+
+def make_scheduler(metrics, rate=20.0):
+    return RequestScheduler(rates={"example.com": rate}, metrics=metrics)
+
+
+def drain(scheduler, rate=20.0):
+    """用掉令牌桶的突发名额 (容量等于 rate)，之后的请求都要排队"""
+    for _ in range(int(rate)):
+        scheduler.acquire("example.com")
+
+
+def wait_for_queue(scheduler, depth, host="example.com"):
+    deadline = time.time() + 5
+    while scheduler.metrics()[host]["queue_depth"] < depth:
+        assert time.time() < deadline
+        time.sleep(0.005)
+
+
+def test_high_priority_overtakes_queued_low_priority(metrics):
+    scheduler = make_scheduler(metrics)
+    drain(scheduler)
+    order = []
+
+    def worker(name, priority):
+        scheduler.acquire("example.com", priority=priority)
+        order.append(name)
+
+    threads = []
+    for i in range(3):
+        threads.append(threading.Thread(target=worker, args=(f"low{i}", PRIORITY_LOW)))
+        threads[-1].start()
+        wait_for_queue(scheduler, i + 1)
+    threads.append(threading.Thread(target=worker, args=("high", PRIORITY_HIGH)))
+    threads[-1].start()
+    for t in threads:
+        t.join()
+
+    assert order == ["high", "low0", "low1", "low2"]
+    stats = scheduler.metrics()["example.com"]
+    assert stats["queue_depth"] == 0
+    assert stats["requests"] == 24
+
+
+def test_async_waiters_are_ordered_by_priority(metrics):
+    scheduler = make_scheduler(metrics)
+
+    async def main():
+        drain(scheduler)
+        order = []
+
+        async def worker(name, priority):
+            await scheduler.acquire_async("example.com", priority=priority)
+            order.append(name)
+
+        tasks = [asyncio.create_task(worker("normal", PRIORITY_NORMAL)),
+                 asyncio.create_task(worker("low", PRIORITY_LOW))]
+        await asyncio.sleep(0.01)
+        tasks.append(asyncio.create_task(worker("high", PRIORITY_HIGH)))
+        await asyncio.gather(*tasks)
+        return order
+
+    assert asyncio.run(main()) == ["high", "normal", "low"]
+
+
+def test_cancelled_waiter_leaves_the_queue(metrics):
+    scheduler = make_scheduler(metrics, rate=5.0)
+
+    async def main():
+        drain(scheduler, rate=5.0)
+        blocked = asyncio.create_task(scheduler.acquire_async("example.com", priority=PRIORITY_HIGH))
+        await asyncio.sleep(0.01)
+        blocked.cancel()
+        await asyncio.gather(blocked, return_exceptions=True)
+        await asyncio.wait_for(scheduler.acquire_async("example.com", priority=PRIORITY_LOW), timeout=2)
+
+    asyncio.run(main())
+    assert scheduler.metrics()["example.com"]["queue_depth"] == 0
+
+
+def test_rate_limit_headers_space_out_requests(metrics):
+    scheduler = make_scheduler(metrics, rate=1000.0)
+    reset = time.time() + 1.0
+    scheduler.update("example.com", None, 200, {"X-RateLimit-Remaining": "4", "X-RateLimit-Limit": "100",
+                                                 "X-RateLimit-Reset": str(reset)})
+    start = time.time()
+    for _ in range(3):
+        scheduler.acquire("example.com")
+    # 剩余 4 次配额分摊到 1 秒窗口：第 2、3 个请求各等约 1/4、1/3 秒
+    assert time.time() - start > 0.4
+
+
+def test_throttled_response_blocks_host(metrics):
+    scheduler = make_scheduler(metrics, rate=1000.0)
+    assert scheduler.update("example.com", None, 429, {"Retry-After": "0.2"})
+    start = time.time()
+    scheduler.acquire("example.com")
+    assert time.time() - start >= 0.15
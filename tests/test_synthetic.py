@@ -0,0 +1,30 @@
+import sqlite3
+from benchmarks import synthetic
+
+
+def test_rows_beyond_the_date_span_add_topics_instead_of_dates(tmp_path, monkeypatch):
+    monkeypatch.setattr(synthetic, "MAX_DATES", 10)
+    db_path = str(tmp_path / "bench.db")
+    summary = synthetic.generate(db_path, github_rows=100, topics=2, models=20)
+    assert summary == {"github_rows": 100, "topics": 10, "models": 20}
+
+    with sqlite3.connect(db_path) as conn:
+        count, first, last, topics = conn.execute(
+            "SELECT COUNT(*), MIN(date), MAX(date), COUNT(DISTINCT topic) FROM github_stats").fetchone()
+    assert (count, first, last, topics) == (100, "2015-01-01", "2015-01-10", 10)
+
+
+
+def test_benchmark_writes_only_inside_its_workdir(tmp_path, monkeypatch):
+    from benchmarks.run_benchmarks import run
+    cwd = tmp_path / "cwd"
+    cwd.mkdir()
+    monkeypatch.chdir(cwd)
+    workdir = tmp_path / "work"
+    workdir.mkdir()
+    sizes, results = run(str(workdir), github_rows=200, topics=5, models=50,
+                         stages=["get_plotting_data", "generate_html_chart"])
+    assert sizes["github_rows"] == 200
+    assert set(results) == {"get_plotting_data", "generate_html_chart"}
+    # 不在当前目录留下 data/metrics.db 或 output/
+    assert list(cwd.iterdir()) == []
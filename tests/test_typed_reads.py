@@ -0,0 +1,31 @@
+import pandas as pd
+
+
+def test_read_typed_converts_while_reading_in_chunks(db):
+    db.save_github_data([("2024-01-01", "agents", 3), ("2024-01-02", "agents", 5),
+                         ("2024-01-02", "rag", 7), ("2024-01-03", "mcp", 300)])
+    df = db.load_github_stats(chunksize=2).sort_values(["date", "topic"], ignore_index=True)
+
+    assert pd.api.types.is_datetime64_any_dtype(df["date"])
+    # 每批各自的类别在合并后统一，而不是退化为 object
+    assert isinstance(df["topic"].dtype, pd.CategoricalDtype)
+    assert sorted(df["topic"].cat.categories) == ["agents", "mcp", "rag"]
+    assert df["topic"].astype(str).tolist() == ["agents", "agents", "rag", "mcp"]
+    assert df["repo_count"].dtype == "int16"
+    assert df["repo_count"].tolist() == [3, 5, 7, 300]
+
+
+def test_read_typed_model_columns(db):
+    db.save_model_data([("org/a", "2024-01-01", 4096, 10), ("org/b", "2024-02-01", 2000000, 5000000000)])
+    df = db.load_model_stats(chunksize=1)
+
+    assert pd.api.types.is_datetime64_any_dtype(df["created_at"])
+    assert pd.api.types.is_string_dtype(df["model_id"])
+    assert df["context_length"].dtype == "int32"
+    assert df["downloads"].dtype == "int64"
+
+
+def test_read_typed_empty_result_keeps_columns(db):
+    df = db.query_github_stats(start="2030-01-01")
+    assert df.empty
+    assert list(df.columns) == ["date", "topic", "repo_count"]